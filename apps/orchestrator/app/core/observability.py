@@ -150,6 +150,21 @@ class ObservabilityManager:
             registry=self.registry
         )
         
+        # Engine result cache metrics
+        self.engine_cache_counter = Counter(
+            'engine_cache_requests_total',
+            'Engine result cache lookups',
+            ['task', 'tier', 'result'],
+            registry=self.registry
+        )
+        
+        self.engine_cache_entries = Gauge(
+            'engine_cache_entries',
+            'Entries held in the engine result cache',
+            ['tier'],
+            registry=self.registry
+        )
+        
         # System metrics
         self.active_connections = Gauge(
             'active_database_connections',
@@ -209,6 +224,7 @@ class ObservabilityManager:
             'valuation': self.valuation_counter,
             'panel_simulation': self.panel_simulation_counter,
             'export': self.export_counter,
+            'engine_cache': self.engine_cache_counter,
         }
         
         if counter_name in counter_map:
@@ -237,6 +253,7 @@ class ObservabilityManager:
             'active_connections': self.active_connections,
             'celery_queue_size': self.celery_queue_size,
             'memory_usage': self.memory_usage,
+            'engine_cache_entries': self.engine_cache_entries,
         }
         
         if gauge_name in gauge_map:
@@ -1,14 +1,19 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery_app import celery_app
-from typing import Dict, Any, List, Optional
+from result_cache import cached_result
+from solvers import solve_for_target, solver_diagnostics
+from typing import Dict, Any, List, Optional, Tuple
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 import math
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True)
+@cached_result('cap_table.simulate')
 def simulate_cap_table(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Simulate cap table with pre/post investment calculations and waterfall analysis
@@ -62,6 +67,60 @@ def simulate_cap_table(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str,
         logger.error(f"Cap table simulation failed for pitch_id: {pitch_id}, error: {str(e)}")
         raise
 
+@celery_app.task(bind=True)
+def simulate_exit_distribution(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monte Carlo expected proceeds per holder over a distribution of exits
+    """
+    try:
+        logger.info(f"Starting exit distribution simulation for pitch_id: {pitch_id}")
+
+        post_investment_table = inputs.get('post_investment_table', [])
+        liquidation_preference = inputs.get('liquidation_preference', 1.0)
+        cost_basis = dict(inputs.get('cost_basis', {}))
+
+        # Build the post-investment table the same way simulate_cap_table does;
+        # the new investor's cost basis is then its investment amount
+        if not post_investment_table:
+            current_cap_table = inputs.get('current_cap_table', []) or create_default_cap_table()
+            post_investment_table = calculate_cap_table_changes(
+                current_cap_table,
+                inputs.get('investment_amount', 0),
+                inputs.get('pre_money_valuation', 0),
+                inputs.get('new_investor_ownership', 0),
+                inputs.get('option_pool_size', 0.1),
+                inputs.get('anti_dilution', False)
+            )['post_investment_table']
+            if inputs.get('investment_amount', 0) > 0:
+                cost_basis.setdefault('New Investor', inputs['investment_amount'])
+
+        distribution = calculate_exit_distribution(
+            post_investment_table,
+            liquidation_preference,
+            exit_distribution=inputs.get('exit_distribution', {}),
+            exit_years=inputs.get('exit_years', 7),
+            discount_rate=inputs.get('discount_rate', 0.0),
+            samples=inputs.get('samples', 100000),
+            seed=inputs.get('seed', 42),
+            percentiles=inputs.get('percentiles', [10, 50, 90]),
+            cost_basis=cost_basis
+        )
+
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "post_investment_table": post_investment_table,
+            "exit_distribution": distribution,
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Exit distribution simulation completed for pitch_id: {pitch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Exit distribution simulation failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
 def create_default_cap_table() -> List[Dict[str, Any]]:
     """Create a default cap table for early-stage companies"""
     
@@ -84,14 +143,107 @@ def create_default_cap_table() -> List[Dict[str, Any]]:
         }
     ]
 
+# Share types in liquidation priority order; the index is the type code
+SHARE_TYPES = ('Options', 'Common', 'Preferred')
+
+@dataclass
+class CapTable:
+    """
+    Struct-of-arrays cap table: one NumPy column per field instead of one
+    dict per holder.
+
+    Converts losslessly from and to the list-of-dicts format used by the
+    rest of this module. Optional columns (dilution, seniority, series) are
+    None when the source rows did not carry them, and are then omitted again
+    by to_records. Share types outside SHARE_TYPES get their own codes.
+    """
+    holders: List[str]
+    shares: np.ndarray
+    ownership: np.ndarray
+    type_codes: np.ndarray
+    price_per_share: np.ndarray
+    total_value: np.ndarray
+    dilution: Optional[np.ndarray] = None
+    seniority: Optional[np.ndarray] = None
+    series: Optional[List[str]] = None
+    type_names: Tuple[str, ...] = SHARE_TYPES
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'CapTable':
+        """Build a CapTable from list-of-dicts rows"""
+        type_names = list(SHARE_TYPES)
+        for entry in records:
+            if entry['type'] not in type_names:
+                type_names.append(entry['type'])
+        codes = {name: code for code, name in enumerate(type_names)}
+        
+        return cls(
+            holders=[entry['holder'] for entry in records],
+            shares=np.array([entry['shares'] for entry in records], dtype=float),
+            ownership=np.array([entry['ownership'] for entry in records], dtype=float),
+            type_codes=np.array([codes[entry['type']] for entry in records], dtype=np.int8),
+            price_per_share=np.array([entry['price_per_share'] for entry in records], dtype=float),
+            total_value=np.array([entry['total_value'] for entry in records], dtype=float),
+            dilution=np.array([entry.get('dilution', 0) for entry in records], dtype=float)
+            if any('dilution' in entry for entry in records) else None,
+            seniority=np.array([entry.get('seniority', 0) for entry in records], dtype=float)
+            if any('seniority' in entry for entry in records) else None,
+            series=[entry.get('series') for entry in records]
+            if any('series' in entry for entry in records) else None,
+            type_names=tuple(type_names)
+        )
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert back to list-of-dicts rows"""
+        columns = {
+            'holder': self.holders,
+            'shares': self.shares.tolist(),
+            'ownership': self.ownership.tolist(),
+            'type': [self.type_names[code] for code in self.type_codes.tolist()],
+            'price_per_share': self.price_per_share.tolist(),
+            'total_value': self.total_value.tolist()
+        }
+        if self.dilution is not None:
+            columns['dilution'] = self.dilution.tolist()
+        if self.seniority is not None:
+            columns['seniority'] = self.seniority.tolist()
+        if self.series is not None:
+            columns['series'] = self.series
+        
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+    
+    def __len__(self) -> int:
+        return len(self.holders)
+    
+    @property
+    def total_shares(self) -> float:
+        return float(self.shares.sum())
+    
+    def type_mask(self, share_type: str) -> np.ndarray:
+        """Boolean mask of rows with the given share type"""
+        if share_type not in self.type_names:
+            return np.zeros(len(self), dtype=bool)
+        return self.type_codes == self.type_names.index(share_type)
+    
+    def holder_mask(self, substring: str) -> np.ndarray:
+        """Boolean mask of rows whose holder name contains substring"""
+        return np.array([substring in holder for holder in self.holders], dtype=bool)
+
 def calculate_cap_table_changes(current_table: List[Dict[str, Any]], 
                               investment_amount: float,
                               pre_money_valuation: float,
                               new_investor_ownership: float,
                               option_pool_size: float,
-                              anti_dilution: bool) -> Dict[str, Any]:
+                              anti_dilution: Any) -> Dict[str, Any]:
     """
     Calculate cap table changes from investment
+
+    anti_dilution may be False, True (broad-based weighted average) or one
+    of ANTI_DILUTION_METHODS; existing Preferred rows priced above the new
+    round then receive additional as-converted shares. The new shares are
+    solved together with those protection shares so the investor keeps the
+    ownership it would have without protection; if no such round exists
+    the summary reports the shortfall.
     """
     
     # Calculate total shares and value
@@ -109,17 +261,31 @@ def calculate_cap_table_changes(current_table: List[Dict[str, Any]],
         target_option_pool = total_shares * option_pool_size
         option_pool_expansion = max(0, target_option_pool - current_option_pool)
     
+    # Investor ownership before any anti-dilution protection
+    pre_round_shares = total_shares + option_pool_expansion
+    target_investor_ownership = new_shares_needed / (pre_round_shares + new_shares_needed) if new_shares_needed > 0 else 0
+    
+    # Anti-dilution protection for existing preferred in a down round
+    anti_dilution_shares = [0] * len(current_table)
+    if anti_dilution and investment_amount > 0 and new_shares_needed > 0:
+        method = anti_dilution if isinstance(anti_dilution, str) else 'broad_based'
+        new_shares_needed, protection = solve_anti_dilution_round(
+            current_table, investment_amount, new_shares_needed, pre_round_shares, method
+        )
+        for row, additional_shares in zip(protection['protected_rows'], protection['additional_shares'][:, 0]):
+            anti_dilution_shares[row] = additional_shares.item()
+    
     # Create post-investment table
     post_table = []
-    total_new_shares = total_shares + new_shares_needed + option_pool_expansion
+    total_new_shares = total_shares + new_shares_needed + option_pool_expansion + sum(anti_dilution_shares)
     
     # Update existing holders
-    for entry in current_table:
+    for row, entry in enumerate(current_table):
         if entry['type'] == 'Options':
             # Expand option pool if needed
             new_shares = entry['shares'] + option_pool_expansion
         else:
-            new_shares = entry['shares']
+            new_shares = entry['shares'] + anti_dilution_shares[row]
         
         new_ownership = new_shares / total_new_shares
         new_value = new_ownership * post_money_valuation
@@ -147,15 +313,20 @@ def calculate_cap_table_changes(current_table: List[Dict[str, Any]],
         })
     
     # Investment summary
+    new_investor_ownership_after = new_shares_needed / total_new_shares if investment_amount > 0 else 0
     investment_summary = {
         'pre_money_valuation': pre_money_valuation,
         'investment_amount': investment_amount,
         'post_money_valuation': post_money_valuation,
         'new_shares_issued': new_shares_needed,
         'option_pool_expansion': option_pool_expansion,
+        'anti_dilution_shares': sum(anti_dilution_shares),
         'total_shares_before': total_shares,
         'total_shares_after': total_new_shares,
-        'price_per_share': investment_amount / new_shares_needed if new_shares_needed > 0 else 0
+        'price_per_share': investment_amount / new_shares_needed if new_shares_needed > 0 else 0,
+        'target_investor_ownership': target_investor_ownership,
+        'new_investor_ownership': new_investor_ownership_after,
+        'investor_ownership_shortfall': max(0, target_investor_ownership - new_investor_ownership_after)
     }
     
     return {
@@ -182,17 +353,19 @@ def generate_waterfall_analysis(cap_table: List[Dict[str, Any]],
         {'name': 'Home Run', 'multiple': 5.0, 'value': total_value * 5.0}
     ]
     
+    # Solve all scenarios in a single pass over the cap table
+    matrix = calculate_waterfall_matrix(
+        cap_table, [scenario['value'] for scenario in exit_scenarios], liquidation_preference
+    )
+    
     waterfall_results = []
     
-    for scenario in exit_scenarios:
-        exit_value = scenario['value']
-        waterfall = calculate_waterfall_for_exit(cap_table, exit_value, liquidation_preference)
-        
+    for column, scenario in enumerate(exit_scenarios):
         waterfall_results.append({
             'scenario': scenario['name'],
-            'exit_value': exit_value,
+            'exit_value': scenario['value'],
             'multiple': scenario['multiple'],
-            'waterfall': waterfall
+            'waterfall': waterfall_rows_from_matrix(matrix, column)
         })
     
     return {
@@ -200,6 +373,369 @@ def generate_waterfall_analysis(cap_table: List[Dict[str, Any]],
         'liquidation_preference': liquidation_preference
     }
 
+def calculate_waterfall_matrix(cap_table: List[Dict[str, Any]],
+                               exit_values: Any,
+                               liquidation_preference: float) -> Dict[str, Any]:
+    """
+    Calculate the liquidation waterfall for many exit values at once.
+
+    Holders are ordered exactly as in calculate_waterfall_for_exit (by
+    liquidation priority) and the returned 'payouts' matrix has shape
+    (holders x exits), so column j matches calculate_waterfall_for_exit
+    for exit_values[j]. Exit values are expected to be non-negative.
+    """
+    
+    exits = np.atleast_1d(np.asarray(exit_values, dtype=float))
+    sorted_table = sort_by_liquidation_priority(cap_table)
+    columns = CapTable.from_records(sorted_table)
+    
+    shares = columns.shares
+    is_preferred = columns.type_mask('Preferred')
+    preferences = np.where(is_preferred, shares * columns.price_per_share * liquidation_preference, 0.0)
+    
+    payouts = np.zeros((len(sorted_table), exits.size))
+    remaining_value = exits.copy()
+    
+    # Preferred holders are paid in priority order; the loop runs once per
+    # series, every exit value is settled together
+    for row in np.flatnonzero(is_preferred):
+        actual_value = np.minimum(preferences[row], remaining_value)
+        payouts[row] = actual_value
+        remaining_value = remaining_value - actual_value
+    
+    # Common shares split the residual proportionally
+    total_common_shares = shares[~is_preferred].sum()
+    if total_common_shares > 0:
+        payout_per_share = np.where(remaining_value > 0, remaining_value / total_common_shares, 0.0)
+        payouts[~is_preferred] = shares[~is_preferred, None] * payout_per_share[None, :]
+    
+    return {
+        'table': sorted_table,
+        'holders': [entry['holder'] for entry in sorted_table],
+        'types': [entry['type'] for entry in sorted_table],
+        'liquidation_preferences': preferences,
+        'exit_values': exits,
+        'payouts': payouts
+    }
+
+def waterfall_rows_from_matrix(matrix: Dict[str, Any], column: int) -> List[Dict[str, Any]]:
+    """Expand one exit column of a waterfall matrix into per-holder rows"""
+    
+    return [
+        {
+            'holder': entry['holder'],
+            'type': entry['type'],
+            'shares': entry['shares'],
+            'liquidation_preference': matrix['liquidation_preferences'][row].item() if entry['type'] == 'Preferred' else 0,
+            'actual_payout': matrix['payouts'][row, column].item(),
+            'ownership_percentage': entry['ownership']
+        }
+        for row, entry in enumerate(matrix['table'])
+    ]
+
+def calculate_payout_breakpoints(cap_table: List[Dict[str, Any]],
+                                 liquidation_preference: float) -> Dict[str, Any]:
+    """
+    Solve the piecewise-linear payout curve of every holder once per cap table.
+
+    Breakpoints are the exit values where a preference is exhausted; between
+    two breakpoints each holder's payout grows linearly with its segment
+    slope, and past the last breakpoint common holders take the residual
+    pro rata.
+    """
+    
+    sorted_table = sort_by_liquidation_priority(cap_table)
+    columns = CapTable.from_records(sorted_table)
+    shares = columns.shares
+    is_preferred = columns.type_mask('Preferred')
+    preferences = np.where(is_preferred, shares * columns.price_per_share * liquidation_preference, 0.0)
+    
+    breakpoints = np.unique(np.concatenate(([0.0], np.cumsum(preferences[is_preferred]))))
+    payouts = calculate_waterfall_matrix(sorted_table, breakpoints, liquidation_preference)['payouts']
+    
+    # Slope of each segment; the last one is the open-ended common tail
+    slopes = np.zeros_like(payouts)
+    if breakpoints.size > 1:
+        slopes[:, :-1] = np.diff(payouts, axis=1) / np.diff(breakpoints)[None, :]
+    total_common_shares = shares[~is_preferred].sum()
+    if total_common_shares > 0:
+        slopes[~is_preferred, -1] = shares[~is_preferred] / total_common_shares
+    
+    return {
+        'holders': columns.holders,
+        'types': [entry['type'] for entry in sorted_table],
+        'liquidation_preference': liquidation_preference,
+        'breakpoints': breakpoints,
+        'payouts': payouts,
+        'slopes': slopes
+    }
+
+def evaluate_payout_breakpoints(breakpoint_model: Dict[str, Any], exit_values: Any) -> np.ndarray:
+    """
+    Evaluate a breakpoint model at arbitrary exit values (holders x exits).
+
+    Each lookup is a binary search over the breakpoints, independent of the
+    number of holders.
+    """
+    
+    exits = np.atleast_1d(np.asarray(exit_values, dtype=float))
+    breakpoints = breakpoint_model['breakpoints']
+    
+    segment = np.clip(np.searchsorted(breakpoints, exits, side='right') - 1, 0, breakpoints.size - 1)
+    offset = np.maximum(exits - breakpoints[segment], 0.0)
+    
+    return breakpoint_model['payouts'][:, segment] + breakpoint_model['slopes'][:, segment] * offset[None, :]
+
+def solve_exit_value_for_payout(cap_table: List[Dict[str, Any]],
+                                holders: Any,
+                                targets: Any,
+                                liquidation_preference: float,
+                                target_type: str = 'payout') -> Dict[str, Any]:
+    """
+    Reverse waterfall: the exit value at which each holder's total payout
+    (or payout / invested for target_type='multiple') reaches its target.
+
+    holders and targets broadcast, so one holder can be solved for many
+    targets at once. Payouts are evaluated on the breakpoint model, and
+    on flat stretches (a capped preference) any exit value on the flat
+    part is a valid answer. Targets above a holder's maximum payout come
+    back unbracketed.
+    """
+    
+    breakpoint_model = calculate_payout_breakpoints(cap_table, liquidation_preference)
+    holder_names = list(dict.fromkeys(breakpoint_model['holders']))
+    holder_index = {holder: index for index, holder in enumerate(holder_names)}
+    row_holders = np.array([holder_index[holder] for holder in breakpoint_model['holders']])
+    
+    # Sum rows per holder so multi-class holders are solved on their total
+    holder_payouts = np.zeros((len(holder_names), breakpoint_model['payouts'].shape[1]))
+    holder_slopes = np.zeros_like(holder_payouts)
+    np.add.at(holder_payouts, row_holders, breakpoint_model['payouts'])
+    np.add.at(holder_slopes, row_holders, breakpoint_model['slopes'])
+    
+    invested = np.zeros(len(holder_names))
+    for entry in cap_table:
+        invested[holder_index[entry['holder']]] += entry['shares'] * entry.get('price_per_share', 0)
+    
+    holder_names_array, targets = np.broadcast_arrays(np.asarray(holders, dtype=object), np.asarray(targets, dtype=float))
+    unknown = [holder for holder in set(holder_names_array.ravel().tolist()) if holder not in holder_index]
+    if unknown:
+        raise ValueError(f"Unknown holders: {', '.join(map(str, unknown))}")
+    rows = np.vectorize(holder_index.get, otypes=[np.int64])(holder_names_array)
+    
+    if target_type == 'multiple':
+        payout_targets = targets * invested[rows]
+    elif target_type == 'payout':
+        payout_targets = targets
+    else:
+        raise ValueError(f"Unsupported target type: {target_type}")
+    
+    breakpoints = breakpoint_model['breakpoints']
+    
+    def payouts_at(exit_values: np.ndarray) -> np.ndarray:
+        segment = np.clip(np.searchsorted(breakpoints, exit_values, side='right') - 1, 0, breakpoints.size - 1)
+        offset = np.maximum(exit_values - breakpoints[segment], 0.0)
+        return holder_payouts[rows, segment] + holder_slopes[rows, segment] * offset
+    
+    upper = max(float(breakpoints[-1]) * 2, 1.0)
+    solution = solve_for_target(payouts_at, payout_targets, 0.0, upper, max_expansions=40)
+    
+    return {
+        **solution,
+        'holders': holder_names_array.ravel().tolist(),
+        'targets': targets.ravel()
+    }
+
+def export_payout_breakpoints(breakpoint_model: Dict[str, Any], max_exit_value: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Export per-holder payout curves as chart-ready (exit_value, payout) points.
+
+    When max_exit_value lies beyond the last breakpoint a closing point is
+    added so the common tail can be drawn.
+    """
+    
+    breakpoints = breakpoint_model['breakpoints']
+    payouts = breakpoint_model['payouts']
+    if max_exit_value is not None and max_exit_value > breakpoints[-1]:
+        breakpoints = np.append(breakpoints, max_exit_value)
+        payouts = evaluate_payout_breakpoints(breakpoint_model, breakpoints)
+    
+    return [
+        {
+            'holder': holder,
+            'type': share_type,
+            'points': [
+                {'exit_value': exit_value, 'payout': payout}
+                for exit_value, payout in zip(breakpoints.tolist(), payouts[row].tolist())
+            ]
+        }
+        for row, (holder, share_type) in enumerate(zip(breakpoint_model['holders'], breakpoint_model['types']))
+    ]
+
+def draw_exit_values(exit_distribution: Dict[str, Any], size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw exit values from a lognormal or user-supplied histogram distribution
+    """
+    
+    distribution_type = exit_distribution.get('type', 'lognormal')
+    
+    if distribution_type == 'lognormal':
+        median = exit_distribution.get('median', 50000000)
+        sigma = exit_distribution.get('sigma', 1.0)
+        return rng.lognormal(mean=math.log(median), sigma=sigma, size=size)
+    
+    if distribution_type == 'histogram':
+        # Pick a bin by weight, then draw uniformly inside it
+        bin_edges = np.asarray(exit_distribution['bin_edges'], dtype=float)
+        weights = np.asarray(exit_distribution.get('weights', np.ones(bin_edges.size - 1)), dtype=float)
+        bins = rng.choice(weights.size, size=size, p=weights / weights.sum())
+        return rng.uniform(bin_edges[bins], bin_edges[bins + 1])
+    
+    raise ValueError(f"Unsupported exit distribution type: {distribution_type}")
+
+def draw_exit_years(exit_years: Any, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw exit years from a fixed value, a uniform range or weighted values
+    """
+    
+    if isinstance(exit_years, (int, float)):
+        return np.full(size, float(exit_years))
+    
+    if 'values' in exit_years:
+        values = np.asarray(exit_years['values'], dtype=float)
+        weights = np.asarray(exit_years.get('weights', np.ones(values.size)), dtype=float)
+        return rng.choice(values, size=size, p=weights / weights.sum())
+    
+    return rng.uniform(exit_years.get('min', 3), exit_years.get('max', 10), size=size)
+
+def calculate_exit_distribution(cap_table: List[Dict[str, Any]],
+                                liquidation_preference: float,
+                                exit_distribution: Dict[str, Any],
+                                exit_years: Any = 7,
+                                discount_rate: float = 0.0,
+                                samples: int = 100000,
+                                seed: int = 42,
+                                percentiles: Optional[List[float]] = None,
+                                cost_basis: Optional[Dict[str, float]] = None,
+                                max_batch_cells: int = 4000000,
+                                histogram_bins: int = 1024) -> Dict[str, Any]:
+    """
+    Reduce seeded exit samples to per-holder proceeds statistics.
+
+    Samples are processed in batches sized so that a batch never holds more
+    than max_batch_cells payouts (one per cap table row and sample); means and probability of loss are exact,
+    percentiles come from per-holder log-spaced histograms (about 2% wide)
+    so memory stays flat however many samples are drawn. Exit values and exit years use
+    independent random streams, so results do not depend on batch size.
+    Proceeds are discounted by (1 + discount_rate) ** exit_year.
+    
+    Rows of the same holder are summed into one result. cost_basis maps
+    holders to what they paid; probability_of_loss is only reported for
+    holders in it, since table values are carrying values, not cost.
+    """
+    
+    percentiles = percentiles if percentiles is not None else [10, 50, 90]
+    cost_basis = cost_basis or {}
+    
+    breakpoint_model = calculate_payout_breakpoints(cap_table, liquidation_preference)
+    
+    # Payout rows (one per cap table row) are summed per holder by index
+    holder_index: Dict[str, int] = {}
+    holder_share_types: List[Dict[str, None]] = []
+    for holder, share_type in zip(breakpoint_model['holders'], breakpoint_model['types']):
+        if holder not in holder_index:
+            holder_index[holder] = len(holder_index)
+            holder_share_types.append({})
+        holder_share_types[holder_index[holder]][share_type] = None
+    holders = list(holder_index)
+    holder_rows = np.array([holder_index[holder] for holder in breakpoint_model['holders']], dtype=np.int64)
+    holder_types = ['/'.join(share_types) for share_types in holder_share_types]
+    n_holders = len(holders)
+    
+    # Loss is measured against each holder's explicit cost basis
+    has_cost_basis = np.array([holder in cost_basis for holder in holders], dtype=bool)
+    thresholds = np.array([cost_basis.get(holder, 0.0) for holder in holders], dtype=float)
+    
+    # Log-spaced histogram edges around the size of the table; bin 0 holds
+    # zero proceeds, the last bin absorbs the far tail
+    scale = max(sum(entry['total_value'] for entry in cap_table), 1.0)
+    edges = np.concatenate(([0.0], np.logspace(math.log10(scale) - 6, math.log10(scale) + 3, histogram_bins)))
+    n_bins = edges.size
+    
+    exit_rng, year_rng = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(2)]
+    batch_size = max(1, min(samples, max_batch_cells // max(holder_rows.size, 1)))
+    
+    proceeds_sum = np.zeros(n_holders)
+    loss_count = np.zeros(n_holders, dtype=np.int64)
+    histogram = np.zeros(n_holders * n_bins, dtype=np.int64)
+    histogram_sums = np.zeros(n_holders * n_bins)
+    exit_sum = 0.0
+    row_offsets = (np.arange(n_holders) * n_bins)[:, None]
+    
+    drawn = 0
+    while drawn < samples:
+        size = min(batch_size, samples - drawn)
+        exits = draw_exit_values(exit_distribution, size, exit_rng)
+        years = draw_exit_years(exit_years, size, year_rng)
+        
+        proceeds = np.zeros((n_holders, size))
+        np.add.at(proceeds, holder_rows, evaluate_payout_breakpoints(breakpoint_model, exits))
+        if discount_rate:
+            proceeds /= (1 + discount_rate) ** years[None, :]
+        
+        proceeds_sum += proceeds.sum(axis=1)
+        loss_count += (proceeds < thresholds[:, None]).sum(axis=1)
+        bins = np.minimum(np.searchsorted(edges, proceeds, side='left'), n_bins - 1)
+        flat_bins = (bins + row_offsets).ravel()
+        histogram += np.bincount(flat_bins, minlength=n_holders * n_bins)
+        histogram_sums += np.bincount(flat_bins, weights=proceeds.ravel(), minlength=n_holders * n_bins)
+        exit_sum += exits.sum()
+        drawn += size
+    
+    holder_percentiles = histogram_percentiles(
+        histogram.reshape(n_holders, n_bins), histogram_sums.reshape(n_holders, n_bins), percentiles
+    )
+    
+    holder_results = []
+    for row, holder in enumerate(holders):
+        holder_results.append({
+            'holder': holder,
+            'type': holder_types[row],
+            'mean_proceeds': float(proceeds_sum[row] / samples),
+            'percentiles': {f"p{q:g}": float(holder_percentiles[row, column]) for column, q in enumerate(percentiles)},
+            'probability_of_loss': float(loss_count[row] / samples) if has_cost_basis[row] else None,
+            'cost_basis': float(thresholds[row]) if has_cost_basis[row] else None
+        })
+    
+    return {
+        'samples': samples,
+        'seed': seed,
+        'batch_size': batch_size,
+        'discount_rate': discount_rate,
+        'mean_exit_value': float(exit_sum / samples),
+        'holders': holder_results
+    }
+
+def histogram_percentiles(counts: np.ndarray, sums: np.ndarray, percentiles: List[float]) -> np.ndarray:
+    """
+    Estimate percentiles from per-row histograms as the mean value of the
+    bin that holds each percentile, which is exact for point masses such as
+    a fully paid preference
+    """
+    
+    cumulative = np.cumsum(counts, axis=1)
+    totals = cumulative[:, -1]
+    rows = np.arange(counts.shape[0])
+    result = np.zeros((counts.shape[0], len(percentiles)))
+    
+    for column, q in enumerate(percentiles):
+        # First bin whose cumulative count reaches the percentile
+        target = totals * q / 100
+        bins = np.minimum((cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+        result[:, column] = sums[rows, bins] / np.maximum(counts[rows, bins], 1)
+    
+    return result
+
 def calculate_waterfall_for_exit(cap_table: List[Dict[str, Any]], 
                                exit_value: float,
                                liquidation_preference: float) -> List[Dict[str, Any]]:
@@ -210,8 +746,9 @@ def calculate_waterfall_for_exit(cap_table: List[Dict[str, Any]],
     waterfall = []
     remaining_value = exit_value
     
-    # Sort by liquidation preference (Preferred first, then Common)
-    sorted_table = sorted(cap_table, key=lambda x: get_liquidation_priority(x['type']), reverse=True)
+    # Sort by liquidation preference (Preferred first, senior series first, then Common)
+    sorted_table = sort_by_liquidation_priority(cap_table)
+    total_common_shares = sum(e['shares'] for e in sorted_table if e['type'] != 'Preferred')
     
     for entry in sorted_table:
         if entry['type'] == 'Preferred':
@@ -233,7 +770,6 @@ def calculate_waterfall_for_exit(cap_table: List[Dict[str, Any]],
         else:
             # Common shares split remaining value proportionally
             if remaining_value > 0:
-                total_common_shares = sum(e['shares'] for e in sorted_table if e['type'] != 'Preferred')
                 if total_common_shares > 0:
                     payout_per_share = remaining_value / total_common_shares
                     actual_value = entry['shares'] * payout_per_share
@@ -262,27 +798,44 @@ def get_liquidation_priority(share_type: str) -> int:
     }
     return priorities.get(share_type, 0)
 
+def sort_by_liquidation_priority(cap_table: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Order a cap table for the waterfall: by share type priority, then by the
+    optional per-series 'seniority' (higher is paid first). The sort is
+    stable, so rows without seniority keep their table order.
+    """
+    return sorted(
+        cap_table,
+        key=lambda x: (get_liquidation_priority(x['type']), x.get('seniority', 0)),
+        reverse=True
+    )
+
 def calculate_cap_table_metrics(cap_table_result: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculate key cap table metrics
     """
     
     pre_table = cap_table_result['pre_investment_table']
-    post_table = cap_table_result['post_investment_table']
     investment_summary = cap_table_result['investment_summary']
     
+    # Single conversion to columns; every metric below is a masked sum
+    post = CapTable.from_records(cap_table_result['post_investment_table'])
+    founders = post.holder_mask('Founder')
+    dilution = post.dilution if post.dilution is not None else np.zeros(len(post))
+    
     # Ownership concentration
-    founder_ownership = sum(entry['ownership'] for entry in post_table if 'Founder' in entry['holder'])
-    investor_ownership = sum(entry['ownership'] for entry in post_table if entry['type'] == 'Preferred')
-    option_pool_ownership = sum(entry['ownership'] for entry in post_table if entry['type'] == 'Options')
+    founder_ownership = float(post.ownership[founders].sum())
+    investor_ownership = float(post.ownership[post.type_mask('Preferred')].sum())
+    option_pool_ownership = float(post.ownership[post.type_mask('Options')].sum())
     
     # Dilution analysis
-    total_dilution = sum(entry.get('dilution', 0) for entry in post_table)
-    founder_dilution = sum(entry.get('dilution', 0) for entry in post_table if 'Founder' in entry['holder'])
+    total_dilution = float(dilution.sum())
+    founder_dilution = float(dilution[founders].sum())
+    diluted_holders = int(np.count_nonzero(dilution > 0))
     
     # Valuation metrics
     pre_money_per_share = investment_summary['pre_money_valuation'] / sum(entry['shares'] for entry in pre_table)
-    post_money_per_share = investment_summary['post_money_valuation'] / sum(entry['shares'] for entry in post_table)
+    post_money_per_share = investment_summary['post_money_valuation'] / post.total_shares
     
     metrics = {
         'ownership_distribution': {
@@ -294,7 +847,7 @@ def calculate_cap_table_metrics(cap_table_result: Dict[str, Any]) -> Dict[str, A
         'dilution_analysis': {
             'total_dilution': total_dilution,
             'founder_dilution': founder_dilution,
-            'average_dilution': total_dilution / len([e for e in post_table if e.get('dilution', 0) > 0]) if any(e.get('dilution', 0) > 0 for e in post_table) else 0
+            'average_dilution': total_dilution / diluted_holders if diluted_holders > 0 else 0
         },
         'valuation_metrics': {
             'pre_money_per_share': pre_money_per_share,
@@ -311,7 +864,285 @@ def calculate_cap_table_metrics(cap_table_result: Dict[str, Any]) -> Dict[str, A
     
     return metrics
 
+# Supported anti-dilution adjustments for calculate_anti_dilution_sweep
+ANTI_DILUTION_METHODS = ('broad_based', 'narrow_based', 'full_ratchet')
+
+def calculate_anti_dilution_sweep(cap_table: List[Dict[str, Any]],
+                                  new_prices: Any,
+                                  new_money: float,
+                                  method: str = 'broad_based') -> Dict[str, Any]:
+    """
+    Evaluate anti-dilution adjustments for many hypothetical round prices.
+
+    Preferred rows are protected, with their price_per_share as the original
+    conversion price CP1. Weighted-average methods use
+    CP2 = CP1 * (A + B) / (A + C), where A is the shares outstanding before
+    the round (all shares when broad-based, preferred only when
+    narrow-based), B = new_money / CP1 and C = new_money / new_price. Full
+    ratchet resets CP2 to the new price. Protection only applies when the
+    new price is below CP1. Arrays are (protected holders x prices).
+    """
+    
+    if method not in ANTI_DILUTION_METHODS:
+        raise ValueError(f"Unsupported anti-dilution method: {method}")
+    
+    table = CapTable.from_records(cap_table)
+    prices = np.atleast_1d(np.asarray(new_prices, dtype=float))
+    protected = table.type_mask('Preferred')
+    
+    original_prices = table.price_per_share[protected][:, None]
+    protected_shares = table.shares[protected][:, None]
+    new_investor_shares = new_money / prices
+    
+    if method == 'full_ratchet':
+        conversion_prices = np.minimum(original_prices, prices[None, :])
+    else:
+        outstanding = table.total_shares if method == 'broad_based' else table.shares[protected].sum()
+        adjusted = original_prices * (outstanding + new_money / original_prices) / (outstanding + new_investor_shares[None, :])
+        conversion_prices = np.where(prices[None, :] < original_prices, adjusted, original_prices)
+    
+    additional_shares = protected_shares * (original_prices / conversion_prices - 1)
+    total_after = table.total_shares + new_investor_shares + additional_shares.sum(axis=0)
+    founder_shares = table.shares[table.holder_mask('Founder')].sum()
+    
+    return {
+        'method': method,
+        'new_prices': prices,
+        'protected_rows': np.flatnonzero(protected),
+        'holders': [holder for holder, flag in zip(table.holders, protected) if flag],
+        'conversion_prices': conversion_prices,
+        'additional_shares': additional_shares,
+        'new_investor_shares': new_investor_shares,
+        'protected_ownership': (protected_shares + additional_shares) / total_after[None, :],
+        'new_investor_ownership': new_investor_shares / total_after,
+        'founder_ownership': founder_shares / total_after
+    }
+
+def solve_anti_dilution_round(current_table: List[Dict[str, Any]],
+                              investment_amount: float,
+                              investor_shares: float,
+                              pre_round_shares: float,
+                              method: str,
+                              tolerance: float = 1e-10,
+                              max_iterations: int = 100) -> tuple:
+    """
+    New investor shares and anti-dilution protection solved together.
+
+    Protection shares dilute the new investor, and issuing more new shares
+    lowers the round price and raises protection. Fixed-point iteration on
+    n = n0 * (pre_round_shares + protection(investment / n)) / pre_round_shares
+    keeps the ownership n0 would give without protection. When protection
+    grows at least as fast as the new shares there is no solution (the
+    iteration diverges); the unsolved n0 is then kept, with protection at its
+    price, and the caller reports the ownership shortfall. Returns
+    (investor shares, anti-dilution sweep at the round price).
+    """
+    unsolved = investor_shares
+    shares = investor_shares
+    for _ in range(max_iterations):
+        sweep = calculate_anti_dilution_sweep(current_table, [investment_amount / shares], investment_amount, method)
+        solved = unsolved * (pre_round_shares + sweep['additional_shares'].sum()) / pre_round_shares
+        if abs(solved - shares) <= tolerance * solved:
+            return solved, calculate_anti_dilution_sweep(current_table, [investment_amount / solved], investment_amount, method)
+        shares = solved
+
+    logger.warning("Anti-dilution round has no ownership-preserving solution; keeping the unprotected share count")
+    return unsolved, calculate_anti_dilution_sweep(current_table, [investment_amount / unsolved], investment_amount, method)
+
+def calculate_ownership_grid(current_table: List[Dict[str, Any]],
+                             investment_amounts: Any,
+                             pre_money_valuations: Any,
+                             new_investor_ownership: float = 0,
+                             option_pool_size: float = 0.1) -> Dict[str, Any]:
+    """
+    Evaluate calculate_cap_table_changes over an investment x pre-money grid.
+
+    Uses the same share math as calculate_cap_table_changes, broadcast over
+    investment_amounts (rows) and pre_money_valuations (columns), and returns
+    founder ownership, founder and total dilution and post-money valuation
+    as 2-D arrays.
+    """
+    
+    table = CapTable.from_records(current_table)
+    investments = np.asarray(investment_amounts, dtype=float)[:, None]
+    pre_money = np.asarray(pre_money_valuations, dtype=float)[None, :]
+    
+    total_shares = table.total_shares
+    options = table.type_mask('Options')
+    founders = table.holder_mask('Founder')
+    
+    # Pool expansion does not depend on the round terms
+    option_pool_expansion = 0
+    if option_pool_size > 0:
+        option_pool_expansion = max(0, total_shares * option_pool_size - table.shares[options].sum())
+    
+    post_money = pre_money + investments
+    new_shares_needed = (investments / post_money) * (total_shares / (1 - new_investor_ownership))
+    total_new_shares = total_shares + new_shares_needed + option_pool_expansion
+    
+    existing_shares = table.shares + np.where(options, option_pool_expansion, 0)
+    founder_shares = existing_shares[founders].sum()
+    founder_ownership = founder_shares / total_new_shares
+    
+    return {
+        'investment_amounts': investments[:, 0],
+        'pre_money_valuations': pre_money[0],
+        'founder_ownership': founder_ownership,
+        'founder_dilution': table.ownership[founders].sum() - founder_ownership,
+        'total_dilution': table.ownership.sum() - existing_shares.sum() / total_new_shares,
+        'post_money_valuation': np.broadcast_to(post_money, founder_ownership.shape)
+    }
+
+def solve_option_pool_shuffle(current_table: List[Dict[str, Any]],
+                              pool_targets: Any,
+                              investment_amounts: Any,
+                              pre_money_valuations: Any) -> Dict[str, Any]:
+    """
+    Size the pre-money pool top-up that hits a post-money pool target.
+
+    With T existing fully diluted shares, P0 existing pool shares, new pool
+    shares E priced into the pre-money and k = target * post / pre, the
+    circular condition P0 + E = target * (T + E + N) has the closed form
+    E = (k * T - P0) / (1 - k), floored at zero when the pool is already
+    large enough. The three inputs broadcast against each other, so any
+    batch of (pool target, round size, pre-money) triples is solved in one
+    call; triples with k >= 1 cannot be met and are flagged infeasible.
+    """
+    
+    table = CapTable.from_records(current_table)
+    targets, investments, pre_money = np.broadcast_arrays(
+        np.asarray(pool_targets, dtype=float),
+        np.asarray(investment_amounts, dtype=float),
+        np.asarray(pre_money_valuations, dtype=float)
+    )
+    
+    total_shares = table.total_shares
+    current_pool = table.shares[table.type_mask('Options')].sum()
+    founder_shares = table.shares[table.holder_mask('Founder')].sum()
+    
+    post_money = pre_money + investments
+    k = targets * post_money / pre_money
+    feasible = k < 1
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pool_top_up = np.where(feasible, np.maximum((k * total_shares - current_pool) / (1 - k), 0.0), np.nan)
+    
+    pre_money_shares = total_shares + pool_top_up
+    price_per_share = pre_money / pre_money_shares
+    new_investor_shares = investments / price_per_share
+    total_post_shares = pre_money_shares + new_investor_shares
+    
+    return {
+        'feasible': feasible,
+        'pool_top_up': pool_top_up,
+        'price_per_share': price_per_share,
+        'new_investor_shares': new_investor_shares,
+        'post_money_valuation': post_money,
+        # Pre-money value left to existing holders once the new pool is carved out
+        'effective_pre_money': price_per_share * total_shares,
+        'pool_ownership': (current_pool + pool_top_up) / total_post_shares,
+        'new_investor_ownership': new_investor_shares / total_post_shares,
+        'founder_ownership': founder_shares / total_post_shares
+    }
+
+# Instrument kinds understood by convert_instrument_stack
+INSTRUMENT_KINDS = ('post_money_safe', 'pre_money_safe', 'note')
+
+# Conversion basis codes returned by convert_instrument_stack
+CONVERSION_BASES = ('round', 'discount', 'cap')
+
+def convert_instrument_stack(current_table: List[Dict[str, Any]],
+                             instruments: List[Dict[str, Any]],
+                             round_prices: Any,
+                             max_iterations: int = 20) -> Dict[str, Any]:
+    """
+    Convert a stack of SAFEs and convertible notes at one or more priced-round prices.
+
+    Each instrument is a dict with 'holder', 'kind' (one of INSTRUMENT_KINDS),
+    'principal' and optional 'valuation_cap', 'discount' (e.g. 0.2),
+    'interest_rate' and 'years' (simple interest, notes only). The
+    conversion price is the lowest of the round price, the discounted round
+    price and the cap price. Pre-money SAFEs and notes use cap / pre-round
+    fully diluted shares; post-money SAFEs use cap / company capitalization,
+    which itself includes the converting shares, so the set of post-money
+    SAFEs converting at their cap is found by fixed-point iteration.
+    Arrays are (instruments x round prices).
+    """
+    
+    prices = np.atleast_1d(np.asarray(round_prices, dtype=float))[None, :]
+    total_shares = CapTable.from_records(current_table).total_shares
+    
+    kinds = [instrument.get('kind', 'post_money_safe') for instrument in instruments]
+    for kind in kinds:
+        if kind not in INSTRUMENT_KINDS:
+            raise ValueError(f"Unsupported instrument kind: {kind}")
+    
+    post_money_safe = np.array([kind == 'post_money_safe' for kind in kinds], dtype=bool)[:, None]
+    is_note = np.array([kind == 'note' for kind in kinds], dtype=bool)
+    principal = np.array([instrument['principal'] for instrument in instruments], dtype=float)
+    caps = np.array([instrument.get('valuation_cap') or np.inf for instrument in instruments], dtype=float)[:, None]
+    discounts = np.array([instrument.get('discount', 0) for instrument in instruments], dtype=float)[:, None]
+    interest = np.array([instrument.get('interest_rate', 0) * instrument.get('years', 0) for instrument in instruments], dtype=float)
+    
+    conversion_amount = (principal * (1 + np.where(is_note, interest, 0)))[:, None]
+    uncapped_price = np.minimum(prices, prices * (1 - discounts))
+    pre_money_cap_price = caps / total_shares
+    
+    # Fixed point: which post-money SAFEs convert at their cap
+    uses_cap = post_money_safe & np.isfinite(caps)
+    for _ in range(max_iterations):
+        non_cap_price = np.where(post_money_safe, uncapped_price, np.minimum(uncapped_price, pre_money_cap_price))
+        other_shares = np.where(uses_cap, 0.0, conversion_amount / non_cap_price).sum(axis=0)
+        cap_fraction = np.where(uses_cap, conversion_amount / caps, 0.0).sum(axis=0)
+        capitalization = (total_shares + other_shares) / (1 - cap_fraction)
+        post_money_cap_price = caps / capitalization[None, :]
+        next_uses_cap = post_money_safe & (post_money_cap_price < uncapped_price)
+        if np.array_equal(next_uses_cap, uses_cap):
+            break
+        uses_cap = next_uses_cap
+    
+    cap_price = np.where(post_money_safe, post_money_cap_price, pre_money_cap_price)
+    conversion_prices = np.minimum(uncapped_price, cap_price)
+    shares = conversion_amount / conversion_prices
+    
+    basis = np.where(cap_price <= uncapped_price, 2, np.where(uncapped_price < prices, 1, 0))
+    
+    return {
+        'holders': [instrument['holder'] for instrument in instruments],
+        'kinds': kinds,
+        'round_prices': prices[0],
+        'conversion_amounts': conversion_amount[:, 0],
+        'conversion_prices': conversion_prices,
+        'shares': shares,
+        'conversion_basis': basis,
+        'pre_round_shares': total_shares + shares.sum(axis=0)
+    }
+
+def converted_instrument_rows(conversion: Dict[str, Any], column: int = 0) -> List[Dict[str, Any]]:
+    """
+    Render one round-price column of a conversion as cap table rows.
+
+    Converted holders receive shadow preferred whose liquidation preference
+    (shares x conversion price) equals the amount converted.
+    """
+    
+    pre_round_shares = conversion['pre_round_shares'][column]
+    
+    return [
+        {
+            'holder': holder,
+            'shares': conversion['shares'][row, column].item(),
+            'ownership': (conversion['shares'][row, column] / pre_round_shares).item(),
+            'type': 'Preferred',
+            'price_per_share': conversion['conversion_prices'][row, column].item(),
+            'total_value': (conversion['shares'][row, column] * conversion['round_prices'][column]).item(),
+            'conversion_basis': CONVERSION_BASES[conversion['conversion_basis'][row, column]]
+        }
+        for row, holder in enumerate(conversion['holders'])
+    ]
+
 @celery_app.task(bind=True)
+@cached_result('cap_table.ownership_impact')
 def calculate_ownership_impact(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculate ownership impact of different investment scenarios
@@ -356,9 +1187,207 @@ def calculate_ownership_impact(self, pitch_id: str, inputs: Dict[str, Any]) -> D
             "created_at": datetime.now().isoformat()
         }
         
+        # Pool shuffle: solve a post-money pool target for every scenario at once
+        pool_target = inputs.get('post_money_pool_target')
+        if pool_target is not None and scenarios:
+            shuffle = solve_option_pool_shuffle(
+                current_cap_table,
+                [scenario.get('post_money_pool_target', pool_target) for scenario in scenarios],
+                [scenario.get('investment_amount', 0) for scenario in scenarios],
+                [scenario.get('pre_money_valuation', 0) for scenario in scenarios]
+            )
+            for index, impact in enumerate(impact_results):
+                # Infeasible targets come back as NaN; report them as None
+                impact['pool_shuffle'] = {
+                    key: None if value.dtype.kind == 'f' and math.isnan(value[index]) else value[index].item()
+                    for key, value in shuffle.items()
+                }
+        
+        # Grid mode: investment amounts x pre-money valuations in one pass
+        grid = inputs.get('grid')
+        if grid:
+            ownership_grid = calculate_ownership_grid(
+                current_cap_table,
+                grid.get('investment_amounts', []),
+                grid.get('pre_money_valuations', []),
+                grid.get('new_investor_ownership', 0),
+                grid.get('option_pool_size', 0.1)
+            )
+            result["ownership_grid"] = {key: value.tolist() for key, value in ownership_grid.items()}
+        
         logger.info(f"Ownership impact calculation completed for pitch_id: {pitch_id}")
         return result
         
     except Exception as e:
         logger.error(f"Ownership impact calculation failed for pitch_id: {pitch_id}, error: {str(e)}")
         raise
+
+@celery_app.task(bind=True)
+@cached_result('cap_table.payout_curves')
+def generate_payout_curves(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate per-holder payout curves across a range of exit values
+    """
+    try:
+        logger.info(f"Generating payout curves for pitch_id: {pitch_id}")
+        
+        cap_table = inputs.get('post_investment_table', [])
+        liquidation_preference = inputs.get('liquidation_preference', 1.0)
+        exit_values = inputs.get('exit_values')
+        
+        if not cap_table:
+            cap_table = create_default_cap_table()
+        
+        if exit_values is None:
+            # Default to 0x - 10x of the current table value
+            total_value = sum(entry['total_value'] for entry in cap_table)
+            exit_values = np.linspace(
+                inputs.get('exit_min', 0),
+                inputs.get('exit_max', total_value * 10),
+                inputs.get('points', 200)
+            )
+        
+        matrix = calculate_waterfall_matrix(cap_table, exit_values, liquidation_preference)
+        breakpoint_model = calculate_payout_breakpoints(cap_table, liquidation_preference)
+        
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "holders": matrix['holders'],
+            "types": matrix['types'],
+            "exit_values": matrix['exit_values'].tolist(),
+            "payouts": matrix['payouts'].tolist(),
+            "breakpoints": export_payout_breakpoints(breakpoint_model, float(matrix['exit_values'].max())),
+            "liquidation_preference": liquidation_preference,
+            "created_at": datetime.now().isoformat()
+        }
+        
+        logger.info(f"Payout curves generated for pitch_id: {pitch_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Payout curve generation failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+@celery_app.task(bind=True)
+def solve_payout_targets(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Solve for the exit value at which holders reach target payouts or multiples
+    """
+    try:
+        logger.info(f"Solving payout targets for pitch_id: {pitch_id}")
+        
+        cap_table = inputs.get('post_investment_table', [])
+        liquidation_preference = inputs.get('liquidation_preference', 1.0)
+        
+        if not cap_table:
+            cap_table = create_default_cap_table()
+        
+        solution = solve_exit_value_for_payout(
+            cap_table,
+            inputs['holders'],
+            inputs['targets'],
+            liquidation_preference,
+            inputs.get('target_type', 'payout')
+        )
+        
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "holders": solution['holders'],
+            "targets": solution['targets'].tolist(),
+            "target_type": inputs.get('target_type', 'payout'),
+            "exit_values": solver_diagnostics(solution),
+            "liquidation_preference": liquidation_preference,
+            "created_at": datetime.now().isoformat()
+        }
+        
+        logger.info(f"Payout targets solved for pitch_id: {pitch_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Payout target solve failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+@celery_app.task(bind=True)
+@cached_result('cap_table.down_rounds')
+def stress_test_down_rounds(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sweep hypothetical down-round prices and report anti-dilution impact
+    """
+    try:
+        logger.info(f"Starting down-round stress test for pitch_id: {pitch_id}")
+        
+        cap_table = inputs.get('post_investment_table', []) or create_default_cap_table()
+        new_money = inputs.get('new_money', 0)
+        methods = inputs.get('methods', list(ANTI_DILUTION_METHODS))
+        new_prices = inputs.get('new_prices')
+        
+        if new_prices is None:
+            # Default sweep: 100 prices from 10% to 100% of the top preferred price
+            top_price = max((entry['price_per_share'] for entry in cap_table if entry['type'] == 'Preferred'), default=1.0)
+            new_prices = np.linspace(top_price * 0.1, top_price, inputs.get('points', 100))
+        
+        sweeps = {}
+        for method in methods:
+            sweep = calculate_anti_dilution_sweep(cap_table, new_prices, new_money, method)
+            sweeps[method] = {
+                'holders': sweep['holders'],
+                'conversion_prices': sweep['conversion_prices'].tolist(),
+                'additional_shares': sweep['additional_shares'].tolist(),
+                'protected_ownership': sweep['protected_ownership'].tolist(),
+                'new_investor_ownership': sweep['new_investor_ownership'].tolist(),
+                'founder_ownership': sweep['founder_ownership'].tolist()
+            }
+        
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "new_money": new_money,
+            "new_prices": np.asarray(new_prices, dtype=float).tolist(),
+            "sweeps": sweeps,
+            "created_at": datetime.now().isoformat()
+        }
+        
+        logger.info(f"Down-round stress test completed for pitch_id: {pitch_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Down-round stress test failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+@celery_app.task(bind=True)
+@cached_result('cap_table.safe_conversion')
+def convert_safe_stack(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert SAFEs and notes at a priced round, optionally over a price range
+    """
+    try:
+        logger.info(f"Converting SAFE/note stack for pitch_id: {pitch_id}")
+        
+        current_cap_table = inputs.get('current_cap_table', []) or create_default_cap_table()
+        instruments = inputs.get('instruments', [])
+        round_price = inputs.get('round_price', 1.0)
+        round_prices = inputs.get('round_prices', [round_price])
+        
+        conversion = convert_instrument_stack(current_cap_table, instruments, round_prices)
+        
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "round_prices": conversion['round_prices'].tolist(),
+            "holders": conversion['holders'],
+            "conversion_prices": conversion['conversion_prices'].tolist(),
+            "shares": conversion['shares'].tolist(),
+            "conversion_basis": [[CONVERSION_BASES[code] for code in row] for row in conversion['conversion_basis'].tolist()],
+            "pre_round_shares": conversion['pre_round_shares'].tolist(),
+            "converted_rows": converted_instrument_rows(conversion, 0),
+            "created_at": datetime.now().isoformat()
+        }
+        
+        logger.info(f"SAFE/note stack conversion completed for pitch_id: {pitch_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"SAFE/note stack conversion failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
@@ -0,0 +1,271 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from celery_app import celery_app
+from typing import Dict, Any, List, Optional
+import logging
+from datetime import datetime
+
+from cap_table_engine import create_default_cap_table, generate_waterfall_analysis
+
+logger = logging.getLogger(__name__)
+
+# Series names used for the non-preferred share classes
+COMMON_SERIES = 'Common'
+OPTIONS_SERIES = 'Options'
+
+@celery_app.task(bind=True)
+def simulate_round_history(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Simulate a multi-round financing history (Seed -> A -> B -> ...)
+    """
+    try:
+        logger.info(f"Starting round history simulation for pitch_id: {pitch_id}")
+
+        current_cap_table = inputs.get('current_cap_table', [])
+        rounds = inputs.get('rounds', [])
+        liquidation_preference = inputs.get('liquidation_preference', 1.0)
+
+        if not current_cap_table:
+            current_cap_table = create_default_cap_table()
+
+        ledger = CapTableLedger(current_cap_table, rounds)
+
+        round_results = []
+        for index, round_terms in enumerate(ledger.rounds):
+            round_results.append({
+                'round': round_terms['name'],
+                'price_per_share': ledger.state_after(index)['price_per_share'],
+                'post_money_valuation': ledger.state_after(index)['post_money_valuation'],
+                'cap_table': ledger.to_table(index)
+            })
+
+        final_table = ledger.to_table()
+
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "rounds": round_results,
+            "final_cap_table": final_table,
+            "waterfall_analysis": generate_waterfall_analysis(final_table, liquidation_preference),
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Round history simulation completed for pitch_id: {pitch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Round history simulation failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+class CapTableLedger:
+    """
+    Event-sourced cap table built from a starting table and ordered rounds.
+
+    Each round is a dict with a 'name', a 'pre_money_valuation', an optional
+    'seniority' (defaults to the round number, so later series are senior)
+    and a list of 'events' applied in order:
+
+    - {'type': 'conversion', 'holder', 'from_series', 'to_series', 'ratio', 'shares'}
+    - {'type': 'pool_top_up', 'target'} or {'type': 'pool_top_up', 'shares'}
+    - {'type': 'investment', 'holder', 'amount'}
+    - {'type': 'issuance', 'holder', 'shares', 'share_type', 'series'}
+
+    The round price is fixed when the first investment is applied, as
+    pre-money valuation over the fully diluted shares at that point, so
+    conversions and pool top-ups listed before it are pre-money. Events that
+    cannot apply (converting shares the holder does not have, investing in a
+    round without a positive pre-money) raise ValueError naming the event.
+
+    The state after every round is kept as a snapshot. Changing a round only
+    invalidates that round and the ones after it, and snapshots are rebuilt
+    lazily from the last valid one.
+    """
+
+    def __init__(self, base_table: List[Dict[str, Any]], rounds: Optional[List[Dict[str, Any]]] = None):
+        self._genesis = self._state_from_table(base_table)
+        self.rounds: List[Dict[str, Any]] = []
+        self._snapshots: List[Dict[str, Any]] = []
+        self.rounds_replayed = 0
+
+        for round_terms in rounds or []:
+            self.add_round(round_terms)
+
+    def add_round(self, round_terms: Dict[str, Any]) -> int:
+        """Append a round and return its index"""
+        self.rounds.append(self._normalize_round(round_terms, len(self.rounds)))
+        return len(self.rounds) - 1
+
+    def update_round(self, round_ref: Any, **changes) -> None:
+        """
+        Change the terms of a round (by index or name) and invalidate it and
+        every later round
+        """
+        index = self.round_index(round_ref)
+        updated = dict(self.rounds[index])
+        updated.update(changes)
+        self.rounds[index] = self._normalize_round(updated, index)
+        del self._snapshots[index:]
+
+    def round_index(self, round_ref: Any) -> int:
+        """Resolve a round index from an index or a round name"""
+        if isinstance(round_ref, int):
+            return round_ref if round_ref >= 0 else len(self.rounds) + round_ref
+        for index, round_terms in enumerate(self.rounds):
+            if round_terms['name'] == round_ref:
+                return index
+        raise ValueError(f"Unknown round: {round_ref}")
+
+    def state_after(self, round_ref: Any = -1) -> Dict[str, Any]:
+        """Return the ledger state after a round, replaying only stale rounds"""
+        if not self.rounds:
+            return self._genesis
+
+        index = self.round_index(round_ref)
+        while len(self._snapshots) <= index:
+            previous = self._snapshots[-1] if self._snapshots else self._genesis
+            self._snapshots.append(self._apply_round(previous, self.rounds[len(self._snapshots)]))
+            self.rounds_replayed += 1
+
+        return self._snapshots[index]
+
+    def to_table(self, round_ref: Any = -1) -> List[Dict[str, Any]]:
+        """Render the state after a round in the post-investment table format"""
+        state = self.state_after(round_ref)
+        holdings = state['holdings']
+        series = state['series']
+        total_shares = sum(holdings.values())
+        mark_price = state['price_per_share']
+
+        table = []
+        for (holder, series_name), shares in holdings.items():
+            if shares <= 0:
+                continue
+            meta = series[series_name]
+            table.append({
+                'holder': holder,
+                'shares': shares,
+                'ownership': shares / total_shares if total_shares > 0 else 0,
+                'type': meta['type'],
+                'series': series_name,
+                'seniority': meta['seniority'],
+                'price_per_share': meta['issue_price'],
+                'total_value': shares * mark_price
+            })
+
+        return table
+
+    def _normalize_round(self, round_terms: Dict[str, Any], index: int) -> Dict[str, Any]:
+        normalized = dict(round_terms)
+        normalized.setdefault('name', f"Round {index + 1}")
+        normalized.setdefault('series', normalized['name'])
+        normalized.setdefault('seniority', index + 1)
+        normalized.setdefault('pre_money_valuation', 0)
+        normalized['events'] = list(normalized.get('events', []))
+        return normalized
+
+    def _state_from_table(self, table: List[Dict[str, Any]]) -> Dict[str, Any]:
+        holdings: Dict[Any, float] = {}
+        series: Dict[str, Dict[str, Any]] = {}
+
+        for entry in table:
+            if entry['type'] == 'Preferred':
+                series_name = entry.get('series', entry['holder'])
+            else:
+                series_name = entry.get('series', OPTIONS_SERIES if entry['type'] == 'Options' else COMMON_SERIES)
+            series.setdefault(series_name, {
+                'type': entry['type'],
+                'issue_price': entry.get('price_per_share', 0),
+                'seniority': entry.get('seniority', 0)
+            })
+            key = (entry['holder'], series_name)
+            holdings[key] = holdings.get(key, 0) + entry['shares']
+
+        total_shares = sum(holdings.values())
+        total_value = sum(entry.get('total_value', 0) for entry in table)
+
+        return {
+            'holdings': holdings,
+            'series': series,
+            'price_per_share': total_value / total_shares if total_shares > 0 else 0,
+            'post_money_valuation': total_value
+        }
+
+    def _apply_round(self, previous: Dict[str, Any], round_terms: Dict[str, Any]) -> Dict[str, Any]:
+        holdings = dict(previous['holdings'])
+        series = dict(previous['series'])
+        total_shares = sum(holdings.values())
+        round_price = None
+
+        for position, event in enumerate(round_terms['events']):
+            event_type = event['type']
+            event_label = f"{event_type} event {position + 1} of round '{round_terms['name']}'"
+
+            if event_type == 'conversion':
+                key = (event['holder'], event['from_series'])
+                if key not in holdings:
+                    raise ValueError(f"{event_label}: {event['holder']} holds no {event['from_series']} shares")
+                converted = min(event.get('shares', holdings.get(key, 0)), holdings.get(key, 0))
+                to_series = event.get('to_series', COMMON_SERIES)
+                series.setdefault(to_series, {
+                    'type': 'Common' if to_series == COMMON_SERIES else 'Preferred',
+                    'issue_price': series[event['from_series']]['issue_price'],
+                    'seniority': 0
+                })
+                new_shares = converted * event.get('ratio', 1.0)
+                holdings[key] -= converted
+                to_key = (event['holder'], to_series)
+                holdings[to_key] = holdings.get(to_key, 0) + new_shares
+                total_shares += new_shares - converted
+
+            elif event_type == 'pool_top_up':
+                pool_keys = [key for key in holdings if series[key[1]]['type'] == 'Options']
+                pool_key = pool_keys[0] if pool_keys else ('Option Pool', OPTIONS_SERIES)
+                series.setdefault(pool_key[1], {'type': 'Options', 'issue_price': 0, 'seniority': 0})
+                if 'shares' in event:
+                    expansion = event['shares']
+                else:
+                    # Same basis as calculate_cap_table_changes: target share of pre-round shares
+                    current_pool = sum(holdings[key] for key in pool_keys)
+                    expansion = max(0, total_shares * event['target'] - current_pool)
+                holdings[pool_key] = holdings.get(pool_key, 0) + expansion
+                total_shares += expansion
+
+            elif event_type == 'investment':
+                if round_price is None:
+                    if round_terms['pre_money_valuation'] <= 0 or total_shares <= 0:
+                        raise ValueError(f"{event_label}: the round needs a positive pre_money_valuation "
+                                         f"and existing shares to price new shares")
+                    round_price = round_terms['pre_money_valuation'] / total_shares
+                series.setdefault(round_terms['series'], {
+                    'type': 'Preferred',
+                    'issue_price': round_price,
+                    'seniority': round_terms['seniority']
+                })
+                new_shares = event['amount'] / round_price
+                key = (event['holder'], round_terms['series'])
+                holdings[key] = holdings.get(key, 0) + new_shares
+                total_shares += new_shares
+
+            elif event_type == 'issuance':
+                share_type = event.get('share_type', 'Common')
+                series_name = event.get('series', OPTIONS_SERIES if share_type == 'Options' else COMMON_SERIES)
+                series.setdefault(series_name, {
+                    'type': share_type,
+                    'issue_price': event.get('price_per_share', round_price or previous['price_per_share']),
+                    'seniority': round_terms['seniority'] if share_type == 'Preferred' else 0
+                })
+                key = (event['holder'], series_name)
+                holdings[key] = holdings.get(key, 0) + event['shares']
+                total_shares += event['shares']
+
+            else:
+                raise ValueError(f"Unsupported ledger event type: {event_type}")
+
+        price_per_share = round_price if round_price is not None else previous['price_per_share']
+
+        return {
+            'holdings': holdings,
+            'series': series,
+            'price_per_share': price_per_share,
+            'post_money_valuation': price_per_share * total_shares
+        }
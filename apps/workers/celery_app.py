@@ -1,6 +1,8 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
+import glob
 import os
 
 # Celery configuration
@@ -12,6 +14,11 @@ celery_app = Celery(
         "workers.pitch_ingest",
         "workers.metric_normalizer", 
         "workers.valuation_engine",
+        "workers.valuation_engines",
+        "workers.batch_valuation",
+        "workers.sensitivity_analysis",
+        "workers.backtesting",
+        "workers.scorecard_calibration",
         "workers.cap_table_engine",
         "workers.risk_engine",
         "workers.panel_simulator",
@@ -34,5 +41,36 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Serve worker Prometheus metrics (engine result cache) on WORKER_METRICS_PORT"""
+    port = os.getenv("WORKER_METRICS_PORT")
+    if not port:
+        return
+
+    from prometheus_client import REGISTRY, CollectorRegistry, start_http_server
+
+    registry = REGISTRY
+    multiprocess_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiprocess_dir:
+        from prometheus_client import multiprocess
+
+        # Pool processes write their samples here; start from a clean directory
+        os.makedirs(multiprocess_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiprocess_dir, "*.db")):
+            os.remove(path)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    start_http_server(int(port), registry=registry)
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    """Drop live gauges of exited pool processes from the multiprocess metrics"""
+    if os.getenv("WORKER_METRICS_PORT") and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
+
 if __name__ == "__main__":
     celery_app.start()
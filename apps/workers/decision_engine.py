@@ -6,6 +6,8 @@ import logging
 from datetime import datetime
 import math
 
+from risk_engine import risk_assessment_aggregates
+
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True)
@@ -106,13 +108,16 @@ def check_gating_rules(valuations: List[Dict[str, Any]],
             reasons.append("Valuations are invalid or zero")
             passed = False
 
+    # Severity counts straight from the risk engine's aggregation
+    risk_counts = risk_assessment_aggregates(risk_assessment or {})
+    critical_risks = risk_counts['critical_count']
+
     # Rule 2: Risk assessment must be completed
     if not risk_assessment or not risk_assessment.get('overall_risk_score'):
         reasons.append("Risk assessment not completed")
         passed = False
     else:
         # Check for critical risks
-        critical_risks = risk_assessment.get('risk_breakdown', {}).get('critical', 0)
         if critical_risks > 0:
             reasons.append(f"Found {critical_risks} critical risks that must be addressed")
             passed = False
@@ -133,7 +138,8 @@ def check_gating_rules(valuations: List[Dict[str, Any]],
         'reasons': reasons,
         'overall_risk_score': overall_risk_score,
         'valuation_count': len(valuations),
-        'critical_risks': risk_assessment.get('risk_breakdown', {}).get('critical', 0)
+        'critical_risks': critical_risks,
+        'high_severity_risks': risk_counts['high_severity_count']
     }
 
 def calculate_investment_params(check_size_usd: float, pre_money_usd: float, 
@@ -183,11 +189,13 @@ def generate_decision_summary(recommendation: str, investment_params: Dict[str,
         min_valuation = max_valuation = avg_valuation = 0
 
     # Risk summary
+    risk_counts = risk_assessment_aggregates(risk_assessment or {})
     risk_summary = {
         'overall_score': risk_assessment.get('overall_risk_score', 0),
         'severity': risk_assessment.get('overall_severity', 'unknown'),
-        'high_risks': risk_assessment.get('risk_breakdown', {}).get('high', 0),
-        'critical_risks': risk_assessment.get('risk_breakdown', {}).get('critical', 0)
+        'high_risks': risk_counts['severity_counts']['high'],
+        'critical_risks': risk_counts['critical_count'],
+        'high_severity_risks': risk_counts['high_severity_count']
     }
 
     # Decision confidence
@@ -398,8 +406,9 @@ def generate_risk_section(risk_assessment: Dict[str, Any]) -> str:
     
     overall_score = risk_assessment.get('overall_risk_score', 0)
     severity = risk_assessment.get('overall_severity', 'unknown')
-    high_risks = risk_assessment.get('risk_breakdown', {}).get('high', 0)
-    critical_risks = risk_assessment.get('risk_breakdown', {}).get('critical', 0)
+    risk_counts = risk_assessment_aggregates(risk_assessment)
+    high_risks = risk_counts['severity_counts']['high']
+    critical_risks = risk_counts['critical_count']
     
     risk_section = f"""
 # Risk Assessment
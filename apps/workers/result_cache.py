@@ -0,0 +1,345 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from typing import Dict, Any, Optional, Callable, Set
+from collections import OrderedDict
+import ast
+import functools
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Redis keys are namespaced so the cache can share the broker database
+REDIS_KEY_PREFIX = 'engine-cache:'
+REDIS_INDEX_KEY = 'engine-cache:index'
+
+# After a Redis failure, skip the Redis tier for this long
+REDIS_RETRY_SECONDS = 30
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars and arrays (tolist/item) and other objects (str)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def canonical_json(value: Any) -> str:
+    """Deterministic JSON: sorted keys, no whitespace, NumPy values as Python values"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+def cache_key(task_name: str, engine_version: str, inputs: Any) -> str:
+    """Content address of a task result: sha256 of (task name, engine version, inputs)"""
+    payload = canonical_json({'task': task_name, 'version': engine_version, 'inputs': inputs})
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# Modules under this directory count towards an engine's version
+WORKERS_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def _local_dependencies(module: Any, source: bytes) -> Set[str]:
+    # Worker modules named in the module's import statements
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                package = (module.__package__ or '').split('.')
+                prefix = '.'.join(package[:len(package) - node.level + 1])
+                base = '.'.join(part for part in (prefix, base) if part)
+            names.add(base)
+            names.update(f"{base}.{alias.name}" for alias in node.names)
+
+    local = set()
+    for name in names:
+        path = getattr(sys.modules.get(name), '__file__', None)
+        if path and os.path.abspath(path).startswith(WORKERS_ROOT + os.sep):
+            local.add(name)
+    return local
+
+def module_version(module_name: str) -> str:
+    """
+    Engine version derived from the source of the module and of every worker
+    module it imports (transitively, e.g. solvers or scorecard_weights), so
+    any code change the engine depends on gives new cache keys and old
+    entries simply age out
+    """
+    digest = hashlib.sha256()
+    seen: Set[str] = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        module = sys.modules.get(name)
+        path = getattr(module, '__file__', None)
+        if name in seen or not path or not os.path.exists(path):
+            continue
+        seen.add(name)
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest.update(hashlib.sha256(source).digest())
+        pending.extend(sorted(_local_dependencies(module, source) - seen))
+
+    if module_name not in seen:
+        return 'unversioned'
+    return digest.hexdigest()[:16]
+
+class LocalLRU:
+    """Thread-safe LRU of serialized results, bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[key] = value
+            self.total_bytes += len(value)
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+class ResultCache:
+    """
+    Two-tier content-addressed cache for deterministic engine results.
+
+    Results are stored as canonical JSON, the same shape Celery returns,
+    in a per-process LRU and in Redis with a TTL. Redis keeps an index
+    sorted by write time and trims the oldest entries beyond
+    redis_max_entries; values over max_value_bytes are not cached. Redis
+    errors are logged and treated as misses.
+
+    metrics is a PrometheusCacheMetrics (the default from
+    get_result_cache), an ObservabilityManager or anything with
+    increment_counter and set_gauge: every lookup records an 'engine_cache' counter
+    labelled with the task, tier and hit/miss, and writes update the
+    'engine_cache_entries' gauge. Counts are also kept in self.stats.
+    """
+
+    def __init__(self,
+                 redis_client: Any = None,
+                 ttl_seconds: int = 24 * 3600,
+                 redis_max_entries: int = 100000,
+                 max_value_bytes: int = 4 * 1024 * 1024,
+                 local: Optional[LocalLRU] = None,
+                 metrics: Any = None):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.redis_max_entries = redis_max_entries
+        self.max_value_bytes = max_value_bytes
+        self.local = local or LocalLRU()
+        self.metrics = metrics
+        self.stats: Dict[str, int] = {}
+        self._redis_retry_at = 0.0
+
+    def get(self, task_name: str, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        self._record(task_name, 'local', value is not None)
+        if value is not None:
+            return json.loads(value)
+
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return None
+
+        try:
+            value = redis_client.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+        self._record(task_name, 'redis', value is not None)
+        if value is None:
+            return None
+
+        value = value.decode('utf-8') if isinstance(value, bytes) else value
+        self.local.set(key, value)
+        return json.loads(value)
+
+    def set(self, key: str, result: Any) -> None:
+        value = canonical_json(result)
+        if len(value) > self.max_value_bytes:
+            return
+
+        self.local.set(key, value)
+        if self.metrics is not None:
+            self.metrics.set_gauge('engine_cache_entries', len(self.local), {'tier': 'local'})
+
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return
+
+        try:
+            pipeline = redis_client.pipeline()
+            pipeline.set(REDIS_KEY_PREFIX + key, value, ex=self.ttl_seconds)
+            pipeline.zadd(REDIS_INDEX_KEY, {key: time.time()})
+            pipeline.zcard(REDIS_INDEX_KEY)
+            size = pipeline.execute()[-1]
+
+            # Size-based eviction: drop the oldest entries beyond the limit
+            if size > self.redis_max_entries:
+                evicted = redis_client.zpopmin(REDIS_INDEX_KEY, size - self.redis_max_entries)
+                if evicted:
+                    redis_client.delete(*[REDIS_KEY_PREFIX + (member.decode('utf-8') if isinstance(member, bytes) else member)
+                                          for member, _ in evicted])
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _redis_client(self) -> Any:
+        if self.redis is None or time.monotonic() < self._redis_retry_at:
+            return None
+        return self.redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(f"Result cache Redis tier unavailable: {str(error)}")
+
+    def _record(self, task_name: str, tier: str, hit: bool) -> None:
+        result = 'hit' if hit else 'miss'
+        stat = f"{tier}_{result}"
+        self.stats[stat] = self.stats.get(stat, 0) + 1
+        if self.metrics is not None:
+            self.metrics.increment_counter('engine_cache', {'task': task_name, 'tier': tier, 'result': result})
+
+class PrometheusCacheMetrics:
+    """
+    increment_counter/set_gauge sink for worker processes, exporting the
+    engine_cache_requests_total counter and engine_cache_entries gauge
+    that ObservabilityManager defines in the orchestrator. With
+    PROMETHEUS_MULTIPROC_DIR set, pool processes write to that directory
+    and the worker's metrics server (celery_app) sums them.
+    """
+
+    def __init__(self, registry: Any = None):
+        from prometheus_client import REGISTRY, Counter, Gauge
+
+        registry = registry or REGISTRY
+        self.counters = {
+            'engine_cache': Counter('engine_cache_requests_total', 'Engine result cache lookups',
+                                    ['task', 'tier', 'result'], registry=registry)
+        }
+        self.gauges = {
+            'engine_cache_entries': Gauge('engine_cache_entries', 'Entries held in the engine result cache',
+                                          ['tier'], registry=registry, multiprocess_mode='livesum')
+        }
+
+    def increment_counter(self, counter_name: str, labels: Optional[Dict[str, str]] = None) -> None:
+        counter = self.counters.get(counter_name)
+        if counter is not None:
+            (counter.labels(**labels) if labels else counter).inc()
+
+    def set_gauge(self, gauge_name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        gauge = self.gauges.get(gauge_name)
+        if gauge is not None:
+            (gauge.labels(**labels) if labels else gauge).set(value)
+
+_result_cache: Optional[ResultCache] = None
+_cache_metrics: Optional[PrometheusCacheMetrics] = None
+
+def _default_metrics() -> Optional[PrometheusCacheMetrics]:
+    # One sink per process: Prometheus metrics can only be registered once
+    global _cache_metrics
+    if _cache_metrics is None:
+        try:
+            _cache_metrics = PrometheusCacheMetrics()
+        except ImportError:
+            return None
+    return _cache_metrics
+
+def _default_redis_client() -> Any:
+    try:
+        import redis
+    except ImportError:
+        return None
+    url = os.getenv('RESULT_CACHE_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    return redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache, created on first use"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            redis_client=_default_redis_client(),
+            ttl_seconds=int(os.getenv('RESULT_CACHE_TTL_SECONDS', 24 * 3600)),
+            redis_max_entries=int(os.getenv('RESULT_CACHE_REDIS_MAX_ENTRIES', 100000)),
+            local=LocalLRU(max_entries=int(os.getenv('RESULT_CACHE_LOCAL_MAX_ENTRIES', 1024))),
+            metrics=_default_metrics()
+        )
+    return _result_cache
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """Replace the process-wide cache (e.g. to attach metrics or in tests)"""
+    global _result_cache
+    _result_cache = cache
+
+def cached_result(task_name: str, version: Optional[str] = None) -> Callable:
+    """
+    Cache a deterministic task body keyed on its inputs.
+
+    Goes between @celery_app.task(bind=True) and a task with the
+    (self, pitch_id, inputs) signature. The key covers task_name, the
+    engine version (default: hash of the module and worker modules it
+    imports, taken on first call) and inputs; the pitch_id is not part of
+    it and is set on the returned result, as is a fresh created_at on hits.
+    Only wrap tasks whose result is a function of inputs and code: tasks
+    reading live data (comps tables, pgvector) must not be cached. Set
+    RESULT_CACHE_ENABLED=0 to bypass the cache.
+    """
+    def decorator(func: Callable) -> Callable:
+        versions: Dict[str, str] = {}
+
+        @functools.wraps(func)
+        def wrapper(self, pitch_id: str, inputs: Dict[str, Any], *args, **kwargs):
+            if os.getenv('RESULT_CACHE_ENABLED', '1') == '0' or args or kwargs:
+                return func(self, pitch_id, inputs, *args, **kwargs)
+
+            if 'engine' not in versions:
+                versions['engine'] = version or module_version(func.__module__)
+
+            cache = get_result_cache()
+            key = cache_key(task_name, versions['engine'], inputs)
+            result = cache.get(task_name, key)
+            if result is None:
+                result = func(self, pitch_id, inputs)
+                cache.set(key, result)
+                # Return the stored form so hits and misses look the same
+                result = json.loads(canonical_json(result))
+            elif isinstance(result, dict) and 'created_at' in result:
+                result['created_at'] = datetime.now().isoformat()
+
+            if isinstance(result, dict) and 'pitch_id' in result:
+                result['pitch_id'] = pitch_id
+            return result
+
+        return wrapper
+
+    return decorator
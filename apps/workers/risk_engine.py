@@ -1,14 +1,57 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery_app import celery_app
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Iterator
 import logging
 import csv
+import heapq
 import io
+import itertools
+import os
+import shutil
 from datetime import datetime
+import numpy as np
+
+from database import get_database_engine
+from risk_models import (
+    LIKELIHOOD_LEVELS,
+    SEVERITY_LEVELS,
+    get_risk_model_registry,
+    likelihood_index,
+    severity_index
+)
 
 logger = logging.getLogger(__name__)
 
+# Bulk load for batch re-scoring; rows are streamed to COPY in chunks
+RISK_COPY_SQL = (
+    "COPY risks (pitch_id, category, severity, likelihood, description, mitigation, owner_role) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+RISK_COPY_CHUNK_ROWS = 100000
+# Owner role of batch-written rows; a re-score replaces only rows with this tag,
+# never analyst-entered risks
+BATCH_RISK_OWNER_ROLE = 'risk_engine'
+RISK_DELETE_SQL = "DELETE FROM risks WHERE pitch_id = ANY(%s::uuid[]) AND owner_role = %s"
+
+# Largest batch whose per-pitch columns are returned inline; larger batches need an output_path
+BATCH_RISK_INLINE_MAX_PITCHES = 1000
+
+# Risk CSV exports: columns of assess_risks entries and of the risks table
+RISK_CSV_HEADER = [
+    'Category', 'Risk', 'Description', 'Severity', 'Likelihood',
+    'Score', 'Weight', 'Weighted Score', 'Mitigation', 'Owner'
+]
+RISK_TABLE_CSV_HEADER = ['Pitch', 'Category', 'Severity', 'Likelihood', 'Description', 'Mitigation', 'Owner', 'Created At']
+RISK_TABLE_EXPORT_QUERY = (
+    "SELECT pitch_id, category, severity, likelihood, description, mitigation, owner_role, created_at "
+    "FROM risks {where} ORDER BY pitch_id, created_at"
+)
+
+# Streaming exports go to this bucket in multipart uploads of this part size
+RISK_EXPORT_BUCKET = 'exports'
+EXPORT_PART_SIZE = 8 * 1024 * 1024
+
 @celery_app.task(bind=True)
 def assess_risks(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -17,115 +60,72 @@ def assess_risks(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     try:
         logger.info(f"Starting risk assessment for pitch_id: {pitch_id}")
 
-        # Risk categories with their sub-risks and scoring criteria
-        risk_categories = {
-            'market': {
-                'market_size_risk': {'weight': 0.3, 'description': 'Market too small or declining'},
-                'competition_risk': {'weight': 0.3, 'description': 'Intense competition or market saturation'},
-                'timing_risk': {'weight': 0.2, 'description': 'Market timing issues'},
-                'regulatory_risk': {'weight': 0.2, 'description': 'Regulatory changes or compliance issues'}
-            },
-            'team': {
-                'founder_experience_risk': {'weight': 0.4, 'description': 'Lack of relevant founder experience'},
-                'team_gaps_risk': {'weight': 0.3, 'description': 'Missing key team members or skills'},
-                'execution_risk': {'weight': 0.3, 'description': 'Poor execution track record'}
-            },
-            'technical': {
-                'technology_risk': {'weight': 0.4, 'description': 'Technology not scalable or outdated'},
-                'development_risk': {'weight': 0.3, 'description': 'Development delays or technical debt'},
-                'security_risk': {'weight': 0.3, 'description': 'Security vulnerabilities or data breaches'}
-            },
-            'regulatory': {
-                'compliance_risk': {'weight': 0.4, 'description': 'Regulatory compliance issues'},
-                'legal_risk': {'weight': 0.3, 'description': 'Legal disputes or IP issues'},
-                'policy_risk': {'weight': 0.3, 'description': 'Policy changes affecting business model'}
-            },
-            'concentration': {
-                'customer_concentration_risk': {'weight': 0.4, 'description': 'Over-reliance on few customers'},
-                'revenue_concentration_risk': {'weight': 0.3, 'description': 'Single revenue stream dependency'},
-                'geographic_concentration_risk': {'weight': 0.3, 'description': 'Limited geographic diversification'}
-            },
-            'execution': {
-                'cash_flow_risk': {'weight': 0.3, 'description': 'Cash flow management issues'},
-                'scaling_risk': {'weight': 0.3, 'description': 'Scaling challenges or operational issues'},
-                'partnership_risk': {'weight': 0.2, 'description': 'Key partnership dependencies'},
-                'talent_risk': {'weight': 0.2, 'description': 'Hiring and retention challenges'}
-            }
-        }
+        # Compiled model for the pitch's sector (generic model if no template)
+        model = get_risk_model_registry().get(inputs.get('sector'))
 
-        # Get risk scores from inputs or use defaults
+        # Get risk scores from inputs or use defaults (0=low, 1=medium, 2=high, 3=critical)
         risk_scores = inputs.get('risk_scores', {})
-        
-        # Assess each category
-        category_results = {}
-        total_risk_score = 0
-        total_weight = 0
-        all_risks = []
-
-        for category, sub_risks in risk_categories.items():
-            category_score = 0
-            category_weight = 0
-            category_risks = []
-
-            for risk_key, risk_config in sub_risks.items():
-                # Get score from inputs or default to medium risk
-                score = risk_scores.get(risk_key, 2)  # 0=low, 1=medium, 2=high, 3=critical
-                weight = risk_config['weight']
-                
-                risk_entry = {
-                    'category': category,
-                    'risk_key': risk_key,
-                    'description': risk_config['description'],
-                    'severity': get_severity_level(score),
-                    'likelihood': get_likelihood_level(score),
-                    'score': score,
-                    'weight': weight,
-                    'weighted_score': score * weight,
-                    'mitigation': inputs.get('mitigations', {}).get(risk_key, ''),
-                    'owner_role': inputs.get('owners', {}).get(risk_key, 'analyst')
-                }
-                
-                category_risks.append(risk_entry)
-                category_score += score * weight
-                category_weight += weight
-
-            # Calculate category average
-            category_avg_score = category_score / category_weight if category_weight > 0 else 0
-            
-            category_results[category] = {
-                'average_score': category_avg_score,
-                'severity': get_severity_level(category_avg_score),
-                'risks': category_risks
+        scored = model.score(risk_scores)
+        mitigations = inputs.get('mitigations', {})
+        owners = inputs.get('owners', {})
+
+        all_risks = [
+            {
+                'category': model.categories[category],
+                'risk_key': risk_key,
+                'description': description,
+                'severity': SEVERITY_LEVELS[severity],
+                'likelihood': LIKELIHOOD_LEVELS[likelihood],
+                'score': risk_scores.get(risk_key, default_score),
+                'weight': weight,
+                'weighted_score': weighted_score,
+                'mitigation': mitigations.get(risk_key, default_mitigation),
+                'owner_role': owners.get(risk_key, 'analyst')
             }
-            
-            total_risk_score += category_avg_score
-            total_weight += 1
-            all_risks.extend(category_risks)
+            for risk_key, description, default_mitigation, category, severity, likelihood, default_score, weight, weighted_score in zip(
+                model.keys, model.descriptions, model.mitigations, model.category_index.tolist(),
+                scored['severity'].tolist(), scored['likelihood'].tolist(), model.default_score_values,
+                model.weights.tolist(), scored['weighted_scores'].tolist()
+            )
+        ]
 
-        # Calculate overall risk score
-        overall_risk_score = total_risk_score / total_weight if total_weight > 0 else 0
+        category_results = {
+            category: {
+                'average_score': average_score,
+                'severity': SEVERITY_LEVELS[severity],
+                'risks': []
+            }
+            for category, average_score, severity in zip(
+                model.categories, scored['category_scores'].tolist(), scored['category_severity'].tolist()
+            )
+        }
+        for risk in all_risks:
+            category_results[risk['category']]['risks'].append(risk)
+
+        # Overall risk score: mean of the category averages
+        overall_risk_score = float(scored['overall_score'])
+
+        # Severity and per-category counts from the scoring kernel
+        aggregates = risk_aggregates(model, scored)
         
         # Identify high-severity risks for gating
-        high_severity_risks = [risk for risk in all_risks if risk['severity'] in ['high', 'critical']]
+        high_severity_risks = [risk for risk, high in zip(all_risks, scored['high_severity'].tolist()) if high]
         
         # Generate risk summary
-        risk_summary = generate_risk_summary(category_results, high_severity_risks)
+        risk_summary = generate_risk_summary(category_results, high_severity_risks, aggregates)
 
         result = {
             "pitch_id": pitch_id,
             "status": "completed",
+            "sector_model": model.sector,
             "overall_risk_score": overall_risk_score,
             "overall_severity": get_severity_level(overall_risk_score),
             "category_results": category_results,
             "high_severity_risks": high_severity_risks,
             "risk_summary": risk_summary,
             "total_risks": len(all_risks),
-            "risk_breakdown": {
-                'low': len([r for r in all_risks if r['severity'] == 'low']),
-                'medium': len([r for r in all_risks if r['severity'] == 'medium']),
-                'high': len([r for r in all_risks if r['severity'] == 'high']),
-                'critical': len([r for r in all_risks if r['severity'] == 'critical'])
-            },
+            "risk_breakdown": dict(aggregates['severity_counts']),
+            "aggregates": aggregates,
             "recommendations": generate_risk_recommendations(category_results, high_severity_risks)
         }
 
@@ -136,10 +136,66 @@ def assess_risks(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f"Risk assessment failed for pitch_id: {pitch_id}, error: {str(e)}")
         raise
 
+@celery_app.task(bind=True)
+def assess_risks_batch(self, batch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-score risk for many pitches at once from a pitches x risk-keys score matrix
+    """
+    try:
+        logger.info(f"Starting batch risk assessment for batch_id: {batch_id}")
+
+        if inputs.get('input_path'):
+            with np.load(inputs['input_path'], allow_pickle=False) as data:
+                matrix = {name: data[name] for name in data.files}
+        else:
+            matrix = inputs
+
+        pitch_ids = [str(pitch_id) for pitch_id in matrix['pitch_ids']]
+        output_path = inputs.get('output_path')
+        if not output_path and len(pitch_ids) > BATCH_RISK_INLINE_MAX_PITCHES:
+            raise ValueError(f"Batches over {BATCH_RISK_INLINE_MAX_PITCHES} pitches need an output_path "
+                             f"for their per-pitch columns ({len(pitch_ids)} given)")
+
+        columns, groups = score_portfolio_risks(
+            pitch_ids,
+            [str(key) for key in matrix['risk_keys']],
+            matrix['scores'],
+            matrix.get('sectors')
+        )
+
+        rows_written = 0
+        if inputs.get('write', True):
+            rows_written = write_risk_rows(
+                pitch_ids,
+                risk_rows(pitch_ids, groups, inputs.get('min_severity', 'low')),
+                replace=inputs.get('replace', True)
+            )
+
+        if output_path:
+            np.savez(output_path, **columns)
+
+        result = {
+            "batch_id": batch_id,
+            "status": "completed",
+            "pitches": len(pitch_ids),
+            "rows_written": rows_written,
+            "severity_counts": {level: int(np.sum(columns['overall_severity'] == level)) for level in SEVERITY_LEVELS},
+            "output_path": output_path,
+            "columns": None if output_path else {name: values.tolist() for name, values in columns.items()},
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Batch risk assessment completed for batch_id: {batch_id}, pitches: {len(pitch_ids)}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Batch risk assessment failed for batch_id: {batch_id}, error: {str(e)}")
+        raise
+
 @celery_app.task(bind=True)
 def export_risks_csv(self, pitch_id: str, risk_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Export risk assessment to CSV format
+    Export risk assessment to CSV format (inline; large exports should use export_risks_csv_stream)
     """
     try:
         logger.info(f"Exporting risks CSV for pitch_id: {pitch_id}")
@@ -147,28 +203,8 @@ def export_risks_csv(self, pitch_id: str, risk_data: Dict[str, Any]) -> Dict[str
         # Create CSV content
         output = io.StringIO()
         writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Category', 'Risk', 'Description', 'Severity', 'Likelihood', 
-            'Score', 'Weight', 'Weighted Score', 'Mitigation', 'Owner'
-        ])
-        
-        # Write risk data
-        for category, category_data in risk_data.get('category_results', {}).items():
-            for risk in category_data.get('risks', []):
-                writer.writerow([
-                    risk['category'],
-                    risk['risk_key'],
-                    risk['description'],
-                    risk['severity'],
-                    risk['likelihood'],
-                    risk['score'],
-                    f"{risk['weight']:.2f}",
-                    f"{risk['weighted_score']:.2f}",
-                    risk['mitigation'],
-                    risk['owner_role']
-                ])
+        writer.writerow(RISK_CSV_HEADER)
+        writer.writerows(risk_csv_rows(risk_data))
         
         csv_content = output.getvalue()
         output.close()
@@ -188,47 +224,153 @@ def export_risks_csv(self, pitch_id: str, risk_data: Dict[str, Any]) -> Dict[str
         logger.error(f"Risks CSV export failed for pitch_id: {pitch_id}, error: {str(e)}")
         raise
 
+@celery_app.task(bind=True)
+def export_risks_csv_stream(self, export_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stream a risk CSV export to object storage and return only its key
+    """
+    try:
+        logger.info(f"Starting streaming risks CSV export for export_id: {export_id}")
+
+        # Assessment results passed in, or the risks table for a portfolio
+        if inputs.get('risk_assessments') is not None or inputs.get('risk_data') is not None:
+            assessments = inputs['risk_assessments'] if inputs.get('risk_assessments') is not None else [inputs['risk_data']]
+            header = RISK_CSV_HEADER
+            rows = (row for risk_data in assessments for row in risk_csv_rows(risk_data))
+        else:
+            header = RISK_TABLE_CSV_HEADER
+            rows = stream_risk_table_rows(inputs.get('pitch_ids'), chunk_size=inputs.get('chunk_size', 5000))
+
+        stream = CsvRowStream(header, rows)
+        object_key = inputs.get('object_key') or f"risks/{export_id}.csv"
+        storage = inputs.get('storage', os.getenv('EXPORT_STORAGE', 'minio'))
+        if storage == 'local':
+            location = write_stream_to_file(stream, os.path.join(
+                inputs.get('export_dir', os.getenv('LOCAL_EXPORT_DIR', '/tmp/exports')), object_key))
+        else:
+            location = upload_stream_to_minio(stream, inputs.get('bucket', RISK_EXPORT_BUCKET), object_key)
+
+        result = {
+            "export_id": export_id,
+            "status": "completed",
+            "storage": storage,
+            "object_key": location,
+            "rows": stream.rows_written,
+            "bytes": stream.bytes_written,
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Streaming risks CSV export completed for export_id: {export_id}, rows: {stream.rows_written}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Streaming risks CSV export failed for export_id: {export_id}, error: {str(e)}")
+        raise
+
 def get_severity_level(score: float) -> str:
     """Convert numeric score to severity level"""
-    if score >= 2.5:
-        return 'critical'
-    elif score >= 1.5:
-        return 'high'
-    elif score >= 0.5:
-        return 'medium'
-    else:
-        return 'low'
+    return SEVERITY_LEVELS[int(severity_index(score))]
 
 def get_likelihood_level(score: float) -> str:
     """Convert numeric score to likelihood level"""
-    if score >= 2.5:
-        return 'high'
-    elif score >= 1.5:
-        return 'medium'
-    else:
-        return 'low'
-
-def generate_risk_summary(category_results: Dict[str, Any], high_severity_risks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return LIKELIHOOD_LEVELS[int(likelihood_index(score))]
+
+def risk_aggregates(model: Any, scored: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    JSON-ready counts for one pitch scored with RiskModel.score: severity
+    histogram, high/critical totals and per-category risk counts, high-risk
+    counts, weighted and average scores
+    """
+    severity_counts = scored['severity_counts'].tolist()
+    high = SEVERITY_LEVELS.index('high')
+    return {
+        'overall_risk_score': float(scored['overall_score']),
+        'overall_severity': SEVERITY_LEVELS[int(scored['overall_severity'])],
+        'severity_counts': dict(zip(SEVERITY_LEVELS, severity_counts)),
+        'high_severity_count': sum(severity_counts[high:]),
+        'critical_count': severity_counts[SEVERITY_LEVELS.index('critical')],
+        'categories': {
+            category: {
+                'risk_count': risk_count,
+                'high_risk_count': high_risk_count,
+                'weighted_score': weighted_score,
+                'average_score': average_score,
+                'severity': SEVERITY_LEVELS[severity]
+            }
+            for category, risk_count, high_risk_count, weighted_score, average_score, severity in zip(
+                model.categories, model.category_counts.tolist(), scored['category_high_counts'].tolist(),
+                scored['category_weighted_scores'].tolist(), scored['category_scores'].tolist(),
+                scored['category_severity'].tolist()
+            )
+        }
+    }
+
+def aggregate_risk_entries(risk_assessment: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    risk_aggregates for an assessment produced before aggregates were
+    stored, from one pass over its category results
+    """
+    severity_counts = dict.fromkeys(SEVERITY_LEVELS, 0)
+    categories = {}
+    for category, data in risk_assessment.get('category_results', {}).items():
+        counts = {'risk_count': 0, 'high_risk_count': 0, 'weighted_score': 0.0,
+                  'average_score': data.get('average_score', 0), 'severity': data.get('severity')}
+        for risk in data.get('risks', []):
+            severity_counts[risk['severity']] += 1
+            counts['risk_count'] += 1
+            counts['high_risk_count'] += risk['severity'] in ('high', 'critical')
+            counts['weighted_score'] += risk.get('weighted_score', 0)
+        categories[category] = counts
+
+    # Without category results only the stored breakdown is available
+    if not categories:
+        severity_counts.update(risk_assessment.get('risk_breakdown', {}))
+
+    overall_risk_score = risk_assessment.get('overall_risk_score')
+    return {
+        'overall_risk_score': overall_risk_score,
+        'overall_severity': risk_assessment.get('overall_severity',
+                                                get_severity_level(overall_risk_score) if overall_risk_score is not None else None),
+        'severity_counts': severity_counts,
+        'high_severity_count': severity_counts['high'] + severity_counts['critical'],
+        'critical_count': severity_counts['critical'],
+        'categories': categories
+    }
+
+def risk_assessment_aggregates(risk_assessment: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Severity and category counts of an assess_risks result: its stored
+    'aggregates', or a single pass over older results. This is the API for
+    consumers such as the decision engine's gating rules.
+    """
+    return risk_assessment.get('aggregates') or aggregate_risk_entries(risk_assessment)
+
+def generate_risk_summary(category_results: Dict[str, Any],
+                          high_severity_risks: List[Dict[str, Any]],
+                          aggregates: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Generate risk summary and insights"""
+    if aggregates is None:
+        aggregates = aggregate_risk_entries({'category_results': category_results})
+
     summary = {
         'highest_risk_category': None,
         'highest_score': 0,
-        'critical_risks_count': len([r for r in high_severity_risks if r['severity'] == 'critical']),
-        'high_risks_count': len([r for r in high_severity_risks if r['severity'] == 'high']),
+        'critical_risks_count': aggregates['critical_count'],
+        'high_risks_count': aggregates['severity_counts']['high'],
         'category_insights': {},
-        'top_risks': sorted(high_severity_risks, key=lambda x: x['weighted_score'], reverse=True)[:5]
+        'top_risks': heapq.nlargest(5, high_severity_risks, key=lambda x: x['weighted_score'])
     }
     
-    for category, data in category_results.items():
-        score = data['average_score']
+    for category, counts in aggregates['categories'].items():
+        score = counts['average_score']
         if score > summary['highest_score']:
             summary['highest_score'] = score
             summary['highest_risk_category'] = category
         
         summary['category_insights'][category] = {
-            'severity': data['severity'],
-            'risk_count': len(data['risks']),
-            'high_risk_count': len([r for r in data['risks'] if r['severity'] in ['high', 'critical']])
+            'severity': counts['severity'],
+            'risk_count': counts['risk_count'],
+            'high_risk_count': counts['high_risk_count']
         }
     
     return summary
@@ -261,3 +403,237 @@ def generate_risk_recommendations(category_results: Dict[str, Any], high_severit
         recommendations.append("Risk profile appears manageable, proceed with standard due diligence")
     
     return recommendations
+
+def score_portfolio_risks(pitch_ids: List[str],
+                          risk_keys: List[str],
+                          scores: Any,
+                          sectors: Optional[Any] = None) -> Tuple[Dict[str, np.ndarray], List[Tuple[Any, np.ndarray, Dict[str, np.ndarray]]]]:
+    """
+    Score a (pitches, risk_keys) matrix with each pitch's sector model.
+
+    Rows are grouped by sector model and each group is scored in one pass;
+    NaN cells and keys missing from the input get the model's default
+    scores. Returns (columns, groups): per-pitch result columns
+    ('overall_risk_score', 'overall_severity', 'high_severity_count',
+    'critical_count' and 'category_score.<category>', NaN where the pitch's
+    model has no such category) and the (model, rows, scored) groups that
+    risk_rows turns into risks table rows.
+    """
+    scores = np.asarray(scores, dtype=float).reshape(len(pitch_ids), len(risk_keys))
+    registry = get_risk_model_registry()
+
+    columns: Dict[str, np.ndarray] = {
+        'pitch_id': np.asarray(pitch_ids, dtype=str),
+        'overall_risk_score': np.zeros(len(pitch_ids)),
+        'overall_severity': np.empty(len(pitch_ids), dtype=object),
+        'high_severity_count': np.zeros(len(pitch_ids), dtype=np.int64),
+        'critical_count': np.zeros(len(pitch_ids), dtype=np.int64)
+    }
+
+    # Group rows by the model their sector resolves to
+    models: Dict[int, Any] = {}
+    model_rows: Dict[int, List[int]] = {}
+    for row, sector in enumerate(sectors if sectors is not None else [None] * len(pitch_ids)):
+        model = registry.get(str(sector) if sector else None)
+        models[id(model)] = model
+        model_rows.setdefault(id(model), []).append(row)
+
+    groups = []
+    for key, model in models.items():
+        rows = np.array(model_rows[key], dtype=np.int64)
+
+        # Input columns in the model's key order
+        matrix = np.full((len(rows), len(model)), np.nan)
+        positions = [(column, model.key_index[risk_key]) for column, risk_key in enumerate(risk_keys)
+                     if risk_key in model.key_index]
+        if positions:
+            source, target = (list(values) for values in zip(*positions))
+            matrix[:, target] = scores[np.ix_(rows, source)]
+
+        scored = model.score_matrix(matrix)
+        columns['overall_risk_score'][rows] = scored['overall_score']
+        columns['overall_severity'][rows] = np.asarray(SEVERITY_LEVELS, dtype=object)[scored['overall_severity']]
+        columns['high_severity_count'][rows] = scored['severity_counts'][:, SEVERITY_LEVELS.index('high'):].sum(axis=1)
+        columns['critical_count'][rows] = scored['severity_counts'][:, SEVERITY_LEVELS.index('critical')]
+        for position, category in enumerate(model.categories):
+            column = columns.setdefault(f"category_score.{category}", np.full(len(pitch_ids), np.nan))
+            column[rows] = scored['category_scores'][:, position]
+        groups.append((model, rows, scored))
+
+    columns['overall_severity'] = columns['overall_severity'].astype(str)
+    return columns, groups
+
+def risk_rows(pitch_ids: List[str],
+              groups: List[Tuple[Any, np.ndarray, Dict[str, np.ndarray]]],
+              min_severity: str = 'low',
+              owner_role: str = BATCH_RISK_OWNER_ROLE) -> Iterator[Tuple[str, ...]]:
+    """
+    Rows for the risks table (pitch_id, category, severity, likelihood,
+    description, mitigation, owner_role): one per pitch and risk at or
+    above min_severity, tagged with owner_role
+    """
+    threshold = SEVERITY_LEVELS.index(min_severity)
+    for model, rows, scored in groups:
+        categories = [model.categories[category] for category in model.category_index.tolist()]
+        local_rows, positions = np.nonzero(scored['severity'] >= threshold)
+        severities = scored['severity'][local_rows, positions].tolist()
+        likelihoods = scored['likelihood'][local_rows, positions].tolist()
+        for local_row, position, severity, likelihood in zip(local_rows.tolist(), positions.tolist(), severities, likelihoods):
+            yield (
+                pitch_ids[rows[local_row]],
+                categories[position],
+                SEVERITY_LEVELS[severity],
+                LIKELIHOOD_LEVELS[likelihood],
+                model.descriptions[position],
+                model.mitigations[position],
+                owner_role
+            )
+
+def write_risk_rows(pitch_ids: List[str],
+                    rows: Iterable[Tuple[str, ...]],
+                    replace: bool = True,
+                    chunk_rows: int = RISK_COPY_CHUNK_ROWS) -> int:
+    """
+    Bulk load risk rows with COPY in one transaction, in chunks of
+    chunk_rows. With replace, the pitches' earlier batch rows (owner_role
+    BATCH_RISK_OWNER_ROLE) are deleted first so a re-score does not
+    duplicate them; other risks are kept. Returns the rows written.
+    """
+    connection = get_database_engine().raw_connection()
+    written = 0
+    try:
+        cursor = connection.cursor()
+        if replace and pitch_ids:
+            cursor.execute(RISK_DELETE_SQL, (list(pitch_ids), BATCH_RISK_OWNER_ROLE))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_rows:
+                _copy_risk_rows(cursor, buffer)
+                written += pending
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                pending = 0
+        if pending:
+            _copy_risk_rows(cursor, buffer)
+            written += pending
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return written
+
+def _copy_risk_rows(cursor: Any, buffer: io.StringIO) -> None:
+    buffer.seek(0)
+    cursor.copy_expert(RISK_COPY_SQL, buffer)
+
+def risk_csv_rows(risk_data: Dict[str, Any]) -> Iterator[List[Any]]:
+    """CSV rows (RISK_CSV_HEADER order) for the risks of an assess_risks result"""
+    for category, category_data in risk_data.get('category_results', {}).items():
+        for risk in category_data.get('risks', []):
+            yield [
+                risk['category'],
+                risk['risk_key'],
+                risk['description'],
+                risk['severity'],
+                risk['likelihood'],
+                risk['score'],
+                f"{risk['weight']:.2f}",
+                f"{risk['weighted_score']:.2f}",
+                risk['mitigation'],
+                risk['owner_role']
+            ]
+
+def stream_risk_table_rows(pitch_ids: Optional[List[str]] = None,
+                           chunk_size: int = 5000) -> Iterator[Tuple[Any, ...]]:
+    """Rows of the risks table (optionally for some pitches) from a server-side cursor"""
+    from sqlalchemy import text
+
+    query = RISK_TABLE_EXPORT_QUERY.format(where="WHERE pitch_id = ANY(CAST(:pitch_ids AS uuid[]))" if pitch_ids else "")
+    with get_database_engine().connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(
+            text(query), {'pitch_ids': list(pitch_ids)} if pitch_ids else {})
+        for partition in result.partitions(chunk_size):
+            for row in partition:
+                yield tuple(row)
+
+class CsvRowStream(io.RawIOBase):
+    """
+    Readable byte stream of a CSV, encoded lazily from a row generator.
+
+    Only the rows needed for the current read are pulled and encoded, so
+    an upload or copy of any size holds about one read (one upload part)
+    in memory. Counts rows and bytes as they are produced.
+    """
+
+    def __init__(self, header: List[str], rows: Iterable[Any], batch_rows: int = 1000, encoding: str = 'utf-8'):
+        self._rows = iter(rows)
+        self._batch_rows = batch_rows
+        self._encoding = encoding
+        self._buffer = bytearray(self._encode([header]))
+        self._exhausted = False
+        self.rows_written = 0
+        self.bytes_written = len(self._buffer)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target: Any) -> int:
+        while len(self._buffer) < len(target) and not self._exhausted:
+            self._fill()
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+    def _fill(self) -> None:
+        batch = list(itertools.islice(self._rows, self._batch_rows))
+        if not batch:
+            self._exhausted = True
+            return
+        encoded = self._encode(batch)
+        self._buffer.extend(encoded)
+        self.rows_written += len(batch)
+        self.bytes_written += len(encoded)
+
+    def _encode(self, rows: List[Any]) -> bytes:
+        output = io.StringIO()
+        csv.writer(output).writerows(rows)
+        return output.getvalue().encode(self._encoding)
+
+def upload_stream_to_minio(stream: io.RawIOBase, bucket_name: str, object_key: str,
+                           part_size: int = EXPORT_PART_SIZE, minio_client: Any = None) -> str:
+    """
+    Upload a stream of unknown length to MinIO; the client sends it as a
+    multipart upload of part_size parts. Returns the object key.
+    """
+    if minio_client is None:
+        from minio import Minio
+
+        minio_client = Minio(
+            os.getenv('MINIO_ENDPOINT', 'localhost:9000'),
+            access_key=os.getenv('MINIO_ACCESS_KEY', 'minioadmin'),
+            secret_key=os.getenv('MINIO_SECRET_KEY', 'minioadmin'),
+            secure=False  # Set to True for HTTPS
+        )
+
+    if not minio_client.bucket_exists(bucket_name):
+        minio_client.make_bucket(bucket_name)
+
+    minio_client.put_object(bucket_name, object_key, stream, length=-1, part_size=part_size, content_type='text/csv')
+    return object_key
+
+def write_stream_to_file(stream: io.RawIOBase, path: str, chunk_size: int = EXPORT_PART_SIZE) -> str:
+    """Local stand-in for object storage: copy the stream to path in chunks"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(stream, f, chunk_size)
+    return path
@@ -0,0 +1,315 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from typing import Dict, Any, List, Optional, Tuple
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Generic risk model: categories with their sub-risks and weights
+BASE_RISK_CATEGORIES = {
+    'market': {
+        'market_size_risk': {'weight': 0.3, 'description': 'Market too small or declining'},
+        'competition_risk': {'weight': 0.3, 'description': 'Intense competition or market saturation'},
+        'timing_risk': {'weight': 0.2, 'description': 'Market timing issues'},
+        'regulatory_risk': {'weight': 0.2, 'description': 'Regulatory changes or compliance issues'}
+    },
+    'team': {
+        'founder_experience_risk': {'weight': 0.4, 'description': 'Lack of relevant founder experience'},
+        'team_gaps_risk': {'weight': 0.3, 'description': 'Missing key team members or skills'},
+        'execution_risk': {'weight': 0.3, 'description': 'Poor execution track record'}
+    },
+    'technical': {
+        'technology_risk': {'weight': 0.4, 'description': 'Technology not scalable or outdated'},
+        'development_risk': {'weight': 0.3, 'description': 'Development delays or technical debt'},
+        'security_risk': {'weight': 0.3, 'description': 'Security vulnerabilities or data breaches'}
+    },
+    'regulatory': {
+        'compliance_risk': {'weight': 0.4, 'description': 'Regulatory compliance issues'},
+        'legal_risk': {'weight': 0.3, 'description': 'Legal disputes or IP issues'},
+        'policy_risk': {'weight': 0.3, 'description': 'Policy changes affecting business model'}
+    },
+    'concentration': {
+        'customer_concentration_risk': {'weight': 0.4, 'description': 'Over-reliance on few customers'},
+        'revenue_concentration_risk': {'weight': 0.3, 'description': 'Single revenue stream dependency'},
+        'geographic_concentration_risk': {'weight': 0.3, 'description': 'Limited geographic diversification'}
+    },
+    'execution': {
+        'cash_flow_risk': {'weight': 0.3, 'description': 'Cash flow management issues'},
+        'scaling_risk': {'weight': 0.3, 'description': 'Scaling challenges or operational issues'},
+        'partnership_risk': {'weight': 0.2, 'description': 'Key partnership dependencies'},
+        'talent_risk': {'weight': 0.2, 'description': 'Hiring and retention challenges'}
+    }
+}
+
+# Score given to a risk when the inputs do not score it (0=low ... 3=critical)
+DEFAULT_RISK_SCORE = 2
+
+# Score thresholds: a score at or above a threshold moves up one level
+SEVERITY_LEVELS = ('low', 'medium', 'high', 'critical')
+SEVERITY_THRESHOLDS = np.array([0.5, 1.5, 2.5])
+LIKELIHOOD_LEVELS = ('low', 'medium', 'high')
+LIKELIHOOD_THRESHOLDS = np.array([1.5, 2.5])
+
+# Template risks carry no weight; their typical likelihood sets one in the
+# range of the generic weights, and their typical severity the default score,
+# capped at DEFAULT_RISK_SCORE so an unscored risk never counts as critical
+TEMPLATE_LIKELIHOOD_WEIGHTS = {'low': 0.2, 'medium': 0.3, 'high': 0.4}
+TEMPLATE_SEVERITY_SCORES = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+# Seconds between checks of the template directory for changes
+TEMPLATE_CHECK_INTERVAL_SECONDS = 5.0
+
+def _default_templates_dir() -> str:
+    return os.getenv('RISK_TEMPLATES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        '..', '..', 'fixtures', 'risk-templates'))
+
+def template_risk_key(name: str) -> str:
+    """Snake-case risk key for a template risk name ('Anti-money laundering (AML)' -> 'anti_money_laundering_aml_risk')"""
+    key = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+    return key if key.endswith('_risk') else f"{key}_risk"
+
+class RiskModel:
+    """
+    A risk model compiled to flat arrays.
+
+    Risks are rows: keys, descriptions and default mitigations as lists,
+    weights, default scores and category indices as arrays. Scoring a
+    pitch is then a scatter of its scores into the default vector and a
+    few bincounts, and severity/likelihood levels are threshold lookups.
+    """
+
+    def __init__(self, sector: Optional[str], risks: List[Dict[str, Any]]):
+        self.sector = sector
+        self.categories: Tuple[str, ...] = tuple(dict.fromkeys(risk['category'] for risk in risks))
+        self.keys = [risk['risk_key'] for risk in risks]
+        self.descriptions = [risk['description'] for risk in risks]
+        self.mitigations = [risk.get('mitigation', '') for risk in risks]
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+        category_positions = {category: i for i, category in enumerate(self.categories)}
+        self.category_index = np.array([category_positions[risk['category']] for risk in risks], dtype=np.int64)
+        self.weights = np.array([risk['weight'] for risk in risks], dtype=float)
+        self.default_score_values = [risk.get('default_score', DEFAULT_RISK_SCORE) for risk in risks]
+        self.default_scores = np.array(self.default_score_values, dtype=float)
+        self.category_weights = np.bincount(self.category_index, weights=self.weights, minlength=len(self.categories))
+        # One-hot risk -> category matrices: per-category sums are one matmul
+        self.category_onehot = np.zeros((len(self.keys), len(self.categories)))
+        self.category_onehot[np.arange(len(self.keys)), self.category_index] = 1.0
+        self.category_matrix = self.category_onehot * self.weights[:, np.newaxis]
+        self.category_counts = np.bincount(self.category_index, minlength=len(self.categories))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def score(self, risk_scores: Dict[str, float]) -> Dict[str, np.ndarray]:
+        """Risk, category and overall scores with their severity indices"""
+        scores = self.default_scores.copy()
+        for key, value in risk_scores.items():
+            position = self.key_index.get(key)
+            if position is not None:
+                scores[position] = value
+
+        scored = self.score_matrix(scores[np.newaxis, :])
+        return {name: values[0] for name, values in scored.items()}
+
+    def score_matrix(self, scores: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score many pitches at once from a (pitches, risks) matrix in the
+        model's key order; NaN cells get the default score.
+
+        Besides scores and severity indices this is the aggregation kernel:
+        per-pitch severity histograms (in SEVERITY_LEVELS order) and
+        per-category weighted scores and high/critical counts, each from one
+        bincount or matmul rather than rescans of the risk list.
+        """
+        scores = np.asarray(scores, dtype=float)
+        scores = np.where(np.isnan(scores), self.default_scores, scores)
+        n_pitches = len(scores)
+
+        weighted = scores * self.weights
+        category_weighted = scores @ self.category_matrix
+        category_scores = np.divide(category_weighted, self.category_weights,
+                                    out=np.zeros((n_pitches, len(self.categories))),
+                                    where=self.category_weights > 0)
+        overall = category_scores.mean(axis=1) if len(self.categories) else np.zeros(n_pitches)
+        severity = severity_index(scores)
+        high_severity = severity >= SEVERITY_LEVELS.index('high')
+
+        # Per-pitch severity histogram in one bincount over offset indices
+        offsets = np.arange(n_pitches)[:, np.newaxis] * len(SEVERITY_LEVELS)
+        severity_counts = np.bincount((offsets + severity).ravel(),
+                                      minlength=n_pitches * len(SEVERITY_LEVELS)).reshape(n_pitches, len(SEVERITY_LEVELS))
+
+        return {
+            'scores': scores,
+            'weighted_scores': weighted,
+            'severity': severity,
+            'likelihood': likelihood_index(scores),
+            'category_scores': category_scores,
+            'category_severity': severity_index(category_scores),
+            'overall_score': overall,
+            'overall_severity': severity_index(overall),
+            'high_severity': high_severity,
+            'severity_counts': severity_counts,
+            'category_weighted_scores': category_weighted,
+            'category_high_counts': (high_severity @ self.category_onehot).astype(np.int64)
+        }
+
+def severity_index(scores: Any) -> np.ndarray:
+    """Index into SEVERITY_LEVELS for each score"""
+    return np.searchsorted(SEVERITY_THRESHOLDS, scores, side='right')
+
+def likelihood_index(scores: Any) -> np.ndarray:
+    """Index into LIKELIHOOD_LEVELS for each score"""
+    return np.searchsorted(LIKELIHOOD_THRESHOLDS, scores, side='right')
+
+def base_risks() -> List[Dict[str, Any]]:
+    """Rows of the generic risk model"""
+    return [
+        {'category': category, 'risk_key': risk_key, 'description': config['description'], 'weight': config['weight']}
+        for category, sub_risks in BASE_RISK_CATEGORIES.items()
+        for risk_key, config in sub_risks.items()
+    ]
+
+def compile_risk_model(template: Optional[Dict[str, Any]] = None) -> RiskModel:
+    """
+    Compile the generic model, extended with a sector template's risks.
+
+    Template risks join their category (new categories are appended) with
+    a weight from TEMPLATE_LIKELIHOOD_WEIGHTS, a default score from their
+    typical severity (at most DEFAULT_RISK_SCORE), and their mitigation strategies as the default
+    mitigation. Generic risks keep their weights and default score; a
+    template risk whose key is already taken is skipped with a warning.
+    """
+    risks = base_risks()
+    if template is None:
+        return RiskModel(None, risks)
+
+    known = {risk['risk_key']: risk['category'] for risk in risks}
+    for category, template_risks in template.get('risk_categories', {}).items():
+        for template_risk in template_risks:
+            risk_key = template_risk_key(template_risk['name'])
+            if risk_key in known:
+                logger.warning(f"Risk template {template.get('sector')}: '{template_risk['name']}' in {category} "
+                               f"collides with {risk_key} in {known[risk_key]} and is skipped")
+                continue
+            known[risk_key] = category
+            risks.append({
+                'category': category,
+                'risk_key': risk_key,
+                'description': template_risk.get('description', template_risk['name']),
+                'weight': TEMPLATE_LIKELIHOOD_WEIGHTS[template_risk.get('typical_likelihood', 'medium')],
+                'default_score': min(TEMPLATE_SEVERITY_SCORES[template_risk.get('typical_severity', 'high')],
+                                     DEFAULT_RISK_SCORE),
+                'mitigation': '; '.join(template_risk.get('mitigation_strategies', []))
+            })
+
+    # Keep each category's rows together, in first-seen category order
+    order = list(dict.fromkeys(risk['category'] for risk in risks))
+    risks.sort(key=lambda risk: order.index(risk['category']))
+    return RiskModel(template.get('sector'), risks)
+
+class RiskModelRegistry:
+    """
+    Compiled risk models per sector, loaded from templates_dir/*.json.
+
+    Models are compiled once and reused. At most every check_interval
+    seconds the directory listing (names, mtimes and sizes) is compared
+    with the last load and all templates are recompiled when it changed,
+    so template edits apply without a worker restart. A template that
+    fails to load is logged and the previous models are kept.
+    """
+
+    def __init__(self, templates_dir: Optional[str] = None,
+                 check_interval: float = TEMPLATE_CHECK_INTERVAL_SECONDS):
+        self.templates_dir = templates_dir or _default_templates_dir()
+        self.check_interval = check_interval
+        self.base_model = compile_risk_model()
+        self.loads = 0
+        self._models: Dict[str, RiskModel] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, sector: Optional[str]) -> RiskModel:
+        """Model for a sector (case insensitive); the generic model if there is no template"""
+        self._ensure_fresh()
+        if not sector:
+            return self.base_model
+        return self._models.get(sector.strip().lower(), self.base_model)
+
+    def sectors(self) -> List[str]:
+        self._ensure_fresh()
+        return sorted(self._models)
+
+    def reload(self) -> bool:
+        """Recompile all templates; returns False and keeps the old models on error"""
+        with self._lock:
+            return self._reload(self._template_signature())
+
+    def _template_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.templates_dir, '*.json')))
+
+    def _template_signature(self) -> Tuple:
+        signature = []
+        for path in self._template_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._signature is not None and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            signature = self._template_signature()
+            if signature != self._signature:
+                self._reload(signature)
+
+    def _reload(self, signature: Tuple) -> bool:
+        models = {}
+        try:
+            for path, _, _ in signature:
+                with open(path, 'r', encoding='utf-8') as f:
+                    template = json.load(f)
+                model = compile_risk_model(template)
+                models[(model.sector or os.path.basename(path)).strip().lower()] = model
+        except Exception as e:
+            logger.error(f"Failed to load risk templates from {self.templates_dir}: {str(e)}")
+            # Do not retry the same broken files until they change again
+            self._signature = signature
+            return False
+
+        self._models = models
+        self._signature = signature
+        self.loads += 1
+        logger.info(f"Loaded risk models for sectors: {', '.join(sorted(models)) or 'none'}")
+        return True
+
+_risk_model_registry: Optional[RiskModelRegistry] = None
+
+def get_risk_model_registry() -> RiskModelRegistry:
+    """Process-wide risk model registry, created on first use"""
+    global _risk_model_registry
+    if _risk_model_registry is None:
+        _risk_model_registry = RiskModelRegistry(
+            check_interval=float(os.getenv('RISK_TEMPLATE_CHECK_SECONDS', TEMPLATE_CHECK_INTERVAL_SECONDS))
+        )
+    return _risk_model_registry
+
+def set_risk_model_registry(registry: Optional[RiskModelRegistry]) -> None:
+    """Replace the process-wide registry (e.g. in tests)"""
+    global _risk_model_registry
+    _risk_model_registry = registry
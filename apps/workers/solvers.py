@@ -0,0 +1,113 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from typing import Dict, Any, Callable
+import numpy as np
+
+def solve_for_target(func: Callable[[np.ndarray], np.ndarray],
+                     targets: Any,
+                     low: Any,
+                     high: Any,
+                     xtol: float = 1e-10,
+                     ftol: float = 1e-10,
+                     max_iterations: int = 200,
+                     max_expansions: int = 0) -> Dict[str, Any]:
+    """
+    Vectorized bracketed root finding: solve func(x) = target for every case.
+
+    func maps an array of candidate inputs (one per case) to the outputs of
+    the same cases and must be monotone on [low, high]. Cases whose target
+    is not bracketed get their upper bound pushed out geometrically up to
+    max_expansions times (0 disables this), for unknowns that are unbounded
+    above such as exit value or ARR. Iterations use the Illinois variant of
+    regula falsi, falling back to bisection after any step that does not
+    halve the bracket, and converged cases are frozen.
+
+    Returns the solutions with convergence diagnostics per case:
+    'converged', 'bracketed', 'iterations' and 'residual' (func(x) - target).
+    Unbracketed cases get NaN.
+    """
+    targets = np.asarray(targets, dtype=float)
+    shape = np.broadcast_shapes(targets.shape, np.shape(low), np.shape(high))
+    targets = np.broadcast_to(targets, shape)
+    lo = np.broadcast_to(np.asarray(low, dtype=float), shape).copy()
+    hi = np.broadcast_to(np.asarray(high, dtype=float), shape).copy()
+
+    f_lo = func(lo) - targets
+    f_hi = func(hi) - targets
+
+    # Expand the upper bound for cases that are not bracketed yet
+    for _ in range(max_expansions):
+        unbracketed = np.sign(f_lo) * np.sign(f_hi) > 0
+        if not unbracketed.any():
+            break
+        lo = np.where(unbracketed, hi, lo)
+        f_lo = np.where(unbracketed, f_hi, f_lo)
+        hi = np.where(unbracketed, np.where(hi > 0, hi * 4, 1.0), hi)
+        f_hi = np.where(unbracketed, func(hi) - targets, f_hi)
+
+    bracketed = np.sign(f_lo) * np.sign(f_hi) <= 0
+    scale = np.maximum(np.abs(targets), 1.0)
+
+    x = np.where(np.abs(f_lo) <= np.abs(f_hi), lo, hi)
+    residual = np.where(np.abs(f_lo) <= np.abs(f_hi), f_lo, f_hi)
+    converged = bracketed & (np.abs(residual) <= ftol * scale)
+    iterations = np.zeros(shape, dtype=np.int64)
+    last_side = np.zeros(shape, dtype=np.int8)
+    slow = np.zeros(shape, dtype=bool)
+
+    for _ in range(max_iterations):
+        active = bracketed & ~converged
+        if not active.any():
+            break
+
+        # Regula falsi point; the midpoint if it falls outside the bracket or
+        # the last step shrank the bracket by less than half
+        with np.errstate(divide='ignore', invalid='ignore'):
+            candidate = (lo * f_hi - hi * f_lo) / (f_hi - f_lo)
+        midpoint = (lo + hi) / 2
+        inside = np.isfinite(candidate) & (candidate > np.minimum(lo, hi)) & (candidate < np.maximum(lo, hi))
+        candidate = np.where(inside & ~slow, candidate, midpoint)
+        previous_width = np.abs(hi - lo)
+
+        f_candidate = func(np.where(active, candidate, x)) - targets
+        x = np.where(active, candidate, x)
+        residual = np.where(active, f_candidate, residual)
+        iterations += active
+
+        # Replace the bound on the same side as the candidate
+        replace_low = active & (np.sign(f_candidate) == np.sign(f_lo))
+        replace_high = active & ~replace_low
+        lo = np.where(replace_low, candidate, lo)
+        f_lo = np.where(replace_low, f_candidate, f_lo)
+        hi = np.where(replace_high, candidate, hi)
+        f_hi = np.where(replace_high, f_candidate, f_hi)
+
+        # Illinois step: halve the stale end when one side is kept twice
+        side = np.where(replace_low, 1, np.where(replace_high, -1, 0)).astype(np.int8)
+        f_hi = np.where(replace_low & (last_side == 1), f_hi / 2, f_hi)
+        f_lo = np.where(replace_high & (last_side == -1), f_lo / 2, f_lo)
+        last_side = np.where(active, side, last_side)
+
+        width = np.abs(hi - lo)
+        slow = width > previous_width / 2
+        converged = bracketed & (converged | (np.abs(residual) <= ftol * scale) |
+                                 (width <= xtol * np.maximum(np.abs(x), 1.0)))
+
+    return {
+        'solution': np.where(bracketed, x, np.nan),
+        'converged': converged,
+        'bracketed': bracketed,
+        'iterations': iterations,
+        'residual': np.where(bracketed, residual, np.nan)
+    }
+
+def solver_diagnostics(solution: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready per-case solution and convergence diagnostics"""
+    return {
+        'solution': [None if np.isnan(value) else value for value in solution['solution'].ravel().tolist()],
+        'converged': solution['converged'].ravel().tolist(),
+        'bracketed': solution['bracketed'].ravel().tolist(),
+        'iterations': solution['iterations'].ravel().tolist(),
+        'residual': [None if np.isnan(value) else value for value in solution['residual'].ravel().tolist()],
+        'all_converged': bool(solution['converged'].all())
+    }
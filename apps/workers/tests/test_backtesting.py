@@ -0,0 +1,84 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+from apps.workers.workers.backtesting import (
+    BacktestAccumulator,
+    backtest_columns,
+    backtest_valuations,
+    flatten_inputs
+)
+from apps.workers.workers.valuation_engines import run_berkus_valuation, run_rfs_valuation
+
+def backtest_row(pitch_id, sector, stage, realized, inputs, decision=None):
+    return {'pitch_id': pitch_id, 'sector': sector, 'stage': stage, 'geo': 'US',
+            'realized_usd': realized, 'inputs': inputs, 'decision_pre_money_usd': decision}
+
+ROWS = [
+    backtest_row('p1', 'SaaS', 'seed', 2500000,
+                 {'berkus': {'sales': True, 'prototype': True}, 'rfs': {'risk_factors': {'management': 1}}}, 2000000),
+    backtest_row('p2', 'SaaS', 'preseed', 1500000, {'berkus': {'sales': False}}, 1500000),
+    backtest_row('p3', 'Fintech', 'seed', 4000000,
+                 {'rfs': {'base_value': 2000000, 'risk_factors': {'technology_risk': -1}}}),
+]
+
+class TestValuationBacktest:
+    """Unit tests for the valuation backtesting harness"""
+
+    def test_flatten_inputs(self):
+        """Nested inputs become dotted numeric columns; text is dropped"""
+        flat = flatten_inputs({'scores': {'team': 8}, 'sales': True, 'sector': 'SaaS'})
+        assert flat == {'scores.team': 8.0, 'sales': 1.0}
+
+    def test_replay_matches_per_pitch_tasks(self):
+        """Replayed values equal the per-pitch tasks on the stored inputs"""
+        report = backtest_valuations([ROWS], methods=['berkus', 'rfs'])
+
+        berkus = run_berkus_valuation.run('p1', {'sales': True, 'prototype': True, 'risk_factors': {'management': 1}})
+        rfs = run_rfs_valuation.run('p3', {'base_value': 2000000, 'risk_factors': {'technology_risk': -1}})
+
+        sector_stage = {(entry['method'], entry['sector'], entry['stage']): entry
+                        for entry in report['by_method_sector_stage']}
+        assert sector_stage[('berkus', 'SaaS', 'seed')]['median_ratio'] == pytest.approx(berkus['result_base'] / 2500000)
+        assert sector_stage[('rfs', 'Fintech', 'seed')]['median_ratio'] == pytest.approx(rfs['result_base'] / 4000000)
+        assert report['pitches'] == 3
+
+    def test_chunked_equals_single_pass(self):
+        """Streaming in chunks gives the same statistics as one chunk"""
+        single = backtest_valuations([ROWS])
+        chunked = backtest_valuations([ROWS[:1], [], ROWS[1:]])
+
+        assert chunked['ranking'] == single['ranking']
+        for a, b in zip(single['by_method_sector'], chunked['by_method_sector']):
+            assert a['n'] == b['n']
+            assert a['rmse_log_error'] == pytest.approx(b['rmse_log_error'])
+
+    def test_decision_baseline_and_rollups(self):
+        """The stored decision is scored only where present; rollups add up"""
+        report = backtest_valuations([ROWS], methods=['berkus'])
+        by_method = {entry['method']: entry for entry in report['by_method']}
+
+        assert by_method['decision']['n'] == 2
+        assert by_method['decision']['band_hit_rate'] is None
+        assert by_method['berkus']['n'] == 3
+        assert sum(entry['n'] for entry in report['by_method_sector'] if entry['method'] == 'berkus') == 3
+
+    def test_accumulator_statistics(self):
+        """Errors are on the log ratio; band hits use the low/high range"""
+        import numpy as np
+
+        accumulator = BacktestAccumulator()
+        accumulator.add('m', np.array(['S', 'S']), np.array(['seed', 'seed']),
+                        realized=np.array([100.0, 100.0]), predicted=np.array([200.0, 50.0]),
+                        low=np.array([150.0, 40.0]), high=np.array([250.0, 120.0]))
+        stats = accumulator.rollup(('method',))[0]
+
+        assert stats['mean_log_error'] == pytest.approx(0.0)
+        assert stats['rmse_log_error'] == pytest.approx(np.log(2))
+        assert stats['mape'] == pytest.approx(0.75)
+        assert stats['band_hit_rate'] == pytest.approx(0.5)
+
+    def test_columns_use_pitch_segments(self):
+        """Sector and stage come from the pitch row"""
+        columns = backtest_columns(ROWS)
+        assert list(columns['sector']) == ['SaaS', 'SaaS', 'Fintech']
+        assert columns['risk_factors.management'][0] == 1.0
@@ -0,0 +1,107 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+import numpy as np
+from apps.workers.workers.valuation_engines import VALUATION_METHODS
+from apps.workers.workers.batch_valuation import (
+    calculate_batch_valuations,
+    read_columns,
+    write_columns
+)
+
+def build_columns(n_rows, seed=0):
+    """Random columnar batch with a few missing cells"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'arr': rng.uniform(0, 5000000, n_rows),
+        'exit_value': rng.uniform(10000000, 500000000, n_rows),
+        'irr': rng.uniform(0.15, 0.4, n_rows),
+        'probability': rng.uniform(0.05, 0.3, n_rows),
+        'years': rng.integers(3, 10, n_rows).astype(float),
+        'scores.team': rng.uniform(0, 10, n_rows),
+        'scores.market': rng.uniform(0, 10, n_rows),
+        'risk_factors.management': rng.integers(-2, 3, n_rows).astype(float),
+        'risk_factors.technology_risk': rng.integers(-2, 3, n_rows).astype(float),
+        'working_prototype': rng.random(n_rows) < 0.5,
+        'sales': rng.random(n_rows) < 0.3,
+        'sector': rng.choice(['SaaS', 'Fintech', 'Biotech'], n_rows),
+        'stage': np.full(n_rows, 'seed')
+    }
+    columns['scores.market'][::7] = np.nan
+    columns['risk_factors.management'][::5] = np.nan
+    return columns
+
+def row_inputs(columns, row):
+    """Per-pitch inputs dict for one row, skipping missing cells"""
+    inputs = {'scores': {}, 'risk_factors': {}}
+    for name, values in columns.items():
+        value = values[row].item() if hasattr(values[row], 'item') else values[row]
+        if isinstance(value, float) and np.isnan(value):
+            continue
+        if '.' in name:
+            parent, child = name.split('.', 1)
+            inputs[parent][child] = value
+        else:
+            inputs[name] = value
+    return inputs
+
+class TestBatchValuation:
+    """Unit tests for columnar batch valuation"""
+
+    def test_matches_per_pitch_tasks(self):
+        """Every row matches the per-pitch task bands"""
+        columns = build_columns(60)
+
+        results = calculate_batch_valuations(columns)
+
+        for row in range(60):
+            inputs = row_inputs(columns, row)
+            for method, task in VALUATION_METHODS.items():
+                expected = task.run('pitch-1', inputs)
+                for suffix in ('low', 'base', 'high'):
+                    assert results[f"{method}_{suffix}"][row] == pytest.approx(expected[f"result_{suffix}"], rel=1e-12)
+
+    def test_large_batch_shapes(self):
+        """Tens of thousands of rows compute in one call"""
+        results = calculate_batch_valuations(build_columns(50000), ['scorecard', 'rfs'])
+
+        assert set(results.keys()) == {f"{method}_{suffix}" for method in ('scorecard', 'rfs') for suffix in ('low', 'base', 'high')}
+        assert all(values.shape == (50000,) for values in results.values())
+
+    def test_columnar_round_trip(self, tmp_path):
+        """Columnar output can be written and read back"""
+        results = calculate_batch_valuations(build_columns(10), ['berkus'])
+        path = str(tmp_path / 'valuations.npz')
+
+        write_columns(path, results)
+
+        assert np.array_equal(read_columns(path)['berkus_base'], results['berkus_base'])
+
+    def test_unknown_method_rejected(self):
+        """Unknown methods fail fast"""
+        with pytest.raises(ValueError):
+            calculate_batch_valuations(build_columns(5), ['dcf'])
+
+    def test_missing_segments_use_defaults(self):
+        """None, NaN and blank segment cells value as the default segment"""
+        columns = {'arr': np.full(4, 1000000.0), 'sector': np.array(['SaaS', None, np.nan, ' '], dtype=object)}
+
+        results = calculate_batch_valuations(columns, ['comps'])
+
+        assert results['comps_base'].tolist() == [results['comps_base'][0]] * 4
+
+    def test_id_and_text_columns(self, tmp_path):
+        """Text columns are ignored and the pitch id is carried to the output"""
+        columns = build_columns(6)
+        columns['pitch_id'] = np.array([f"pitch-{row}" for row in range(6)], dtype=object)
+        columns['name'] = np.array(['Acme'] * 6, dtype=object)
+
+        results = calculate_batch_valuations(columns, ['scorecard'])
+        expected = calculate_batch_valuations(build_columns(6), ['scorecard'])
+
+        assert results['pitch_id'].tolist() == [f"pitch-{row}" for row in range(6)]
+        assert np.array_equal(results['scorecard_base'], expected['scorecard_base'])
+
+        path = str(tmp_path / 'valuations.npz')
+        write_columns(path, results)
+        assert read_columns(path)['pitch_id'].tolist() == results['pitch_id'].tolist()
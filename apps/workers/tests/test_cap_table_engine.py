@@ -2,6 +2,7 @@
 
 import pytest
 import math
+import numpy as np
 from unittest.mock import patch, MagicMock
 from apps.workers.cap_table_engine import (
     create_default_cap_table,
@@ -9,7 +10,20 @@ from apps.workers.cap_table_engine import (
     generate_waterfall_analysis,
     calculate_waterfall_for_exit,
     get_liquidation_priority,
-    calculate_cap_table_metrics
+    calculate_cap_table_metrics,
+    calculate_waterfall_matrix,
+    calculate_payout_breakpoints,
+    evaluate_payout_breakpoints,
+    export_payout_breakpoints,
+    calculate_exit_distribution,
+    draw_exit_values,
+    CapTable,
+    calculate_ownership_grid,
+    calculate_anti_dilution_sweep,
+    solve_option_pool_shuffle,
+    convert_instrument_stack,
+    converted_instrument_rows,
+    solve_exit_value_for_payout
 )
 
 class TestCapTableEngine:
@@ -285,3 +299,390 @@ class TestCapTableEngine:
         payouts = calculate_waterfall_for_exit(cap_table, large_exit)
         total_payouts = sum(payouts.values())
         assert total_payouts == large_exit
+
+
+class TestWaterfallMatrix:
+    """Unit tests for the vectorized waterfall engine"""
+    
+    def _post_investment_table(self):
+        return calculate_cap_table_changes(
+            create_default_cap_table(), 2000000, 8000000, 0.0, 0.1, False
+        )['post_investment_table']
+    
+    def test_matches_per_exit_waterfall(self):
+        """Matrix columns reproduce calculate_waterfall_for_exit exactly"""
+        cap_table = self._post_investment_table()
+        analysis = generate_waterfall_analysis(cap_table, 1.5)
+        
+        assert len(analysis['scenarios']) == 4
+        for scenario in analysis['scenarios']:
+            expected = calculate_waterfall_for_exit(cap_table, scenario['exit_value'], 1.5)
+            assert scenario['waterfall'] == expected
+    
+    def test_payout_matrix_shape_and_conservation(self):
+        """Payouts are holders x exits and never exceed the exit value"""
+        cap_table = self._post_investment_table()
+        exit_values = [0, 1000000, 5000000, 50000000]
+        
+        matrix = calculate_waterfall_matrix(cap_table, exit_values, 1.0)
+        
+        assert matrix['payouts'].shape == (len(cap_table), len(exit_values))
+        assert matrix['holders'][0] == 'New Investor'
+        totals = matrix['payouts'].sum(axis=0)
+        for total, exit_value in zip(totals, exit_values):
+            assert total == pytest.approx(exit_value, rel=1e-9)
+
+
+class TestPayoutBreakpoints:
+    """Unit tests for the closed-form payout breakpoint solver"""
+    
+    def _cap_table(self):
+        return [
+            {'holder': 'Founders', 'shares': 6000000, 'ownership': 0.6, 'type': 'Common', 'price_per_share': 0.001, 'total_value': 6000},
+            {'holder': 'Option Pool', 'shares': 1000000, 'ownership': 0.1, 'type': 'Options', 'price_per_share': 0.001, 'total_value': 1000},
+            {'holder': 'Series A', 'shares': 2000000, 'ownership': 0.2, 'type': 'Preferred', 'price_per_share': 1.0, 'total_value': 2000000},
+            {'holder': 'Series B', 'shares': 1000000, 'ownership': 0.1, 'type': 'Preferred', 'price_per_share': 3.0, 'total_value': 3000000}
+        ]
+    
+    def test_breakpoints_at_preference_stack(self):
+        """Breakpoints sit where each preference is exhausted"""
+        model = calculate_payout_breakpoints(self._cap_table(), 1.0)
+        
+        assert model['breakpoints'].tolist() == [0.0, 2000000.0, 5000000.0]
+    
+    def test_evaluation_matches_waterfall_matrix(self):
+        """Lookup payouts agree with the full waterfall at arbitrary exits"""
+        cap_table = self._cap_table()
+        exit_values = [0, 1500000, 2000000, 4200000, 5000000, 12000000, 80000000]
+        
+        model = calculate_payout_breakpoints(cap_table, 1.0)
+        matrix = calculate_waterfall_matrix(cap_table, exit_values, 1.0)
+        
+        assert model['holders'] == matrix['holders']
+        assert evaluate_payout_breakpoints(model, exit_values) == pytest.approx(matrix['payouts'], rel=1e-9, abs=1e-6)
+    
+    def test_export_points_for_charts(self):
+        """Exported curves include the closing tail point"""
+        curves = export_payout_breakpoints(calculate_payout_breakpoints(self._cap_table(), 1.0), 10000000)
+        
+        founders = next(curve for curve in curves if curve['holder'] == 'Founders')
+        assert [point['exit_value'] for point in founders['points']] == [0.0, 2000000.0, 5000000.0, 10000000.0]
+        assert founders['points'][-1]['payout'] == pytest.approx(5000000 * 6 / 7)
+
+
+class TestExitDistribution:
+    """Unit tests for the Monte Carlo exit distribution simulator"""
+    
+    def _post_investment_table(self):
+        return calculate_cap_table_changes(
+            create_default_cap_table(), 2000000, 8000000, 0.0, 0.1, False
+        )['post_investment_table']
+    
+    def test_results_independent_of_batch_size(self):
+        """Streaming reduction gives the same answer for any batch size"""
+        cap_table = self._post_investment_table()
+        distribution = {'type': 'lognormal', 'median': 10000000, 'sigma': 1.0}
+        
+        single = calculate_exit_distribution(cap_table, 1.0, distribution, samples=20000, seed=7)
+        batched = calculate_exit_distribution(cap_table, 1.0, distribution, samples=20000, seed=7, max_batch_cells=3000)
+        
+        assert batched['batch_size'] == 1000
+        for one, many in zip(single['holders'], batched['holders']):
+            assert one['mean_proceeds'] == pytest.approx(many['mean_proceeds'], rel=1e-9)
+            assert one['percentiles'] == pytest.approx(many['percentiles'], rel=1e-9)
+            assert one['probability_of_loss'] == many['probability_of_loss']
+    
+    def test_capped_preference_and_loss_probability(self):
+        """Preferred percentiles land on the capped preference"""
+        cap_table = self._post_investment_table()
+        distribution = {'type': 'histogram', 'bin_edges': [0, 1000000, 50000000], 'weights': [1, 3]}
+        
+        result = calculate_exit_distribution(cap_table, 1.0, distribution, samples=10000, seed=3,
+                                             cost_basis={'New Investor': 2000000})
+        investor = next(h for h in result['holders'] if h['holder'] == 'New Investor')
+        founder = next(h for h in result['holders'] if h['holder'] == 'Founders')
+        
+        assert investor['percentiles']['p90'] == pytest.approx(2000000, rel=1e-3)
+        assert investor['probability_of_loss'] == pytest.approx(0.25 + 0.75 * 1 / 49, abs=0.02)
+        assert founder['probability_of_loss'] is None
+    
+    def test_rows_aggregate_per_holder(self):
+        """A holder with several rows gets the sum of their proceeds"""
+        cap_table = self._post_investment_table() + [
+            {'holder': 'Founders', 'shares': 1000000, 'type': 'Preferred', 'price_per_share': 1.0,
+             'total_value': 1000000, 'ownership': 0.0}
+        ]
+        distribution = {'type': 'lognormal', 'median': 10000000, 'sigma': 1.0}
+        
+        result = calculate_exit_distribution(cap_table, 1.0, distribution, samples=5000, seed=1)
+        founders = [h for h in result['holders'] if h['holder'] == 'Founders']
+        per_row = calculate_payout_breakpoints(cap_table, 1.0)
+        exits = draw_exit_values(distribution, 5000, np.random.default_rng(np.random.SeedSequence(1).spawn(2)[0]))
+        row_proceeds = evaluate_payout_breakpoints(per_row, exits)
+        
+        assert len(founders) == 1
+        assert set(founders[0]['type'].split('/')) == {'Common', 'Preferred'}
+        assert founders[0]['mean_proceeds'] == pytest.approx(
+            row_proceeds[[i for i, holder in enumerate(per_row['holders']) if holder == 'Founders']].sum(axis=0).mean())
+    
+    def test_batches_sized_by_payout_rows(self):
+        """Batch size counts cap table rows, not holders"""
+        cap_table = self._post_investment_table() + [
+            {'holder': 'Founders', 'shares': 1000000, 'type': 'Preferred', 'price_per_share': 1.0,
+             'total_value': 1000000, 'ownership': 0.0}
+        ]
+        distribution = {'type': 'lognormal', 'median': 10000000, 'sigma': 1.0}
+        n_rows = len(calculate_payout_breakpoints(cap_table, 1.0)['holders'])
+        
+        single = calculate_exit_distribution(cap_table, 1.0, distribution, samples=4000, seed=5)
+        batched = calculate_exit_distribution(cap_table, 1.0, distribution, samples=4000, seed=5,
+                                              max_batch_cells=100 * n_rows)
+        
+        assert batched['batch_size'] == 100
+        for one, many in zip(single['holders'], batched['holders']):
+            assert one['mean_proceeds'] == pytest.approx(many['mean_proceeds'], rel=1e-9)
+
+
+class TestCapTableColumns:
+    """Unit tests for the struct-of-arrays CapTable"""
+    
+    def test_round_trip_post_investment_table(self):
+        """Converting to columns and back reproduces the dict rows"""
+        post_table = calculate_cap_table_changes(
+            create_default_cap_table(), 2000000, 8000000, 0.0, 0.1, False
+        )['post_investment_table']
+        
+        table = CapTable.from_records(post_table)
+        
+        assert len(table) == 3
+        assert table.total_shares == pytest.approx(sum(entry['shares'] for entry in post_table))
+        assert table.type_mask('Preferred').tolist() == [False, False, True]
+        assert table.to_records() == post_table
+    
+    def test_optional_columns_and_unknown_types(self):
+        """Rows without dilution keep that shape; unknown types get a code"""
+        rows = create_default_cap_table() + [
+            {'holder': 'Warrant Holder', 'shares': 1000, 'ownership': 0.0, 'type': 'Warrant', 'price_per_share': 1.0, 'total_value': 1000}
+        ]
+        
+        table = CapTable.from_records(rows)
+        
+        assert table.dilution is None
+        assert table.type_names[table.type_codes[-1]] == 'Warrant'
+        assert table.to_records() == rows
+    
+    def test_metrics_use_columns(self):
+        """Metrics computed from columns match the ownership split"""
+        cap_table_result = calculate_cap_table_changes(
+            create_default_cap_table(), 2000000, 8000000, 0.0, 0.1, False
+        )
+        
+        metrics = calculate_cap_table_metrics(cap_table_result)
+        post_table = cap_table_result['post_investment_table']
+        
+        assert metrics['ownership_distribution']['founders'] == pytest.approx(post_table[0]['ownership'])
+        assert metrics['ownership_distribution']['investors'] == pytest.approx(post_table[2]['ownership'])
+        assert metrics['dilution_analysis']['total_dilution'] == pytest.approx(sum(entry['dilution'] for entry in post_table))
+
+
+class TestOwnershipGrid:
+    """Unit tests for the vectorized ownership-impact grid"""
+    
+    def test_grid_matches_per_scenario_calculation(self):
+        """Every grid cell agrees with calculate_cap_table_changes"""
+        cap_table = create_default_cap_table()
+        investments = [1000000, 2500000, 5000000]
+        pre_money = [4000000, 8000000, 20000000, 40000000]
+        
+        grid = calculate_ownership_grid(cap_table, investments, pre_money, 0.0, 0.15)
+        
+        assert grid['founder_ownership'].shape == (3, 4)
+        for i, investment_amount in enumerate(investments):
+            for j, pre_money_valuation in enumerate(pre_money):
+                cap_table_result = calculate_cap_table_changes(
+                    cap_table, investment_amount, pre_money_valuation, 0.0, 0.15, False
+                )
+                metrics = calculate_cap_table_metrics(cap_table_result)
+                assert grid['founder_ownership'][i, j] == pytest.approx(metrics['ownership_distribution']['founders'])
+                assert grid['founder_dilution'][i, j] == pytest.approx(metrics['dilution_analysis']['founder_dilution'])
+                assert grid['total_dilution'][i, j] == pytest.approx(metrics['dilution_analysis']['total_dilution'])
+                assert grid['post_money_valuation'][i, j] == investment_amount + pre_money_valuation
+
+
+class TestAntiDilution:
+    """Unit tests for the anti-dilution engine and down-round sweep"""
+    
+    def _post_investment_table(self):
+        # New Investor holds Preferred at $1.00 per share
+        return calculate_cap_table_changes(
+            create_default_cap_table(), 2000000, 8000000, 0.0, 0.1, False
+        )['post_investment_table']
+    
+    def test_broad_based_weighted_average(self):
+        """CP2 = CP1 * (A + B) / (A + C) with A over all shares"""
+        cap_table = self._post_investment_table()
+        total_shares = sum(entry['shares'] for entry in cap_table)
+        
+        sweep = calculate_anti_dilution_sweep(cap_table, [0.5], 1000000, 'broad_based')
+        
+        expected = 1.0 * (total_shares + 1000000) / (total_shares + 2000000)
+        assert sweep['holders'] == ['New Investor']
+        assert sweep['conversion_prices'][0, 0] == pytest.approx(expected)
+        assert sweep['additional_shares'][0, 0] == pytest.approx(2000000 * (1.0 / expected - 1))
+    
+    def test_sweep_methods_ordering(self):
+        """Full ratchet protects most, narrow-based more than broad-based"""
+        cap_table = self._post_investment_table()
+        prices = np.linspace(0.1, 1.2, 200)
+        
+        broad = calculate_anti_dilution_sweep(cap_table, prices, 1000000, 'broad_based')
+        narrow = calculate_anti_dilution_sweep(cap_table, prices, 1000000, 'narrow_based')
+        ratchet = calculate_anti_dilution_sweep(cap_table, prices, 1000000, 'full_ratchet')
+        
+        assert broad['conversion_prices'].shape == (1, 200)
+        assert np.all(ratchet['conversion_prices'] <= narrow['conversion_prices'] + 1e-12)
+        assert np.all(narrow['conversion_prices'] <= broad['conversion_prices'] + 1e-12)
+        # No adjustment at or above the original price
+        assert np.all(broad['additional_shares'][:, prices >= 1.0] == 0)
+    
+    def test_anti_dilution_flag_applied_in_round(self):
+        """calculate_cap_table_changes issues protection shares in a down round"""
+        cap_table = self._post_investment_table()
+        
+        unprotected = calculate_cap_table_changes(cap_table, 1000000, 4000000, 0.0, 0.0, False)
+        protected = calculate_cap_table_changes(cap_table, 1000000, 4000000, 0.0, 0.0, 'full_ratchet')
+        
+        round_price = protected['investment_summary']['price_per_share']
+        investor = next(entry for entry in protected['post_investment_table'] if entry['holder'] == 'New Investor')
+        assert unprotected['investment_summary']['anti_dilution_shares'] == 0
+        assert investor['shares'] == pytest.approx(2000000 / round_price)
+    
+    def test_investor_keeps_target_ownership_with_protection(self):
+        """New shares are sized with the protection shares, so the investor hits its target"""
+        cap_table = [
+            {'holder': 'Founder', 'shares': 8000000, 'type': 'Common', 'price_per_share': 0.001, 'total_value': 8000, 'ownership': 0.8},
+            {'holder': 'Series A', 'shares': 2000000, 'type': 'Preferred', 'price_per_share': 1.0, 'total_value': 2000000, 'ownership': 0.2}
+        ]
+        unprotected = calculate_cap_table_changes(cap_table, 1000000, 4000000, 0.0, 0.0, False)['investment_summary']
+        
+        for method in ('broad_based', 'full_ratchet'):
+            result = calculate_cap_table_changes(cap_table, 1000000, 4000000, 0.0, 0.0, method)
+            summary = result['investment_summary']
+            investor = next(entry for entry in result['post_investment_table'] if entry['holder'] == 'New Investor')
+            
+            assert summary['anti_dilution_shares'] > 0
+            assert investor['ownership'] == pytest.approx(unprotected['new_investor_ownership'])
+            assert summary['investor_ownership_shortfall'] == pytest.approx(0, abs=1e-9)
+        # Full ratchet closed form: n = 0.2 * (8M + 2n)
+        assert summary['new_shares_issued'] == pytest.approx(1600000 / 0.6)
+    
+    def test_unsolvable_protection_reports_shortfall(self):
+        """When protection outruns new shares the shortfall is reported"""
+        cap_table = [
+            {'holder': 'Founder', 'shares': 1000000, 'type': 'Common', 'price_per_share': 0.001, 'total_value': 1000, 'ownership': 1 / 11},
+            {'holder': 'Series A', 'shares': 10000000, 'type': 'Preferred', 'price_per_share': 1.0, 'total_value': 10000000, 'ownership': 10 / 11}
+        ]
+        
+        summary = calculate_cap_table_changes(cap_table, 1000000, 4000000, 0.0, 0.0, 'full_ratchet')['investment_summary']
+        
+        assert summary['investor_ownership_shortfall'] > 0
+        assert summary['new_investor_ownership'] == pytest.approx(summary['target_investor_ownership'] - summary['investor_ownership_shortfall'])
+
+
+class TestOptionPoolShuffle:
+    """Unit tests for the post-money option pool solver"""
+    
+    def test_hits_post_money_pool_target(self):
+        """Solved top-ups land exactly on each post-money target"""
+        cap_table = create_default_cap_table()
+        targets = np.array([0.2, 0.25, 0.3])
+        
+        shuffle = solve_option_pool_shuffle(cap_table, targets, [2000000, 3000000, 5000000], [8000000, 12000000, 20000000])
+        
+        assert shuffle['feasible'].all()
+        assert shuffle['pool_ownership'] == pytest.approx(targets)
+        assert shuffle['new_investor_ownership'] == pytest.approx([0.2, 0.2, 0.2])
+        # The shuffle is paid for by existing holders through a lower effective pre-money
+        assert np.all(shuffle['effective_pre_money'] < [8000000, 12000000, 20000000])
+    
+    def test_existing_pool_large_enough_and_infeasible_targets(self):
+        """No top-up when the pool already covers the target; k >= 1 is flagged"""
+        shuffle = solve_option_pool_shuffle(create_default_cap_table(), [0.1, 0.9], 2000000, 8000000)
+        
+        assert shuffle['pool_top_up'][0] == 0
+        assert shuffle['feasible'].tolist() == [True, False]
+        assert np.isnan(shuffle['pool_top_up'][1])
+
+
+class TestInstrumentConversion:
+    """Unit tests for the SAFE and convertible note conversion engine"""
+    
+    def _instruments(self):
+        return [
+            {'holder': 'Angel SAFE', 'kind': 'post_money_safe', 'principal': 1000000, 'valuation_cap': 10000000},
+            {'holder': 'Seed SAFE', 'kind': 'post_money_safe', 'principal': 500000, 'valuation_cap': 5000000, 'discount': 0.2},
+            {'holder': 'Bridge Note', 'kind': 'note', 'principal': 1000000, 'valuation_cap': 8000000,
+             'interest_rate': 0.08, 'years': 1.5},
+            {'holder': 'Friends SAFE', 'kind': 'pre_money_safe', 'principal': 200000, 'discount': 0.2}
+        ]
+    
+    def test_post_money_safes_own_principal_over_cap(self):
+        """Capped post-money SAFEs own exactly principal / cap of the capitalization"""
+        conversion = convert_instrument_stack(create_default_cap_table(), self._instruments(), [2.0, 4.0])
+        
+        ownership = conversion['shares'] / conversion['pre_round_shares'][None, :]
+        assert ownership[0] == pytest.approx([0.1, 0.1])
+        assert ownership[1] == pytest.approx([0.1, 0.1])
+        assert conversion['conversion_basis'][:2].tolist() == [[2, 2], [2, 2]]
+    
+    def test_notes_accrue_interest_and_discount_applies(self):
+        """Notes convert principal plus interest; uncapped SAFEs use the discount"""
+        conversion = convert_instrument_stack(create_default_cap_table(), self._instruments(), [1.0])
+        
+        assert conversion['conversion_amounts'][2] == pytest.approx(1120000)
+        # Note cap price: 8M cap over 10M pre-round shares
+        assert conversion['conversion_prices'][2, 0] == pytest.approx(0.8)
+        assert conversion['conversion_prices'][3, 0] == pytest.approx(0.8)
+        assert conversion['conversion_basis'][3, 0] == 1
+    
+    def test_round_price_below_cap_converts_at_round(self):
+        """A low round price beats the cap and is used directly"""
+        conversion = convert_instrument_stack(create_default_cap_table(), self._instruments(), [0.5])
+        rows = converted_instrument_rows(conversion)
+        
+        angel = next(row for row in rows if row['holder'] == 'Angel SAFE')
+        assert angel['conversion_basis'] == 'round'
+        assert angel['shares'] * angel['price_per_share'] == pytest.approx(1000000)
+
+class TestPayoutSolver:
+    """Unit tests for the reverse waterfall solver"""
+    
+    def build_table(self):
+        return create_default_cap_table() + [{
+            'holder': 'Seed', 'shares': 2000000, 'ownership': 0, 'type': 'Preferred',
+            'price_per_share': 1.0, 'total_value': 2000000
+        }]
+    
+    def test_exit_value_for_payout(self):
+        """Solved exit values reproduce the target payouts in the waterfall"""
+        cap_table = self.build_table()
+        
+        solution = solve_exit_value_for_payout(cap_table, 'Founders', [1000000, 50000000], 1.0)
+        
+        assert solution['converged'].all()
+        matrix = calculate_waterfall_matrix(cap_table, solution['solution'], 1.0)
+        founders = matrix['holders'].index('Founders')
+        assert matrix['payouts'][founders] == pytest.approx([1000000, 50000000])
+    
+    def test_multiple_targets_and_capped_preference(self):
+        """Multiples beyond a capped preference come back unbracketed"""
+        solution = solve_exit_value_for_payout(self.build_table(), 'Seed', [0.5, 2.0], 1.0, 'multiple')
+        
+        assert solution['solution'][0] == pytest.approx(1000000)
+        assert solution['converged'].tolist() == [True, False]
+        assert np.isnan(solution['solution'][1])
+    
+    def test_unknown_holder_rejected(self):
+        """Unknown holder names fail fast"""
+        with pytest.raises(ValueError):
+            solve_exit_value_for_payout(self.build_table(), 'Nobody', [1000000], 1.0)
@@ -0,0 +1,99 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+from apps.workers.cap_table_engine import create_default_cap_table, calculate_waterfall_matrix
+from apps.workers.cap_table_ledger import CapTableLedger
+
+def build_rounds():
+    """Seed -> A -> B -> C history with a pool top-up in every round"""
+    terms = [
+        ('Seed', 8000000, 2000000),
+        ('Series A', 30000000, 10000000),
+        ('Series B', 100000000, 30000000),
+        ('Series C', 300000000, 60000000)
+    ]
+    return [
+        {
+            'name': name,
+            'pre_money_valuation': pre_money,
+            'events': [
+                {'type': 'pool_top_up', 'target': 0.1},
+                {'type': 'investment', 'holder': f'{name} Lead', 'amount': amount}
+            ]
+        }
+        for name, pre_money, amount in terms
+    ]
+
+class TestCapTableLedger:
+    """Unit tests for the multi-round cap table ledger"""
+
+    def test_round_prices_and_ownership(self):
+        """Each round prices off the fully diluted pre-money shares"""
+        ledger = CapTableLedger(create_default_cap_table(), build_rounds())
+
+        seed = ledger.state_after('Seed')
+        assert seed['price_per_share'] == pytest.approx(0.8)
+        assert seed['post_money_valuation'] == pytest.approx(10000000)
+
+        table = ledger.to_table()
+        assert sum(entry['ownership'] for entry in table) == pytest.approx(1.0)
+        assert {entry['series'] for entry in table} >= {'Seed', 'Series A', 'Series B', 'Series C'}
+
+    def test_editing_round_replays_only_later_rounds(self):
+        """Changing Series B terms recomputes B and C, not Seed and A"""
+        base_table = create_default_cap_table() + [
+            {'holder': f'Employee {i}', 'shares': 1000, 'ownership': 0, 'type': 'Options',
+             'price_per_share': 0.001, 'total_value': 1}
+            for i in range(2000)
+        ]
+        ledger = CapTableLedger(base_table, build_rounds())
+        ledger.to_table()
+        assert ledger.rounds_replayed == 4
+
+        ledger.update_round('Series B', pre_money_valuation=120000000)
+        table = ledger.to_table()
+
+        assert ledger.rounds_replayed == 6
+        shares_before_b = sum(ledger.state_after('Series A')['holdings'].values())
+        series_b = next(entry for entry in table if entry['series'] == 'Series B')
+        assert series_b['price_per_share'] == pytest.approx(120000000 / shares_before_b)
+
+    def test_senior_series_paid_first(self):
+        """Later series are senior in the liquidation waterfall"""
+        ledger = CapTableLedger(create_default_cap_table(), build_rounds())
+
+        matrix = calculate_waterfall_matrix(ledger.to_table(), [50000000], 1.0)
+
+        assert matrix['holders'][:4] == ['Series C Lead', 'Series B Lead', 'Series A Lead', 'Seed Lead']
+        assert matrix['payouts'][0, 0] == pytest.approx(50000000)
+
+    def test_conversion_moves_shares_to_common(self):
+        """Conversion events retire preferred shares into common"""
+        rounds = build_rounds()[:2]
+        rounds[1]['events'].insert(0, {
+            'type': 'conversion', 'holder': 'Seed Lead', 'from_series': 'Seed', 'to_series': 'Common'
+        })
+        ledger = CapTableLedger(create_default_cap_table(), rounds)
+
+        seed_rows = [entry for entry in ledger.to_table() if entry['holder'] == 'Seed Lead']
+        assert [entry['type'] for entry in seed_rows] == ['Common']
+
+    def test_conversion_of_unknown_holding_rejected(self):
+        """Converting a holder/series with no shares names the event and round"""
+        rounds = build_rounds()[:2]
+        rounds[1]['events'].insert(0, {
+            'type': 'conversion', 'holder': 'Seed Lead', 'from_series': 'Series Z', 'to_series': 'Common'
+        })
+        ledger = CapTableLedger(create_default_cap_table(), rounds)
+
+        with pytest.raises(ValueError, match="conversion event 1 of round 'Series A'"):
+            ledger.to_table()
+
+    def test_investment_without_pre_money_rejected(self):
+        """A priced investment needs a positive pre-money valuation"""
+        rounds = build_rounds()[:1]
+        rounds[0]['pre_money_valuation'] = 0
+        ledger = CapTableLedger(create_default_cap_table(), rounds)
+
+        with pytest.raises(ValueError, match="investment event 2 of round 'Seed'"):
+            ledger.to_table()
@@ -0,0 +1,92 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+from apps.workers.workers.comps_repository import CompsRepository, adjacent_stages, comps_rows
+
+ROWS = [
+    {'sector': 'SaaS', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 5, 'p50': 15, 'p90': 30, 'sample': 50, 'notes': 'US seed'},
+    {'sector': 'SaaS', 'stage': 'seed', 'geo': 'Global', 'multiple_name': 'EV/ARR',
+     'p10': 4, 'p50': 12, 'p90': 25, 'sample': 200, 'notes': 'Global seed'},
+    {'sector': 'SaaS', 'stage': 'A', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 8, 'p50': 20, 'p90': 40, 'sample': 80, 'notes': 'US Series A'}
+]
+
+class CountingLoader:
+    """Loader stub that counts calls and serves a mutable row list"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.rows)
+
+class TestCompsRepository:
+    """Unit tests for the in-memory comps index"""
+
+    def test_exact_and_fallback_resolution(self):
+        """Exact match first, then global geo, then adjacent stage"""
+        repository = CompsRepository(CountingLoader(ROWS), token_loader=None)
+
+        assert repository.get('saas', 'Seed', 'US', 'EV/ARR')['notes'] == 'US seed'
+        assert repository.get('SaaS', 'seed', 'EU', 'EV/ARR')['match'] == 'global_geo'
+        adjacent = repository.get('SaaS', 'preseed', 'US', 'EV/ARR')
+        assert adjacent['match'] == 'adjacent_stage'
+        assert adjacent['notes'] == 'US seed'
+        assert repository.get('Biotech', 'seed', 'US', 'EV/ARR') is None
+
+    def test_lookups_hit_memory_until_ttl(self):
+        """Only the first lookup loads; later ones are served from the index"""
+        loader = CountingLoader(ROWS)
+        repository = CompsRepository(loader, token_loader=None, ttl_seconds=3600)
+
+        for _ in range(100):
+            repository.get('SaaS', 'seed', 'US', 'EV/ARR')
+
+        assert loader.calls == 1
+
+    def test_refresh_only_reloads_when_token_changes(self):
+        """The change token avoids reloading unchanged tables"""
+        loader = CountingLoader(ROWS)
+        token = {'value': 1}
+        repository = CompsRepository(loader, token_loader=lambda: token['value'], ttl_seconds=0)
+        repository.get('SaaS', 'seed', 'US', 'EV/ARR')
+
+        assert repository.refresh() is False
+        loader.rows[0] = {**ROWS[0], 'p50': 16}
+        token['value'] = 2
+        assert repository.refresh() is True
+        assert loader.calls == 2
+        assert repository.get('SaaS', 'seed', 'US', 'EV/ARR')['p50'] == 16
+
+    def test_failed_load_keeps_defaults(self):
+        """Without a database the seed comps keep being served"""
+        def failing_loader():
+            raise ConnectionError("database unavailable")
+
+        repository = CompsRepository(failing_loader, token_loader=None)
+
+        comps = repository.get('Fintech', 'seed', 'US', 'EV/ARR')
+        assert comps['p50'] == pytest.approx(20)
+        assert repository.loads == 0
+
+    def test_adjacent_stages(self):
+        """Neighbouring stages come earlier stage first"""
+        assert adjacent_stages('seed') == ['preseed', 'A']
+        assert adjacent_stages('idea') == ['preseed']
+        assert adjacent_stages('unknown') == []
+
+    def test_rows_without_multiples_are_skipped(self):
+        """A NULL multiple drops that row instead of failing the refresh"""
+        rows = [
+            {'sector': 'SaaS', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR', 'p10': 4, 'p50': 12, 'p90': None},
+            {'sector': 'Fintech', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR', 'p10': 8, 'p50': 20, 'p90': 40}
+        ]
+
+        repository = CompsRepository(lambda: comps_rows(rows), token_loader=None, default_rows=[])
+
+        assert repository.get('Fintech', 'seed', 'US', 'EV/ARR')['p90'] == pytest.approx(40)
+        assert repository.get('SaaS', 'seed', 'US', 'EV/ARR') is None
+        assert repository.loads == 1
@@ -0,0 +1,92 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+import numpy as np
+from apps.workers.workers.comps_search import (
+    EmbeddingMatrixIndex,
+    find_similar_comps,
+    hash_embedding,
+    search_pgvector,
+    summarize_similar_comps
+)
+
+ROWS = [
+    {'sector': 'SaaS', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 5, 'p50': 15, 'p90': 30, 'sample': 50, 'notes': 'B2B workflow software'},
+    {'sector': 'Fintech', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 8, 'p50': 20, 'p90': 40, 'sample': 30, 'notes': 'Payments infrastructure'},
+    {'sector': 'Healthtech', 'stage': 'A', 'geo': 'EU', 'multiple_name': 'EV/ARR',
+     'p10': 6, 'p50': 18, 'p90': 35, 'sample': 25, 'notes': 'Clinical data platform'}
+]
+
+class TestCompsSearch:
+    """Unit tests for nearest-neighbour comparable search"""
+
+    def test_hash_embedding_is_deterministic(self):
+        """The local stand-in embedding is stable and unit length"""
+        first = hash_embedding("Fintech payments infrastructure")
+        second = hash_embedding("fintech  Payments infrastructure!")
+
+        assert first.shape == (768,)
+        assert np.array_equal(first, second)
+        assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-6)
+
+    def test_matrix_index_matches_brute_force(self, tmp_path):
+        """Top-k from the memory-mapped index equals a full sort"""
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((500, 768)).astype(np.float32)
+        rows = [dict(ROWS[i % 3], notes=f"comp {i}") for i in range(500)]
+        EmbeddingMatrixIndex.build(str(tmp_path / 'comps'), rows, embeddings)
+
+        index = EmbeddingMatrixIndex(str(tmp_path / 'comps'))
+        results = index.search(embeddings[42], k=5)
+
+        normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ normalized[42]))[:5]
+        assert isinstance(index.embeddings, np.memmap)
+        assert [result['notes'] for result in results] == [f"comp {i}" for i in expected]
+        assert results[0]['similarity'] == pytest.approx(1.0, abs=1e-5)
+
+    def test_find_similar_comps_by_description(self, tmp_path):
+        """A text query ranks the matching sector first"""
+        EmbeddingMatrixIndex.build(str(tmp_path / 'comps'), ROWS)
+
+        similar = find_similar_comps("Fintech seed payments", k=2, backend='matrix', index_path=str(tmp_path / 'comps'))
+
+        assert similar['backend'] == 'matrix'
+        assert similar['comps'][0]['sector'] == 'Fintech'
+        assert len(similar['comps']) == 2
+
+    def test_summary_weights_by_similarity(self):
+        """The multiple summary is similarity weighted"""
+        comps = [dict(ROWS[0], similarity=0.75), dict(ROWS[1], similarity=0.25), dict(ROWS[2], similarity=-0.5)]
+
+        summary = summarize_similar_comps(comps)
+
+        assert summary['p50'] == pytest.approx(0.75 * 15 + 0.25 * 20)
+        assert summarize_similar_comps([]) is None
+
+    def test_text_queries_need_a_hash_index(self, tmp_path):
+        """Descriptions are never compared against embeddings from another model"""
+        rng = np.random.default_rng(0)
+        EmbeddingMatrixIndex.build(str(tmp_path / 'comps'), ROWS, rng.standard_normal((3, 768)), embedder='text-embedding-3')
+
+        with pytest.raises(ValueError):
+            find_similar_comps("Fintech seed payments", backend='matrix', index_path=str(tmp_path / 'comps'))
+        with pytest.raises(ValueError):
+            search_pgvector("Fintech seed payments")
+
+    def test_default_backend_sends_text_to_the_matrix(self, tmp_path):
+        """Without a backend, descriptions skip pgvector"""
+        EmbeddingMatrixIndex.build(str(tmp_path / 'comps'), ROWS)
+
+        similar = find_similar_comps("Healthtech clinical data", k=1, index_path=str(tmp_path / 'comps'))
+
+        assert similar['backend'] == 'matrix'
+        assert similar['comps'][0]['sector'] == 'Healthtech'
+
+    def test_summary_skips_missing_multiples(self):
+        """Comps without all three multiples are left out of the summary"""
+        comps = [dict(ROWS[0], similarity=0.5), dict(ROWS[1], p50=None, similarity=0.9)]
+
+        assert summarize_similar_comps(comps)['p50'] == pytest.approx(15)
@@ -0,0 +1,195 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+from apps.workers.result_cache import (
+    LocalLRU,
+    ResultCache,
+    cache_key,
+    cached_result,
+    set_result_cache
+)
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the cache uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.index = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def zpopmin(self, key, count):
+        oldest = sorted(self.index.items(), key=lambda item: item[1])[:count]
+        for member, _ in oldest:
+            del self.index[member]
+        return oldest
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    def set(self, key, value, ex=None):
+        self.redis.values[key] = value.encode('utf-8')
+        self.results.append(True)
+
+    def zadd(self, key, mapping):
+        self.redis.index.update(mapping)
+        self.results.append(len(mapping))
+
+    def zcard(self, key):
+        self.results.append(len(self.redis.index))
+
+    def execute(self):
+        return self.results
+
+class FakeMetrics:
+    """Records increment_counter/set_gauge calls like ObservabilityManager"""
+
+    def __init__(self):
+        self.counters = []
+        self.gauges = []
+
+    def increment_counter(self, name, labels=None):
+        self.counters.append((name, labels))
+
+    def set_gauge(self, name, value, labels=None):
+        self.gauges.append((name, value, labels))
+
+class TestResultCache:
+    """Unit tests for the content-addressed engine result cache"""
+
+    def setup_method(self):
+        self.redis = FakeRedis()
+        self.metrics = FakeMetrics()
+        self.cache = ResultCache(redis_client=self.redis, redis_max_entries=3, metrics=self.metrics)
+        set_result_cache(self.cache)
+
+    def teardown_method(self):
+        set_result_cache(None)
+
+    def test_key_is_canonical(self):
+        """Key order does not matter; version and task do"""
+        assert cache_key('task', 'v1', {'a': 1, 'b': [1, 2]}) == cache_key('task', 'v1', {'b': [1, 2], 'a': 1})
+        assert cache_key('task', 'v1', {'a': 1}) != cache_key('task', 'v2', {'a': 1})
+        assert cache_key('task', 'v1', {'a': 1}) != cache_key('other', 'v1', {'a': 1})
+
+    def test_decorated_task_computes_once(self):
+        """Identical inputs are served from the cache with the caller's pitch_id"""
+        calls = []
+
+        @cached_result('test.engine', version='v1')
+        def engine(self, pitch_id, inputs):
+            calls.append(pitch_id)
+            return {'pitch_id': pitch_id, 'value': inputs['x'] * 2}
+
+        first = engine(None, 'pitch-1', {'x': 21})
+        second = engine(None, 'pitch-2', {'x': 21})
+
+        assert calls == ['pitch-1']
+        assert first == {'pitch_id': 'pitch-1', 'value': 42}
+        assert second == {'pitch_id': 'pitch-2', 'value': 42}
+        assert ('engine_cache', {'task': 'test.engine', 'tier': 'local', 'result': 'hit'}) in self.metrics.counters
+
+    def test_redis_tier_and_version_invalidation(self):
+        """Other processes hit Redis; a new engine version misses"""
+        @cached_result('test.engine', version='v1')
+        def engine_v1(self, pitch_id, inputs):
+            return {'value': 1}
+
+        @cached_result('test.engine', version='v2')
+        def engine_v2(self, pitch_id, inputs):
+            return {'value': 2}
+
+        engine_v1(None, 'pitch-1', {'x': 1})
+        self.cache.local.clear()
+
+        assert engine_v1(None, 'pitch-1', {'x': 1}) == {'value': 1}
+        assert self.cache.stats['redis_hit'] == 1
+        assert engine_v2(None, 'pitch-1', {'x': 1}) == {'value': 2}
+
+    def test_redis_size_eviction(self):
+        """The Redis tier keeps only the newest redis_max_entries results"""
+        for i in range(5):
+            self.cache.set(f"key-{i}", {'value': i})
+
+        assert len(self.redis.index) == 3
+        assert 'engine-cache:key-0' not in self.redis.values
+        assert 'engine-cache:key-4' in self.redis.values
+
+    def test_local_lru_eviction(self):
+        """The local tier evicts least recently used entries"""
+        lru = LocalLRU(max_entries=2)
+        lru.set('a', '1')
+        lru.set('b', '2')
+        lru.get('a')
+        lru.set('c', '3')
+
+        assert lru.get('b') is None
+        assert lru.get('a') == '1'
+
+    def test_valuation_task_is_cached(self):
+        """Valuation tasks go through the cache"""
+        # Engines import the cache as the top-level result_cache module
+        from result_cache import set_result_cache as set_engine_cache
+        from apps.workers.workers.valuation_engines import run_berkus_valuation
+
+        set_engine_cache(self.cache)
+        try:
+            first = run_berkus_valuation.run('pitch-1', {'sales': True})
+            second = run_berkus_valuation.run('pitch-2', {'sales': True})
+        finally:
+            set_engine_cache(None)
+
+        assert second['result_base'] == pytest.approx(first['result_base'])
+        assert second['pitch_id'] == 'pitch-2'
+        assert self.cache.stats['local_hit'] == 1
+
+    def test_hits_get_a_fresh_created_at(self):
+        """A cached result is restamped with the time it was served"""
+        @cached_result('test.engine', version='v1')
+        def engine(self, pitch_id, inputs):
+            return {'pitch_id': pitch_id, 'created_at': '2020-01-01T00:00:00'}
+
+        engine(None, 'pitch-1', {'x': 1})
+        hit = engine(None, 'pitch-2', {'x': 1})
+
+        assert hit['created_at'] > '2020-01-01T00:00:00'
+
+    def test_version_covers_imported_worker_modules(self, tmp_path, monkeypatch):
+        """Editing a module the engine imports changes the engine version"""
+        import result_cache
+
+        (tmp_path / 'cache_dep.py').write_text('RATE = 1\n')
+        (tmp_path / 'cache_engine.py').write_text('from cache_dep import RATE\n')
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(result_cache, 'WORKERS_ROOT', str(tmp_path))
+        __import__('cache_engine')
+
+        before = result_cache.module_version('cache_engine')
+        (tmp_path / 'cache_dep.py').write_text('RATE = 2\n')
+
+        assert result_cache.module_version('cache_engine') != before
+        assert result_cache.module_version('missing_module') == 'unversioned'
+
+    def test_comps_valuation_is_not_cached(self):
+        """Comps read live comps data and always recompute"""
+        from result_cache import set_result_cache as set_engine_cache
+        from apps.workers.workers.valuation_engines import run_comps_valuation
+
+        set_engine_cache(self.cache)
+        try:
+            run_comps_valuation.run('pitch-1', {'arr': 1000000})
+            run_comps_valuation.run('pitch-2', {'arr': 1000000})
+        finally:
+            set_engine_cache(None)
+
+        assert self.cache.stats == {}
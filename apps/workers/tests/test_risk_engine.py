@@ -0,0 +1,173 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import os
+import pytest
+from apps.workers.decision_engine import check_gating_rules, generate_risk_section, make_investment_decision
+from apps.workers.risk_engine import (
+    CsvRowStream,
+    aggregate_risk_entries,
+    assess_risks,
+    export_risks_csv,
+    export_risks_csv_stream,
+    risk_assessment_aggregates,
+    upload_stream_to_minio
+)
+
+class FakeMinio:
+    """Records put_object calls and reads the stream in part-size reads like the MinIO client"""
+
+    def __init__(self):
+        self.buckets = set()
+        self.objects = {}
+        self.reads = []
+
+    def bucket_exists(self, bucket_name):
+        return bucket_name in self.buckets
+
+    def make_bucket(self, bucket_name):
+        self.buckets.add(bucket_name)
+
+    def put_object(self, bucket_name, object_name, data, length, part_size=0, content_type=None):
+        assert length == -1
+        parts = []
+        while True:
+            part = data.read(part_size)
+            if not part:
+                break
+            self.reads.append(len(part))
+            parts.append(part)
+        self.objects[(bucket_name, object_name)] = b''.join(parts)
+
+class TestRiskCsvExport:
+    """Unit tests for streaming risk CSV exports"""
+
+    def setup_method(self):
+        self.assessment = assess_risks.run('pitch-1', {'risk_scores': {'talent_risk': 3}})
+
+    def test_stream_matches_inline_export(self, tmp_path):
+        """The streamed CSV is byte for byte the inline export, and only its key is returned"""
+        inline = export_risks_csv.run('pitch-1', self.assessment)['csv_content']
+        result = export_risks_csv_stream.run('export-1', {'risk_data': self.assessment, 'storage': 'local',
+                                                         'export_dir': str(tmp_path)})
+
+        with open(result['object_key'], encoding='utf-8', newline='') as f:
+            assert f.read() == inline
+        assert result['rows'] == 20
+        assert 'csv_content' not in result
+
+    def test_minio_multipart_upload(self):
+        """The upload reads the stream in part-size chunks with unknown length"""
+        client = FakeMinio()
+        rows = ([i, 'market', 'high'] for i in range(1000))
+        key = upload_stream_to_minio(CsvRowStream(['id', 'category', 'severity'], rows), 'exports', 'risks/k.csv',
+                                     part_size=1024, minio_client=client)
+
+        content = client.objects[('exports', 'risks/k.csv')].decode('utf-8')
+        assert key == 'risks/k.csv'
+        assert 'exports' in client.buckets
+        assert content.count('\r\n') == 1001
+        assert set(client.reads[:-1]) == {1024}
+
+    def test_rows_are_pulled_lazily(self):
+        """Reading one part only pulls the rows needed for it"""
+        pulled = []
+
+        def rows():
+            for i in range(100000):
+                pulled.append(i)
+                yield [i, 'category', 'high']
+
+        stream = CsvRowStream(['id', 'category', 'severity'], rows(), batch_rows=100)
+        first = stream.read(1024)
+
+        assert len(first) == 1024
+        assert len(pulled) <= 200
+        assert stream.rows_written == len(pulled)
+
+    def test_local_export_of_many_assessments(self, tmp_path):
+        """Several assessments stream into one file; the result has only the key and counts"""
+        result = export_risks_csv_stream.run('export-2', {
+            'risk_assessments': [self.assessment, self.assessment],
+            'storage': 'local',
+            'export_dir': str(tmp_path)
+        })
+
+        assert result['object_key'] == os.path.join(str(tmp_path), 'risks/export-2.csv')
+        assert result['rows'] == 40
+        assert result['bytes'] == os.path.getsize(result['object_key'])
+        assert set(result) == {'export_id', 'status', 'storage', 'object_key', 'rows', 'bytes', 'created_at'}
+
+    def test_empty_assessment_list_writes_header(self, tmp_path):
+        """An empty risk_assessments list exports a header-only CSV"""
+        result = export_risks_csv_stream.run('export-3', {'risk_assessments': [], 'storage': 'local',
+                                                         'export_dir': str(tmp_path)})
+
+        with open(result['object_key'], encoding='utf-8', newline='') as f:
+            assert f.read() == 'Category,Risk,Description,Severity,Likelihood,Score,Weight,Weighted Score,Mitigation,Owner\r\n'
+        assert result['rows'] == 0
+
+class TestRiskAggregation:
+    """Single-pass severity aggregation and its use in gating"""
+
+    def setup_method(self):
+        self.assessment = assess_risks.run('pitch-1', {'risk_scores': {'market_size_risk': 0, 'talent_risk': 3, 'legal_risk': 1}})
+
+    def test_kernel_matches_entry_counts(self):
+        """Kernel aggregates equal a count over the nested risk entries"""
+        legacy = {key: value for key, value in self.assessment.items() if key != 'aggregates'}
+        aggregates = self.assessment['aggregates']
+        recounted = aggregate_risk_entries(legacy)
+
+        assert aggregates['severity_counts'] == {'low': 1, 'medium': 1, 'high': 17, 'critical': 1}
+        assert aggregates['severity_counts'] == recounted['severity_counts']
+        for category, counts in aggregates['categories'].items():
+            assert counts['high_risk_count'] == recounted['categories'][category]['high_risk_count']
+            assert counts['weighted_score'] == pytest.approx(recounted['categories'][category]['weighted_score'])
+
+    def test_summary_uses_aggregates(self):
+        """The summary counts come from the aggregates"""
+        summary = self.assessment['risk_summary']
+
+        assert summary['critical_risks_count'] == 1
+        assert summary['high_risks_count'] == 17
+        assert summary['category_insights']['market']['high_risk_count'] == 3
+        assert summary['highest_risk_category'] == 'execution'
+
+    def test_gating_reads_aggregates(self):
+        """check_gating_rules blocks on critical risks from the aggregation API"""
+        gate = check_gating_rules([{'result_base': 1000000}], self.assessment, {})
+
+        assert gate['passed'] is False
+        assert gate['critical_risks'] == 1
+        assert gate['high_severity_risks'] == 18
+
+    def test_older_assessments_fall_back(self):
+        """Assessments with only a breakdown still give counts"""
+        counts = risk_assessment_aggregates({'overall_risk_score': 1.0, 'risk_breakdown': {'critical': 2, 'high': 1}})
+
+        assert counts['critical_count'] == 2
+        assert counts['high_severity_count'] == 3
+
+    def test_decision_summary_reads_aggregates(self):
+        """A passing decision carries the aggregated counts in its risk summary"""
+        assessment = {'overall_risk_score': 1.2, 'overall_severity': 'medium', 'risk_breakdown': {'high': 2, 'critical': 0}}
+        decision = make_investment_decision.run('pitch-1', {
+            'recommendation': 'yes',
+            'check_size_usd': 500000,
+            'pre_money_usd': 4500000,
+            'valuations': [{'result_low': 4000000, 'result_base': 5000000, 'result_high': 6000000}],
+            'risk_assessment': assessment
+        })
+
+        assert decision['status'] == 'completed'
+        assert decision['decision_summary']['risk_summary']['high_risks'] == 2
+        assert decision['decision_summary']['risk_summary']['critical_risks'] == 0
+        assert decision['decision_summary']['risk_summary']['high_severity_risks'] == 2
+        assert decision['target_ownership'] == pytest.approx(0.1)
+
+    def test_memo_risk_section_reads_aggregates(self):
+        """The memo's high and critical counts come from the aggregation API"""
+        section = generate_risk_section(self.assessment)
+
+        assert '- **High Risks**: 17' in section
+        assert '- **Critical Risks**: 1' in section
@@ -0,0 +1,211 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import json
+import os
+import pytest
+import numpy as np
+from apps.workers.decision_engine import check_gating_rules
+from apps.workers.risk_engine import (
+    BATCH_RISK_INLINE_MAX_PITCHES,
+    assess_risks,
+    assess_risks_batch,
+    get_severity_level,
+    risk_rows,
+    score_portfolio_risks
+)
+# The engine imports the models as the top-level risk_models module
+from risk_models import (
+    RiskModelRegistry,
+    compile_risk_model,
+    set_risk_model_registry,
+    template_risk_key
+)
+
+TEMPLATE = {
+    'sector': 'Robotics',
+    'risk_categories': {
+        'technical': [
+            {'name': 'Hardware reliability', 'description': 'Field failures of the robot',
+             'typical_severity': 'critical', 'typical_likelihood': 'high',
+             'mitigation_strategies': ['Burn-in testing', 'Spare parts program']}
+        ],
+        'manufacturing': [
+            {'name': 'Supply chain', 'description': 'Component shortages',
+             'typical_severity': 'medium', 'typical_likelihood': 'low', 'mitigation_strategies': []}
+        ]
+    }
+}
+
+def write_template(directory, name, template):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        json.dump(template, f)
+    return path
+
+class TestRiskModels:
+    """Unit tests for compiled sector risk models"""
+
+    def test_generic_model_scores(self):
+        """Default scores give the generic model's overall high severity"""
+        model = compile_risk_model()
+        scored = model.score({'market_size_risk': 0, 'timing_risk': 3})
+
+        assert len(model) == 20
+        assert scored['overall_score'] == pytest.approx((1.6 + 2 * 5) / 6)
+        assert scored['category_scores'][model.categories.index('market')] == pytest.approx(1.6)
+        assert scored['severity'][model.key_index['timing_risk']] == 3
+
+    def test_template_compilation(self):
+        """Template risks join or add categories with likelihood weights and severity defaults"""
+        model = compile_risk_model(TEMPLATE)
+        position = model.key_index[template_risk_key('Hardware reliability')]
+
+        assert model.categories[-1] == 'manufacturing'
+        assert model.weights[position] == 0.4
+        assert model.default_scores[position] == 2
+        assert model.default_scores[model.key_index[template_risk_key('Supply chain')]] == 1
+        assert model.mitigations[position] == 'Burn-in testing; Spare parts program'
+        assert model.categories[model.category_index[position]] == 'technical'
+
+    def test_colliding_template_risk_is_logged(self, caplog):
+        """A template risk that maps onto a generic key keeps the generic risk and warns"""
+        template = {'sector': 'Robotics', 'risk_categories': {'operations': [
+            {'name': 'Talent', 'typical_severity': 'critical', 'typical_likelihood': 'high'}]}}
+
+        with caplog.at_level('WARNING'):
+            model = compile_risk_model(template)
+
+        assert template_risk_key('Talent') == 'talent_risk'
+        assert len(model) == 20
+        assert model.default_scores[model.key_index['talent_risk']] == 2
+        assert "'Talent' in operations collides with talent_risk" in caplog.text
+
+    def test_shipped_templates_load(self):
+        """Every fixture template compiles and is found case insensitively"""
+        registry = RiskModelRegistry()
+        assert registry.sectors() == ['fintech', 'healthtech', 'saas']
+        assert registry.get('FinTech').sector == 'FinTech'
+        assert registry.get('unknown') is registry.base_model
+
+    def test_hot_reload(self, tmp_path):
+        """Changed templates are recompiled; broken ones keep the previous models"""
+        path = write_template(tmp_path, 'robotics.json', TEMPLATE)
+        registry = RiskModelRegistry(templates_dir=str(tmp_path), check_interval=0)
+        assert len(registry.get('robotics')) == 22
+
+        updated = {**TEMPLATE, 'risk_categories': {**TEMPLATE['risk_categories'], 'market': [
+            {'name': 'Adoption', 'typical_severity': 'high', 'typical_likelihood': 'medium'}]}}
+        write_template(tmp_path, 'robotics.json', updated)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+        assert len(registry.get('robotics')) == 23
+
+        with open(path, 'w') as f:
+            f.write('{not json')
+        assert len(registry.get('robotics')) == 23
+        assert registry.loads == 2
+
+    def test_assess_risks_uses_sector_model(self, tmp_path):
+        """The task scores with the sector model and keeps the generic output otherwise"""
+        write_template(tmp_path, 'robotics.json', TEMPLATE)
+        set_risk_model_registry(RiskModelRegistry(templates_dir=str(tmp_path)))
+        try:
+            generic = assess_risks.run('pitch-1', {})
+            sector = assess_risks.run('pitch-1', {'sector': 'robotics', 'risk_scores': {'supply_chain_risk': 0}})
+        finally:
+            set_risk_model_registry(None)
+
+        assert generic['total_risks'] == 20
+        assert generic['overall_severity'] == 'high'
+        assert generic['risk_breakdown'] == {'low': 0, 'medium': 0, 'high': 20, 'critical': 0}
+        assert sector['sector_model'] == 'Robotics'
+        assert sector['category_results']['manufacturing']['severity'] == 'low'
+        assert sector['risk_breakdown'] == {'low': 1, 'medium': 0, 'high': 21, 'critical': 0}
+
+    def test_well_scored_sector_pitch_passes_gating(self):
+        """Unscored template risks never count as critical, whatever their typical severity"""
+        registry = RiskModelRegistry()
+        generic_scores = {key: 0 for key in compile_risk_model().keys}
+        set_risk_model_registry(registry)
+        try:
+            assessment = assess_risks.run('pitch-1', {'sector': 'HealthTech', 'risk_scores': generic_scores})
+        finally:
+            set_risk_model_registry(None)
+
+        gate = check_gating_rules([{'result_base': 1000000}], assessment, {})
+
+        assert assessment['sector_model'] == 'HealthTech'
+        assert assessment['risk_breakdown']['critical'] == 0
+        assert 'critical risks' not in ' '.join(gate['reasons'])
+
+    def test_severity_thresholds(self):
+        """Threshold lookups match the severity bands"""
+        assert [get_severity_level(score) for score in (0, 0.5, 1.49, 1.5, 2.5, 3)] == \
+            ['low', 'medium', 'medium', 'high', 'critical', 'critical']
+
+class TestBatchRiskScoring:
+    """Portfolio-wide risk scoring from a score matrix"""
+
+    def setup_method(self):
+        self.risk_keys = ['market_size_risk', 'talent_risk', 'legal_risk', 'payment_processing_regulations_risk']
+        self.scores = np.array([
+            [0, 3, 1, np.nan],
+            [3, 3, 3, 3],
+            [np.nan, 0, 0, 0]
+        ])
+        self.pitch_ids = ['pitch-1', 'pitch-2', 'pitch-3']
+        self.sectors = [None, 'FinTech', 'fintech']
+
+    def test_matches_per_pitch_assessment(self):
+        """Every row scores exactly as assess_risks on the same inputs"""
+        columns, _ = score_portfolio_risks(self.pitch_ids, self.risk_keys, self.scores, self.sectors)
+
+        for row, sector in enumerate(self.sectors):
+            risk_scores = {key: value for key, value in zip(self.risk_keys, self.scores[row]) if not np.isnan(value)}
+            single = assess_risks.run(self.pitch_ids[row], {'sector': sector, 'risk_scores': risk_scores})
+
+            assert columns['overall_risk_score'][row] == pytest.approx(single['overall_risk_score'])
+            assert columns['overall_severity'][row] == single['overall_severity']
+            assert columns['high_severity_count'][row] == len(single['high_severity_risks'])
+            assert columns['category_score.market'][row] == pytest.approx(
+                single['category_results']['market']['average_score'])
+
+    def test_categories_missing_from_a_model_are_nan(self):
+        """Sector-only categories are NaN for pitches on the generic model"""
+        columns, _ = score_portfolio_risks(self.pitch_ids, self.risk_keys, self.scores, self.sectors)
+
+        assert np.isnan(columns['category_score.financial'][0])
+        assert not np.isnan(columns['category_score.financial'][1])
+
+    def test_risk_rows_filter_by_severity(self):
+        """Only risks at or above min_severity become risks table rows"""
+        _, groups = score_portfolio_risks(self.pitch_ids, self.risk_keys, self.scores, self.sectors)
+        rows = list(risk_rows(self.pitch_ids, groups, min_severity='critical'))
+
+        assert ('pitch-1', 'execution', 'critical', 'high', 'Hiring and retention challenges', '', 'risk_engine') in rows
+        assert all(row[2] == 'critical' for row in rows)
+        assert {row[0] for row in rows} == {'pitch-1', 'pitch-2'}
+
+    def test_task_without_write(self):
+        """The task returns per-pitch columns and severity counts"""
+        result = assess_risks_batch.run('batch-1', {
+            'pitch_ids': self.pitch_ids,
+            'risk_keys': self.risk_keys,
+            'scores': self.scores.tolist(),
+            'write': False
+        })
+
+        assert result['pitches'] == 3
+        assert result['rows_written'] == 0
+        assert sum(result['severity_counts'].values()) == 3
+        assert result['columns']['pitch_id'] == self.pitch_ids
+
+    def test_large_batch_needs_output_path(self):
+        """Per-pitch columns of large batches are not returned through the result backend"""
+        n_pitches = BATCH_RISK_INLINE_MAX_PITCHES + 1
+        with pytest.raises(ValueError, match='output_path'):
+            assess_risks_batch.run('batch-1', {
+                'pitch_ids': [f"pitch-{row}" for row in range(n_pitches)],
+                'risk_keys': self.risk_keys,
+                'scores': np.zeros((n_pitches, len(self.risk_keys))),
+                'write': False
+            })
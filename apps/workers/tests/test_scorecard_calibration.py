@@ -0,0 +1,141 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import time
+import numpy as np
+import pytest
+from apps.workers.workers.scorecard_calibration import (
+    _solve_nonnegative,
+    fit_scorecard_weights,
+    scorecard_coefficients,
+    scorecard_history_arrays
+)
+from apps.workers.workers.scorecard_weights import ScorecardWeightStore, set_weight_store
+from apps.workers.workers.valuation_engines import (
+    DEFAULT_SCORECARD_WEIGHTS,
+    run_scorecard_valuation,
+    scorecard_values
+)
+
+CATEGORIES = tuple(DEFAULT_SCORECARD_WEIGHTS)
+
+TRUE_WEIGHTS = {'team': 40, 'market': 20, 'product': 10, 'traction': 20, 'competition': 0, 'defensibility': 5, 'gtm': 5}
+
+def synthetic_history(n, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(0, 10, size=(n, len(CATEGORIES)))
+    coefficients = scorecard_coefficients(TRUE_WEIGHTS, (1.0, 12.0), CATEGORIES)
+    multiples = coefficients[0] + scores @ coefficients[1:] + rng.normal(0, noise, n)
+    return scores, multiples
+
+class TestScorecardCalibration:
+    """Unit tests for scorecard weight calibration"""
+
+    def test_recovers_weights_and_curve(self):
+        """Noise-free history gives back the generating weights and multiple range"""
+        scores, multiples = synthetic_history(5000)
+        weight_set = fit_scorecard_weights(scores, multiples)
+
+        for category, weight in TRUE_WEIGHTS.items():
+            assert weight_set['weights'][category] == pytest.approx(weight, abs=1e-3)
+        assert weight_set['multiple_min'] == pytest.approx(1.0)
+        assert weight_set['multiple_max'] == pytest.approx(12.0)
+        assert weight_set['metrics']['rmse'] < weight_set['metrics']['default_rmse']
+
+    def test_weights_are_non_negative(self):
+        """Categories with a negative fitted effect get zero weight"""
+        scores, multiples = synthetic_history(5000, noise=0.5)
+        multiples = multiples - 0.3 * scores[:, CATEGORIES.index('gtm')]
+        weight_set = fit_scorecard_weights(scores, multiples)
+
+        assert weight_set['weights']['gtm'] == 0
+        assert min(weight_set['weights'].values()) >= 0
+        assert sum(weight_set['weights'].values()) == pytest.approx(100, abs=1e-2)
+
+    def test_solver_meets_nnls_optimality(self):
+        """Active-set solutions satisfy the KKT conditions of the NNLS problem"""
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            design = rng.standard_normal((200, 6))
+            target = design @ rng.standard_normal(6) + rng.standard_normal(200)
+            gram, moment = design.T @ design / 200, design.T @ target / 200
+
+            solution = _solve_nonnegative(gram, moment, np.zeros(6), np.zeros(6))
+            gradient = moment - gram @ solution
+
+            assert solution.min() >= 0
+            assert gradient[solution > 0] == pytest.approx(0, abs=1e-9)
+            assert gradient[solution == 0].max(initial=0) <= 1e-9
+
+    def test_multiple_min_is_non_negative(self):
+        """A history implying a negative intercept gets multiple_min 0"""
+        scores, multiples = synthetic_history(5000, noise=0.5)
+        weight_set = fit_scorecard_weights(scores, multiples - 3.0)
+
+        assert weight_set['multiple_min'] == 0
+        assert weight_set['multiple_max'] > 0
+
+    def test_ridge_shrinks_towards_defaults(self):
+        """A strong ridge penalty keeps the default weights"""
+        scores, multiples = synthetic_history(200, noise=2.0)
+        weight_set = fit_scorecard_weights(scores, multiples, ridge=1e6)
+
+        for category, weight in DEFAULT_SCORECARD_WEIGHTS.items():
+            assert weight_set['weights'][category] == pytest.approx(weight, abs=0.1)
+
+    def test_100k_rows_fit_quickly(self):
+        """Calibration over 100k historical scorecards takes well under a second"""
+        scores, multiples = synthetic_history(100000, noise=1.0)
+        start = time.perf_counter()
+        fit_scorecard_weights(scores, multiples)
+        assert time.perf_counter() - start < 1.0
+
+    def test_history_rows_to_arrays(self):
+        """Missing scores default to 5; rows without ARR are dropped"""
+        rows = [{'inputs': {'arr': 100000, 'scores': {'team': 8}}, 'realized_usd': 900000},
+                {'inputs': {'scores': {'team': 2}}, 'realized_usd': 500000}]
+        scores, arr, realized = scorecard_history_arrays(rows)
+
+        assert scores.shape == (1, len(CATEGORIES))
+        assert scores[0, CATEGORIES.index('team')] == 8
+        assert scores[0, CATEGORIES.index('market')] == 5
+        assert realized[0] / arr[0] == pytest.approx(9)
+
+class TestScorecardWeightSets:
+    """Published weight sets in the scorecard valuation"""
+
+    def setup_method(self):
+        self.published = []
+        self.weight_set = {'version': 'v-test', 'weights': TRUE_WEIGHTS, 'multiple_min': 1.0, 'multiple_max': 12.0}
+        self.store = ScorecardWeightStore(loader=lambda version: self.weight_set if version == 'v-test' else None,
+                                          publisher=self.published.append)
+        set_weight_store(self.store)
+
+    def teardown_method(self):
+        set_weight_store(None)
+
+    def test_task_uses_weight_set(self):
+        """The task and vectorized formula apply the published weights and curve"""
+        inputs = {'arr': 100000, 'scores': {'team': 10, 'market': 10}, 'weight_set': 'v-test'}
+        result = run_scorecard_valuation.run('pitch-1', inputs)
+
+        base_score = (10 * 40 + 10 * 20 + 5 * 40) / 100
+        assert result['base_multiple'] == pytest.approx(1.0 + base_score / 10 * 11.0)
+        assert result['result_base'] == pytest.approx(scorecard_values(inputs))
+        assert result['weight_set'] == 'v-test'
+
+    def test_weight_sets_are_cached(self):
+        """A version is loaded once; unknown versions raise"""
+        self.store.get('v-test')
+        self.store.get('v-test')
+        assert self.store.loads == 1
+
+        with pytest.raises(ValueError):
+            self.store.get('missing')
+
+    def test_publish(self):
+        """Published sets are stored and served without a reload"""
+        new_set = {'version': 'v-new', 'weights': DEFAULT_SCORECARD_WEIGHTS, 'multiple_min': 0.5, 'multiple_max': 10}
+        self.store.publish(new_set)
+
+        assert self.published == [new_set]
+        assert self.store.get('v-new') is new_set
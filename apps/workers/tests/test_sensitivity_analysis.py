@@ -0,0 +1,67 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+from apps.workers.workers.sensitivity_analysis import calculate_sobol_indices, run_sobol_analysis
+
+# Additive RFS model: each factor contributes (factor step)^2 * Var(level)
+RFS_DISTRIBUTIONS = {
+    'risk_factors.management': {'dist': 'uniform', 'low': -2, 'high': 2},
+    'risk_factors.technology_risk': {'dist': 'uniform', 'low': -1, 'high': 1},
+    'risk_factors.litigation_risk': {'dist': 'uniform', 'low': -2, 'high': 2}
+}
+
+class TestSobolAnalysis:
+    """Unit tests for global sensitivity analysis"""
+
+    def test_additive_model_matches_analytical_indices(self):
+        """First-order and total indices equal the variance shares of an additive model"""
+        result = calculate_sobol_indices({'base_value': 1000000}, RFS_DISTRIBUTIONS,
+                                         methods=['rfs'], output='rfs', n_samples=100000, seed=3)
+
+        variances = {'risk_factors.management': 9e10 * 16 / 12,
+                     'risk_factors.technology_risk': 9e10 * 4 / 12,
+                     'risk_factors.litigation_risk': 1e10 * 16 / 12}
+        total_variance = sum(variances.values())
+
+        assert result['variance'] == pytest.approx(total_variance, rel=0.02)
+        assert [index['input'] for index in result['indices']][0] == 'risk_factors.management'
+        for index in result['indices']:
+            share = variances[index['input']] / total_variance
+            assert index['first_order'] == pytest.approx(share, abs=0.03)
+            assert index['total_effect'] == pytest.approx(share, abs=0.03)
+
+    def test_interaction_shows_in_total_effect(self):
+        """Comps value arr * multiple: S_i = 3/7 and ST_i = 4/7 for uniform [0, 2 * mean] inputs"""
+        result = calculate_sobol_indices(
+            {},
+            {'arr': {'dist': 'uniform', 'low': 0, 'high': 2000000},
+             'multiple': {'dist': 'uniform', 'low': 0, 'high': 30}},
+            methods=['comps'], output='comps', n_samples=100000, seed=11
+        )
+
+        for index in result['indices']:
+            assert index['first_order'] == pytest.approx(3 / 7, abs=0.03)
+            assert index['total_effect'] == pytest.approx(4 / 7, abs=0.03)
+
+    def test_chunking_is_reproducible(self):
+        """Same seed and chunking give the same indices, in process or through an executor"""
+        kwargs = dict(methods=['rfs'], output='rfs', n_samples=4000, chunk_size=1000, seed=5)
+        first = calculate_sobol_indices({}, RFS_DISTRIBUTIONS, **kwargs)
+        second = calculate_sobol_indices({}, RFS_DISTRIBUTIONS, executor=_SerialExecutor(), **kwargs)
+
+        assert first == second
+        assert first['n_evaluations'] == 4000 * 5
+
+    def test_task_and_validation(self):
+        """The task returns the analysis; unknown outputs are rejected"""
+        result = run_sobol_analysis.run('pitch-1', {'base_value': 1000000, 'distributions': RFS_DISTRIBUTIONS,
+                                                    'methods': ['rfs'], 'n_samples': 2000, 'seed': 1})
+        assert result['status'] == 'completed'
+        assert len(result['indices']) == 3
+
+        with pytest.raises(ValueError):
+            calculate_sobol_indices({}, RFS_DISTRIBUTIONS, methods=['rfs'], output='berkus')
+
+class _SerialExecutor:
+    def map(self, func, jobs):
+        return map(func, jobs)
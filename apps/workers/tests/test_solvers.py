@@ -0,0 +1,42 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+import numpy as np
+from apps.workers.solvers import solve_for_target
+
+class TestSolveForTarget:
+    """Unit tests for the vectorized bracketed root finder"""
+
+    def test_solves_many_cases_at_once(self):
+        """Each case converges to its own root"""
+        targets = np.linspace(1, 100, 1000)
+
+        solution = solve_for_target(lambda x: x ** 3, targets, 0, 10)
+
+        assert solution['converged'].all()
+        assert solution['solution'] == pytest.approx(np.cbrt(targets), rel=1e-8)
+
+    def test_steep_decreasing_function(self):
+        """Discounting over a wide IRR bracket still converges quickly"""
+        present_value = lambda irr: 1000000 / (1 + irr) ** 7
+
+        solution = solve_for_target(present_value, [200000, 1000], -0.99, 10)
+
+        assert solution['converged'].all()
+        assert solution['iterations'].max() < 60
+        assert present_value(solution['solution']) == pytest.approx([200000, 1000], rel=1e-8)
+
+    def test_unbracketed_cases_are_reported(self):
+        """Targets outside the range come back as NaN and not converged"""
+        solution = solve_for_target(lambda x: np.minimum(x, 5.0), [2.0, 7.0], 0, 10)
+
+        assert solution['converged'].tolist() == [True, False]
+        assert solution['bracketed'].tolist() == [True, False]
+        assert np.isnan(solution['solution'][1])
+
+    def test_upper_bound_expansion(self):
+        """Unbounded unknowns push the upper bound out when asked to"""
+        solution = solve_for_target(lambda x: 2 * x, 1e9, 0, 10, max_expansions=40)
+
+        assert solution['converged'].all()
+        assert solution['solution'][()] == pytest.approx(5e8)
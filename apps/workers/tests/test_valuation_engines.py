@@ -0,0 +1,173 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+import numpy as np
+from apps.workers.workers.valuation_engines import (
+    VALUATION_METHODS,
+    run_valuations,
+    run_comps_valuation,
+    run_vc_method_valuation,
+    build_vc_sensitivity_axes,
+    calculate_vc_sensitivity_grid,
+    vc_present_value,
+    simulate_valuations,
+    solve_valuation_input,
+    solve_valuation_target
+)
+
+class TestValuationPanel:
+    """Unit tests for the multi-method valuation runner"""
+
+    def test_runs_all_methods_with_timings(self):
+        """Every method runs once and reports a timing"""
+        panel = run_valuations('pitch-1', {'arr': 1000000, 'exit_value': 100000000})
+
+        assert list(panel['results'].keys()) == list(VALUATION_METHODS.keys())
+        assert set(panel['timings_ms'].keys()) == set(VALUATION_METHODS.keys())
+        assert panel['errors'] == {}
+        assert panel['total_ms'] >= sum(panel['timings_ms'].values()) * 0.99
+
+    def test_matches_individual_tasks(self):
+        """Per-method overrides are layered on the shared inputs"""
+        inputs = {'arr': 2000000, 'comps': {'sector': 'Fintech'}}
+
+        panel = run_valuations('pitch-1', inputs, ['comps'])
+
+        expected = run_comps_valuation.run('pitch-1', {'arr': 2000000, 'sector': 'Fintech'})
+        assert panel['results']['comps'] == expected
+        assert panel['results']['comps']['result_base'] == pytest.approx(40000000)
+
+    def test_unknown_method_rejected(self):
+        """Unknown method names fail fast"""
+        with pytest.raises(ValueError):
+            run_valuations('pitch-1', {}, ['scorecard', 'dcf'])
+
+    def test_failing_method_is_isolated(self):
+        """A failing method is reported without losing the others"""
+        panel = run_valuations('pitch-1', {'arr': 1000000, 'vc_method': {'irr': 'bad'}}, ['vc_method', 'berkus'])
+
+        assert 'vc_method' in panel['errors']
+        assert panel['results']['berkus']['result_base'] == pytest.approx(500000)
+
+class TestVCSensitivity:
+    """Unit tests for the VC method sensitivity grid"""
+
+    def test_grid_matches_formula(self):
+        """Every grid cell equals the scalar PV formula"""
+        axes = build_vc_sensitivity_axes({'exit_value': 1e8, 'irr': 0.25, 'probability': 0.1, 'years': 7}, {}, 5)
+
+        grid = calculate_vc_sensitivity_grid(0.1, **axes)
+
+        assert grid.shape == (5, 5, 5, 5)
+        assert grid[1, 2, 3, 4] == pytest.approx(vc_present_value(
+            axes['exit_value'][1], 0.1, axes['irr'][2], axes['probability'][3], axes['years'][4]))
+
+    def test_sensitivity_mode(self):
+        """The task returns axes, grid and tornado bars sorted by swing"""
+        result = run_vc_method_valuation.run('pitch-1', {
+            'exit_value': 100000000,
+            'sensitivity': {'steps': 3, 'axes': {'years': [5, 7, 9]}}
+        })
+
+        sensitivity = result['sensitivity']
+        assert sensitivity['axes']['years'] == [5, 7, 9]
+        assert sensitivity['grid'][1][1][1][1] == pytest.approx(result['result_base'])
+        swings = [bar['swing'] for bar in sensitivity['tornado']]
+        assert swings == sorted(swings, reverse=True)
+
+    def test_large_grid_is_summarized(self):
+        """A 50^4 grid is summarized rather than serialized"""
+        result = run_vc_method_valuation.run('pitch-1', {'exit_value': 100000000, 'sensitivity': {'steps': 50}})
+
+        assert result['sensitivity']['grid'] is None
+        assert result['sensitivity']['summary']['min'] < result['result_base'] < result['sensitivity']['summary']['max']
+
+class TestMonteCarloValuation:
+    """Unit tests for the Monte Carlo valuation mode"""
+
+    inputs = {'arr': 1000000, 'exit_value': 100000000, 'scores': {'team': 7}, 'working_prototype': True}
+
+    def test_constant_inputs_match_tasks(self):
+        """Without distributions every draw equals the deterministic base value"""
+        simulation = simulate_valuations(self.inputs, {}, n_draws=100, seed=1)
+
+        for method, task in VALUATION_METHODS.items():
+            expected = task.run('pitch-1', self.inputs)['result_base']
+            assert simulation['methods'][method]['p50'] == pytest.approx(expected)
+            assert simulation['methods'][method]['mean'] == pytest.approx(expected)
+
+    def test_percentiles_and_reproducibility(self):
+        """Percentiles track the input distribution and a seed reproduces a run"""
+        distributions = {
+            'arr': {'dist': 'uniform', 'low': 500000, 'high': 1500000},
+            'quality_team': {'dist': 'bernoulli', 'p': 0.5}
+        }
+
+        first = simulate_valuations(self.inputs, distributions, ['comps', 'berkus'], n_draws=200000, seed=7, batch_size=30000)
+        second = simulate_valuations(self.inputs, distributions, ['comps', 'berkus'], n_draws=200000, seed=7, batch_size=30000)
+
+        comps = first['methods']['comps']
+        assert comps['p10'] == pytest.approx(15 * 600000, rel=0.02)
+        assert comps['p90'] == pytest.approx(15 * 1400000, rel=0.02)
+        assert first['methods']['berkus']['p90'] == pytest.approx(1500000)
+        assert first == second
+
+    def test_blend_weights(self):
+        """The blended value is the weighted average of method values per draw"""
+        simulation = simulate_valuations(self.inputs, {}, ['berkus', 'rfs'], n_draws=10,
+                                         blend_weights={'berkus': 3, 'rfs': 1})
+
+        assert simulation['blended']['mean'] == pytest.approx(0.75 * 1000000 + 0.25 * 1000000)
+        assert simulation['blend_weights'] == {'berkus': 0.75, 'rfs': 0.25}
+
+    def test_negative_draws_are_clipped(self):
+        """Money inputs drawn below zero are clipped, so low percentiles come from exact zeros"""
+        distributions = {'arr': {'dist': 'normal', 'mean': 500000, 'std': 1000000}}
+
+        simulation = simulate_valuations(self.inputs, distributions, ['comps'], n_draws=50000, seed=3)
+
+        comps = simulation['methods']['comps']
+        assert comps['min'] == 0
+        assert comps['p10'] == 0
+        assert comps['p90'] == pytest.approx(15 * (500000 + 1.2816 * 1000000), rel=0.02)
+
+    def test_unknown_distribution_rejected(self):
+        """Distribution kinds outside MONTE_CARLO_DISTRIBUTIONS fail before sampling"""
+        with pytest.raises(ValueError, match='poisson'):
+            simulate_valuations(self.inputs, {'arr': {'dist': 'uniform', 'low': 0, 'high': 1},
+                                              'exit_value': {'dist': 'poisson', 'lam': 3}}, n_draws=10)
+
+class TestReverseSolvers:
+    """Unit tests for target-driven valuation solvers"""
+
+    def test_vc_exit_value_for_target(self):
+        """Exit value that makes a 10% stake worth the target at a 25% IRR"""
+        solution = solve_valuation_input('vc_method', 'exit_value', [2000000, 5000000],
+                                         {'irr': 0.25, 'target_ownership': 0.1})
+
+        assert solution['converged'].all()
+        assert vc_present_value(solution['solution'], 0.1, 0.25, 0.1, 7) == pytest.approx([2000000, 5000000])
+
+    def test_vc_irr_over_cases(self):
+        """IRR solved across arrays of cases matches each task run"""
+        exit_values = np.array([50000000, 100000000, 400000000])
+
+        solution = solve_valuation_input('vc_method', 'irr', 200000, {'exit_value': exit_values})
+
+        for exit_value, irr in zip(exit_values, solution['solution']):
+            result = VALUATION_METHODS['vc_method'].run('pitch-1', {'exit_value': float(exit_value), 'irr': float(irr)})
+            assert result['result_base'] == pytest.approx(200000, rel=1e-8)
+
+    def test_scorecard_score_bounds(self):
+        """Scores are solved within 0-10 and unreachable targets are flagged"""
+        result = solve_valuation_target.run('pitch-1', {
+            'method': 'scorecard',
+            'unknown': 'scores.team',
+            'target': [5000000, 100000000],
+            'inputs': {'arr': 1000000}
+        })
+
+        assert result['converged'] == [True, False]
+        assert 0 <= result['solution'][0] <= 10
+        assert result['solution'][1] is None
+        assert result['all_converged'] is False
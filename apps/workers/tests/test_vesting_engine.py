@@ -0,0 +1,97 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+import pytest
+from apps.workers.cap_table_engine import create_default_cap_table
+from apps.workers.vesting_engine import calculate_vesting, month_end_dates, vesting_cap_table
+
+class TestVestingEngine:
+    """Unit tests for the vesting schedule engine"""
+
+    def test_cliff_then_monthly_vesting(self):
+        """Nothing vests before the cliff, then 1/48 per month"""
+        grants = [{'holder': 'Employee', 'shares': 4800, 'grant_date': '2020-01-15'}]
+
+        schedule = calculate_vesting(grants, ['2020-12-31', '2021-01-14', '2021-01-15', '2022-06-15', '2030-01-01'])
+
+        assert schedule['vested'][0].tolist() == [0, 0, 1200, 2900, 4800]
+
+    def test_month_end_dates(self):
+        """Month-end grid starts at the end of the start month"""
+        dates = month_end_dates('2024-01-15', 3)
+
+        assert [str(date) for date in dates] == ['2024-01-31', '2024-02-29', '2024-03-31']
+
+    def test_termination_forfeits_and_expires(self):
+        """Unvested shares are forfeited and unexercised vested options expire"""
+        grants = [{'holder': 'Employee', 'shares': 4800, 'grant_date': '2020-01-15',
+                   'termination_date': '2022-01-20', 'exercised': 1000}]
+
+        schedule = calculate_vesting(grants, ['2022-02-01', '2022-06-01'])
+
+        assert schedule['forfeited'][0].tolist() == [2400, 2400]
+        assert schedule['expired'][0].tolist() == [0, 1400]
+        assert schedule['outstanding_options'][0].tolist() == [1400, 0]
+        assert schedule['totals']['returned_to_pool'].tolist() == [2400, 3800]
+
+    def test_acceleration_triggers(self):
+        """Single trigger vests at the change of control, double trigger on termination after it"""
+        grants = [
+            {'holder': 'Single', 'shares': 4800, 'grant_date': '2020-01-15', 'acceleration': 'single'},
+            {'holder': 'Double', 'shares': 4800, 'grant_date': '2020-01-15', 'acceleration': 'double',
+             'termination_date': '2022-01-20'},
+            {'holder': 'Half', 'shares': 4800, 'grant_date': '2020-01-15', 'acceleration': 'single',
+             'acceleration_fraction': 0.5}
+        ]
+        dates = ['2021-05-31', '2021-06-01', '2022-01-19', '2022-01-20']
+
+        with_change = calculate_vesting(grants, dates, '2021-06-01')['vested']
+        without_change = calculate_vesting(grants, dates)['vested']
+
+        assert with_change[0].tolist() == [1600, 4800, 4800, 4800]
+        assert with_change[1].tolist() == [1600, 1600, 2400, 4800]
+        assert with_change[2].tolist() == pytest.approx([1600, 3200, 3200, 3200])
+        assert without_change[1].tolist() == [1600, 1600, 2400, 2400]
+
+    def test_fully_diluted_cap_table(self):
+        """Exercised options become common and the rest stays in the pool"""
+        base_table = create_default_cap_table()
+        pool_size = 60000000
+        grants = [
+            {'holder': f'Employee {i}', 'shares': 10000, 'grant_date': '2020-01-01',
+             'exercised': 2000 if i % 2 == 0 else 0, 'exercise_price': 0.1}
+            for i in range(5000)
+        ]
+
+        table = vesting_cap_table(base_table, grants, '2024-06-30', pool_size=pool_size)
+
+        pool = next(entry for entry in table if entry['holder'] == 'Option Pool')
+        exercised = [entry for entry in table if entry['holder'].startswith('Employee')]
+        other_shares = sum(entry['shares'] for entry in base_table if entry['type'] != 'Options')
+        assert len(exercised) == 2500
+        assert exercised[0]['type'] == 'Common'
+        assert exercised[0]['price_per_share'] == pytest.approx(0.1)
+        assert pool['shares'] == pytest.approx(pool_size - 2500 * 2000)
+        assert sum(entry['shares'] for entry in table) == pytest.approx(other_shares + pool_size)
+        assert sum(entry['ownership'] for entry in table) == pytest.approx(1.0)
+
+    def test_grants_must_fit_the_pool(self):
+        """Grants larger than the option pool are rejected"""
+        grants = [{'holder': 'Employee', 'shares': 3000000, 'grant_date': '2020-01-01'}]
+
+        with pytest.raises(ValueError):
+            vesting_cap_table(create_default_cap_table(), grants, '2024-06-30')
+
+    def test_exercises_capped_at_vested(self):
+        """Exercises never exceed vested shares and count nothing before vesting"""
+        grants = [
+            {'holder': 'Dated', 'shares': 4800, 'grant_date': '2020-01-15', 'exercised': 4800, 'exercise_date': '2021-07-15'},
+            {'holder': 'Before grant', 'shares': 4800, 'grant_date': '2020-01-15', 'exercised': 1000, 'exercise_date': '2019-06-01'},
+            {'holder': 'Undated', 'shares': 4800, 'grant_date': '2020-01-15', 'exercised': 2000}
+        ]
+
+        schedule = calculate_vesting(grants, ['2019-12-31', '2021-01-15', '2022-01-15'])
+
+        assert schedule['exercised'][0].tolist() == [0, 0, 1800]
+        assert schedule['exercised'][1].tolist() == [0, 0, 0]
+        assert schedule['exercised'][2].tolist() == [0, 1200, 2000]
+        assert (schedule['outstanding_options'] >= 0).all()
@@ -0,0 +1,246 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from celery_app import celery_app
+from typing import Dict, Any, List, Optional
+import logging
+from datetime import datetime
+import numpy as np
+
+from cap_table_engine import create_default_cap_table
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for grants with no termination, exercise or acceleration date
+NO_DATE = np.datetime64('9999-12-31', 'D')
+
+@celery_app.task(bind=True)
+def calculate_vesting_schedule(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calculate vested and fully diluted share counts for option grants over time
+    """
+    try:
+        logger.info(f"Starting vesting schedule calculation for pitch_id: {pitch_id}")
+
+        grants = inputs.get('grants', [])
+        base_table = inputs.get('current_cap_table', []) or create_default_cap_table()
+        change_of_control_date = inputs.get('change_of_control_date')
+
+        dates = inputs.get('dates')
+        if not dates:
+            dates = month_end_dates(inputs.get('start_date', datetime.now().date().isoformat()), inputs.get('months', 60))
+
+        schedule = calculate_vesting(grants, dates, change_of_control_date)
+        as_of = inputs.get('as_of', str(schedule['dates'][-1]))
+
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "dates": [str(date) for date in schedule['dates']],
+            "totals": {key: value.tolist() for key, value in schedule['totals'].items()},
+            "cap_table": vesting_cap_table(base_table, grants, as_of, inputs.get('pool_size'), change_of_control_date),
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Vesting schedule calculation completed for pitch_id: {pitch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Vesting schedule calculation failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+def month_end_dates(start_date: str, months: int) -> np.ndarray:
+    """Return the month-end dates for the months following start_date"""
+    first_month = np.datetime64(start_date, 'M')
+    return (first_month + np.arange(1, months + 1)).astype('datetime64[D]') - 1
+
+def _to_dates(values: List[Optional[str]]) -> np.ndarray:
+    return np.array([NO_DATE if value is None else np.datetime64(value, 'D') for value in values], dtype='datetime64[D]')
+
+def months_between(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    Whole months from start to end, broadcasting; a month only counts once
+    its day-of-month anniversary is reached (month-ends count as reached)
+    """
+    start_month = start.astype('datetime64[M]')
+    end_month = end.astype('datetime64[M]')
+    start_day = (start - start_month.astype('datetime64[D]')).astype(int)
+    end_day = (end - end_month.astype('datetime64[D]')).astype(int)
+    end_is_month_end = (end + 1).astype('datetime64[M]') != end_month
+    months = (end_month - start_month).astype(int)
+    return months - ((end_day < start_day) & ~end_is_month_end)
+
+def compile_grants(grants: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert grant dicts into column arrays.
+
+    Each grant has 'holder', 'shares', 'grant_date' and optional
+    'vesting_start', 'vesting_months' (48), 'cliff_months' (12),
+    'exercised', 'exercise_date', 'exercise_price', 'termination_date',
+    'exercise_window_days' (90), 'acceleration' ('single' or 'double') and
+    'acceleration_fraction' (1.0). Grants without an exercise_date get NaT.
+    """
+    return {
+        'holders': [grant['holder'] for grant in grants],
+        'shares': np.array([grant['shares'] for grant in grants], dtype=float),
+        'vesting_start': _to_dates([grant.get('vesting_start', grant.get('grant_date')) for grant in grants]),
+        'vesting_months': np.array([grant.get('vesting_months', 48) for grant in grants], dtype=float),
+        'cliff_months': np.array([grant.get('cliff_months', 12) for grant in grants], dtype=float),
+        'exercised': np.array([grant.get('exercised', 0) for grant in grants], dtype=float),
+        'exercise_date': np.array([grant.get('exercise_date') or 'NaT' for grant in grants], dtype='datetime64[D]'),
+        'exercise_price': np.array([grant.get('exercise_price', 0) for grant in grants], dtype=float),
+        'termination_date': _to_dates([grant.get('termination_date') for grant in grants]),
+        'exercise_window_days': np.array([grant.get('exercise_window_days', 90) for grant in grants], dtype=int),
+        'single_trigger': np.array([grant.get('acceleration') == 'single' for grant in grants], dtype=bool),
+        'double_trigger': np.array([grant.get('acceleration') == 'double' for grant in grants], dtype=bool),
+        'acceleration_fraction': np.array([grant.get('acceleration_fraction', 1.0) for grant in grants], dtype=float)
+    }
+
+def _vested_fraction(compiled: Dict[str, np.ndarray], dates: np.ndarray) -> np.ndarray:
+    months = months_between(compiled['vesting_start'][:, None], dates)
+    total = compiled['vesting_months'][:, None]
+    fraction = np.clip(months, 0, total) / total
+    return np.where(months < compiled['cliff_months'][:, None], 0.0, fraction)
+
+def _vested_shares(compiled: Dict[str, np.ndarray],
+                   dates: np.ndarray,
+                   change_of_control_date: Optional[str] = None) -> np.ndarray:
+    # Vested shares per grant at dates, which broadcast against (grants x 1):
+    # a (1 x dates) grid or a (grants x 1) column of per-grant dates
+    termination = compiled['termination_date'][:, None]
+    fraction_of = compiled['acceleration_fraction'][:, None]
+
+    # Vesting stops at termination
+    vested_fraction = _vested_fraction(compiled, np.minimum(dates, termination))
+
+    if change_of_control_date is not None:
+        change_of_control = np.datetime64(change_of_control_date, 'D')
+
+        # Single trigger: accelerate at the change of control if still employed
+        single = compiled['single_trigger'][:, None] & (termination > change_of_control)
+        at_change = _vested_fraction(compiled, np.array([change_of_control]))
+        single_floor = at_change + fraction_of * (1 - at_change)
+        vested_fraction = np.where(single & (dates >= change_of_control),
+                                   np.maximum(vested_fraction, single_floor), vested_fraction)
+
+        # Double trigger: accelerate on termination within 12 months of it
+        window_end = change_of_control + np.timedelta64(365, 'D')
+        double = compiled['double_trigger'][:, None] & (termination >= change_of_control) & (termination <= window_end)
+        at_termination = _vested_fraction(compiled, termination)
+        double_floor = at_termination + fraction_of * (1 - at_termination)
+        vested_fraction = np.where(double & (dates >= termination),
+                                   np.maximum(vested_fraction, double_floor), vested_fraction)
+
+    return compiled['shares'][:, None] * vested_fraction
+
+def calculate_vesting(grants: List[Dict[str, Any]],
+                      dates: Any,
+                      change_of_control_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Vested, exercised, forfeited and outstanding option counts per grant and date.
+
+    Vesting is monthly after the cliff and stops at termination, when the
+    unvested part is forfeited; vested options not exercised within the
+    exercise window then expire. Single-trigger grants accelerate at the
+    change of control; double-trigger grants accelerate when terminated
+    within 12 months after it. Exercises are capped at the shares vested
+    on the exercise date, so exercises dated before vesting count as zero;
+    undated exercises are capped at the shares vested at each date.
+    Per-grant arrays are (grants x dates).
+    """
+    compiled = compile_grants(grants)
+    dates = np.atleast_1d(np.asarray(dates, dtype='datetime64[D]'))
+    shares = compiled['shares'][:, None]
+    termination = compiled['termination_date'][:, None]
+
+    vested = _vested_shares(compiled, dates[None, :], change_of_control_date)
+    terminated = dates[None, :] >= termination
+    forfeited = np.where(terminated, shares - vested, 0.0)
+
+    exercise_date = compiled['exercise_date'][:, None]
+    dated = ~np.isnat(exercise_date)
+    vested_at_exercise = _vested_shares(compiled, np.where(dated, exercise_date, compiled['vesting_start'][:, None]),
+                                        change_of_control_date)
+    requested = compiled['exercised'][:, None]
+    exercised = np.where(dated,
+                         np.where(dates[None, :] >= exercise_date, np.minimum(requested, vested_at_exercise), 0.0),
+                         np.minimum(requested, vested))
+    expiry = termination + compiled['exercise_window_days'][:, None].astype('timedelta64[D]')
+    expired = np.where(dates[None, :] >= expiry, np.maximum(vested - exercised, 0.0), 0.0)
+    outstanding = shares - exercised - forfeited - expired
+
+    totals = {
+        'granted': np.full(dates.size, shares.sum()),
+        'vested': vested.sum(axis=0),
+        'vested_unexercised': np.maximum(vested - exercised - expired, 0.0).sum(axis=0),
+        'unvested': np.maximum(shares - vested - forfeited, 0.0).sum(axis=0),
+        'exercised': exercised.sum(axis=0),
+        'returned_to_pool': (forfeited + expired).sum(axis=0),
+        'outstanding_options': outstanding.sum(axis=0)
+    }
+
+    return {
+        'holders': compiled['holders'],
+        'dates': dates,
+        'vested': vested,
+        'exercised': exercised,
+        'forfeited': forfeited,
+        'expired': expired,
+        'outstanding_options': outstanding,
+        'totals': totals
+    }
+
+def vesting_cap_table(base_table: List[Dict[str, Any]],
+                      grants: List[Dict[str, Any]],
+                      as_of: str,
+                      pool_size: Optional[float] = None,
+                      change_of_control_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Fully diluted cap table at a date, in the calculate_cap_table_changes input format.
+
+    Exercised options become Common rows per holder. Everything else in the
+    pool (outstanding grants, forfeited and expired options and unallocated
+    shares) stays in a single 'Option Pool' row, since
+    calculate_cap_table_changes tops up every Options row. pool_size
+    defaults to the Options shares in base_table and must cover the grants.
+    """
+    if pool_size is None:
+        pool_size = sum(entry['shares'] for entry in base_table if entry['type'] == 'Options')
+
+    granted = sum(grant['shares'] for grant in grants)
+    if granted > pool_size:
+        raise ValueError(f"Grants of {granted} shares exceed the option pool of {pool_size} shares")
+
+    schedule = calculate_vesting(grants, [as_of], change_of_control_date)
+    exercise_price = compile_grants(grants)['exercise_price']
+
+    exercised_by_holder: Dict[str, List[float]] = {}
+    for holder, shares, price in zip(schedule['holders'], schedule['exercised'][:, 0].tolist(), exercise_price.tolist()):
+        if shares > 0:
+            totals = exercised_by_holder.setdefault(holder, [0.0, 0.0])
+            totals[0] += shares
+            totals[1] += shares * price
+
+    rows = [dict(entry) for entry in base_table if entry['type'] != 'Options']
+    for holder, (shares, cost) in exercised_by_holder.items():
+        rows.append({
+            'holder': holder,
+            'shares': shares,
+            'type': 'Common',
+            'price_per_share': cost / shares,
+            'total_value': cost
+        })
+
+    pool_remaining = pool_size - schedule['totals']['exercised'][0]
+    rows.append({
+        'holder': 'Option Pool',
+        'shares': pool_remaining,
+        'type': 'Options',
+        'price_per_share': 0,
+        'total_value': 0
+    })
+
+    total_shares = sum(row['shares'] for row in rows)
+    for row in rows:
+        row['ownership'] = row['shares'] / total_shares if total_shares > 0 else 0
+
+    return rows
@@ -0,0 +1,244 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from celery_app import celery_app
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
+import logging
+from datetime import datetime
+import numpy as np
+
+from database import get_database_engine
+from .batch_valuation import BATCH_METHODS, calculate_batch_valuations
+
+logger = logging.getLogger(__name__)
+
+# For every pitch, its first priced round that has a stored valuation before
+# it, compared on a pre-money basis with the latest inputs per method and
+# the latest decision made before that round
+BACKTEST_QUERY = """
+WITH outcomes AS (
+    SELECT DISTINCT ON (o.pitch_id)
+           o.pitch_id, o.round_date, o.pre_money_usd AS realized_usd
+    FROM realized_outcomes o
+    WHERE o.pre_money_usd > 0
+      AND EXISTS (
+          SELECT 1 FROM valuations v
+          WHERE v.pitch_id = o.pitch_id AND v.inputs IS NOT NULL AND v.created_at < o.round_date
+      )
+    ORDER BY o.pitch_id, o.round_date
+)
+SELECT p.id AS pitch_id, p.sector, p.stage, p.geo, o.realized_usd,
+       v.inputs, d.pre_money_usd AS decision_pre_money_usd
+FROM outcomes o
+JOIN pitches p ON p.id = o.pitch_id
+JOIN LATERAL (
+    SELECT jsonb_object_agg(latest.method, latest.inputs) AS inputs
+    FROM (
+        SELECT DISTINCT ON (method) method, inputs
+        FROM valuations
+        WHERE pitch_id = p.id AND inputs IS NOT NULL AND created_at < o.round_date
+        ORDER BY method, created_at DESC
+    ) latest
+) v ON v.inputs IS NOT NULL
+LEFT JOIN LATERAL (
+    SELECT pre_money_usd FROM decisions
+    WHERE pitch_id = p.id AND created_at < o.round_date
+    ORDER BY created_at DESC
+    LIMIT 1
+) d ON true
+ORDER BY p.id
+"""
+
+# Pre-money from the stored decision, reported next to the replayed methods
+DECISION_BASELINE = 'decision'
+
+# Per-group running sums; every error statistic is derived from these
+BACKTEST_STATS = ('n', 'abs_pct_error', 'log_error', 'sq_log_error', 'band_n', 'in_band')
+
+UNKNOWN_SEGMENT = 'unknown'
+
+@celery_app.task(bind=True)
+def run_valuation_backtest(self, backtest_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replay stored valuation inputs through every method and score them
+    against realized round valuations
+    """
+    try:
+        logger.info(f"Starting valuation backtest for backtest_id: {backtest_id}")
+
+        chunks = stream_backtest_rows(chunk_size=inputs.get('chunk_size', 2000))
+        report = backtest_valuations(chunks, methods=inputs.get('methods'))
+
+        result = {
+            "backtest_id": backtest_id,
+            "status": "completed",
+            **report,
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Valuation backtest completed for backtest_id: {backtest_id}, pitches: {report['pitches']}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Valuation backtest failed for backtest_id: {backtest_id}, error: {str(e)}")
+        raise
+
+def stream_backtest_rows(chunk_size: int = 2000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield backtest rows in chunks of chunk_size from a server-side cursor,
+    so memory stays flat however many pitches there are
+    """
+    from sqlalchemy import text
+
+    with get_database_engine().connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(text(BACKTEST_QUERY))
+        for partition in result.mappings().partitions(chunk_size):
+            yield [dict(row) for row in partition]
+
+def flatten_inputs(inputs: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    """Numeric and boolean leaves of nested inputs, keyed by dotted name"""
+    flat = {}
+    for name, value in inputs.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict):
+            flat.update(flatten_inputs(value, f"{key}."))
+        elif isinstance(value, (bool, int, float)):
+            flat[key] = float(value)
+    return flat
+
+def backtest_columns(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Batch valuation columns for a chunk of backtest rows.
+
+    Each pitch's stored inputs for all methods are merged, so every method
+    is replayed on everything known about the pitch; missing cells are NaN
+    and get the per-pitch task defaults. Segments come from the pitch.
+    """
+    flat_rows = []
+    for row in rows:
+        merged: Dict[str, float] = {}
+        for method_inputs in (row.get('inputs') or {}).values():
+            if isinstance(method_inputs, dict):
+                merged.update(flatten_inputs({name: value for name, value in method_inputs.items() if name != 'weights'}))
+        flat_rows.append(merged)
+
+    names = sorted({name for flat in flat_rows for name in flat})
+    columns = {name: np.array([flat.get(name, np.nan) for flat in flat_rows]) for name in names}
+    for segment in ('sector', 'stage', 'geo'):
+        values = [row.get(segment) for row in rows]
+        if any(values):
+            columns[segment] = np.array(values, dtype=object)
+    return columns
+
+class BacktestAccumulator:
+    """
+    Streaming error statistics per (method, sector, stage).
+
+    Only running sums are kept, so chunks can be added one at a time and
+    coarser groupings are rolled up from the fine ones at report time.
+    Errors are on the log ratio of predicted to realized valuation; the
+    band hit rate counts realized values inside the method's low/high range.
+    """
+
+    def __init__(self):
+        self.sums: Dict[Tuple[str, str, str], np.ndarray] = {}
+        self.pitches = 0
+
+    def add(self, method: str, sectors: np.ndarray, stages: np.ndarray,
+            realized: np.ndarray, predicted: np.ndarray,
+            low: Optional[np.ndarray] = None, high: Optional[np.ndarray] = None) -> None:
+        valid = (realized > 0) & (predicted > 0) & np.isfinite(predicted)
+        if not valid.any():
+            return
+
+        log_error = np.log(predicted[valid] / realized[valid])
+        in_band = np.zeros(valid.sum())
+        band_n = np.zeros(valid.sum())
+        if low is not None and high is not None:
+            band_n[:] = 1.0
+            in_band = ((realized[valid] >= low[valid]) & (realized[valid] <= high[valid])).astype(float)
+
+        stats = np.column_stack((
+            np.ones(valid.sum()),
+            np.abs(predicted[valid] / realized[valid] - 1),
+            log_error,
+            log_error ** 2,
+            band_n,
+            in_band
+        ))
+
+        groups = np.char.add(np.char.add(sectors[valid].astype(str), '\x1f'), stages[valid].astype(str))
+        keys, codes = np.unique(groups, return_inverse=True)
+        group_sums = np.zeros((len(keys), len(BACKTEST_STATS)))
+        np.add.at(group_sums, codes, stats)
+
+        for key, sums in zip(keys, group_sums):
+            sector, stage = str(key).split('\x1f', 1)
+            group = (method, sector, stage)
+            self.sums[group] = self.sums.get(group, 0) + sums
+
+    def rollup(self, fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Error statistics grouped by a subset of ('method', 'sector', 'stage')"""
+        positions = [('method', 'sector', 'stage').index(field) for field in fields]
+        rolled: Dict[Tuple[str, ...], np.ndarray] = {}
+        for group, sums in self.sums.items():
+            key = tuple(group[position] for position in positions)
+            rolled[key] = rolled.get(key, 0) + sums
+
+        return [
+            {**dict(zip(fields, key)), **error_statistics(sums)}
+            for key, sums in sorted(rolled.items())
+        ]
+
+def error_statistics(sums: np.ndarray) -> Dict[str, Any]:
+    """Error statistics from running sums in BACKTEST_STATS order"""
+    n, abs_pct_error, log_error, sq_log_error, band_n, in_band = sums
+    mean_log_error = log_error / n
+    return {
+        'n': int(n),
+        'mape': float(abs_pct_error / n),
+        'mean_log_error': float(mean_log_error),
+        'median_ratio': float(np.exp(mean_log_error)),
+        'rmse_log_error': float(np.sqrt(sq_log_error / n)),
+        'band_hit_rate': float(in_band / band_n) if band_n else None
+    }
+
+def backtest_valuations(chunks: Iterable[List[Dict[str, Any]]],
+                        methods: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Backtest valuation methods over chunks of rows from stream_backtest_rows.
+
+    Each chunk is valued for all methods at once with the batch valuation
+    formulas and folded into a BacktestAccumulator, so only one chunk is in
+    memory. The stored decision pre-money is scored as DECISION_BASELINE.
+    Methods are ranked by RMSE of the log error.
+    """
+    methods = list(methods or BATCH_METHODS)
+    accumulator = BacktestAccumulator()
+
+    for rows in chunks:
+        if not rows:
+            continue
+        columns = backtest_columns(rows)
+        valuations = calculate_batch_valuations(columns, methods)
+        realized = np.array([float(row.get('realized_usd') or 0) for row in rows])
+        sectors = np.array([row.get('sector') or UNKNOWN_SEGMENT for row in rows], dtype=object)
+        stages = np.array([row.get('stage') or UNKNOWN_SEGMENT for row in rows], dtype=object)
+
+        for method in methods:
+            accumulator.add(method, sectors, stages, realized, valuations[f"{method}_base"],
+                            valuations[f"{method}_low"], valuations[f"{method}_high"])
+
+        decision = np.array([float(row.get('decision_pre_money_usd') or np.nan) for row in rows])
+        accumulator.add(DECISION_BASELINE, sectors, stages, realized, decision)
+        accumulator.pitches += len(rows)
+
+    by_method = accumulator.rollup(('method',))
+    return {
+        'pitches': accumulator.pitches,
+        'methods': methods,
+        'ranking': [entry['method'] for entry in sorted(by_method, key=lambda entry: entry['rmse_log_error'])],
+        'by_method': by_method,
+        'by_method_sector': accumulator.rollup(('method', 'sector')),
+        'by_method_stage': accumulator.rollup(('method', 'stage')),
+        'by_method_sector_stage': accumulator.rollup(('method', 'sector', 'stage'))
+    }
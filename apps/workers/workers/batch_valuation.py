@@ -0,0 +1,227 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from celery_app import celery_app
+from typing import Dict, Any, List, Optional
+import logging
+from datetime import datetime
+import numpy as np
+
+from .valuation_engines import (
+    BERKUS_CRITERIA,
+    VALUATION_VALUE_FUNCTIONS,
+    apply_draws,
+    get_comps_data
+)
+
+logger = logging.getLogger(__name__)
+
+# Methods the batch entry point can compute
+BATCH_METHODS = ('scorecard', 'vc_method', 'comps', 'berkus', 'rfs')
+
+# Low/high band factors applied to the base value, as in the per-pitch tasks
+BATCH_BANDS = {
+    'scorecard': (0.7, 1.3),
+    'berkus': (0.7, 1.5),
+    'rfs': (0.8, 1.3)
+}
+
+# Comps multiples used when a segment has no comps, as in run_comps_valuation
+DEFAULT_COMPS_MULTIPLES = {'p10': 5, 'p50': 15, 'p90': 30}
+
+# Per-pitch task defaults used to fill missing (NaN) numeric cells
+COLUMN_DEFAULTS = {
+    'arr': 0,
+    'exit_value': 0,
+    'target_ownership': 0.1,
+    'irr': 0.25,
+    'probability': 0.1,
+    'years': 7,
+    'base_value': 1000000,
+    'scores.*': 5,
+    'risk_factors.*': 0,
+    **{criterion: 0 for criterion in BERKUS_CRITERIA}
+}
+
+# Text columns used for the comps segment lookup and their defaults
+SEGMENT_COLUMNS = {'sector': 'SaaS', 'stage': 'seed', 'geo': 'US', 'metric': 'EV/ARR'}
+
+# Row identifier copied from the input to the output so results join back
+DEFAULT_ID_COLUMN = 'pitch_id'
+
+@celery_app.task(bind=True)
+def run_batch_valuation(self, batch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Value a whole batch of pitches from columnar inputs in one task
+    """
+    try:
+        logger.info(f"Starting batch valuation for batch_id: {batch_id}")
+
+        columns = inputs.get('columns') or read_columns(inputs['input_path'])
+        methods = inputs.get('methods') or list(BATCH_METHODS)
+        results = calculate_batch_valuations(columns, methods, inputs.get('weights'),
+                                             inputs.get('id_column', DEFAULT_ID_COLUMN))
+
+        output_path = inputs.get('output_path')
+        if output_path:
+            write_columns(output_path, results)
+
+        result = {
+            "batch_id": batch_id,
+            "status": "completed",
+            "rows": int(next(iter(results.values())).size) if results else 0,
+            "methods": methods,
+            "output_path": output_path,
+            "columns": None if output_path else {name: values.tolist() for name, values in results.items()},
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Batch valuation completed for batch_id: {batch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Batch valuation failed for batch_id: {batch_id}, error: {str(e)}")
+        raise
+
+def read_columns(path: str) -> Dict[str, np.ndarray]:
+    """Read columnar inputs from a Parquet, CSV or .npz file"""
+    if path.endswith('.npz'):
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    import pandas as pd
+    frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    return {name: frame[name].to_numpy() for name in frame.columns}
+
+def write_columns(path: str, columns: Dict[str, np.ndarray]) -> None:
+    """Write columnar output as Parquet, CSV or .npz, by file extension"""
+    if path.endswith('.npz'):
+        np.savez(path, **columns)
+        return
+
+    import pandas as pd
+    frame = pd.DataFrame(columns)
+    if path.endswith('.parquet'):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+def _as_float(values: np.ndarray) -> Optional[np.ndarray]:
+    # Object columns (e.g. JSON lists with None) convert when every cell is numeric
+    if values.dtype.kind in 'iuf':
+        return values.astype(float)
+    if values.dtype.kind == 'O':
+        try:
+            return values.astype(float)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+def _numeric_column(name: str, values: np.ndarray) -> np.ndarray:
+    default = COLUMN_DEFAULTS.get(name, COLUMN_DEFAULTS.get(name.split('.', 1)[0] + '.*'))
+    if default is None:
+        return values
+    return np.where(np.isnan(values), default, values)
+
+def resolve_batch_inputs(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn flat columns into the nested inputs the vectorized formulas take.
+
+    Columns use the per-pitch input names, with dotted names for nested
+    inputs ('scores.team', 'risk_factors.management'). Missing numeric
+    cells (NaN) get the per-pitch task defaults; Berkus criteria are
+    truthy values. Non-numeric columns (ids, names) are ignored.
+    """
+    numeric = {}
+    for name, values in columns.items():
+        if name in SEGMENT_COLUMNS:
+            continue
+        values = np.asarray(values)
+        if values.dtype == bool:
+            numeric[name] = values
+            continue
+        floats = _as_float(values)
+        if floats is None:
+            logger.debug(f"Skipping non-numeric batch column: {name}")
+            continue
+        numeric[name] = _numeric_column(name, floats)
+    return apply_draws({}, numeric)
+
+def _segment_value(value: Any, default: str) -> str:
+    # Missing text cells (None, NaN or blank, as pandas reads them) get the default
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return default
+    return str(value).strip() or default
+
+def _segment_column(values: Any, default: str) -> np.ndarray:
+    return np.array([_segment_value(value, default) for value in values], dtype=object)
+
+def batch_comps_multiples(columns: Dict[str, Any], n_rows: int) -> Dict[str, np.ndarray]:
+    """Per-row comps P10/P50/P90, looking each distinct segment up once"""
+    segments = [
+        _segment_column(columns[name], default) if name in columns else np.full(n_rows, default, dtype=object)
+        for name, default in SEGMENT_COLUMNS.items()
+    ]
+
+    lookup: Dict[Any, int] = {}
+    codes = np.empty(n_rows, dtype=np.int64)
+    for row, key in enumerate(zip(*segments)):
+        if key not in lookup:
+            lookup[key] = len(lookup)
+        codes[row] = lookup[key]
+
+    multiples = {quantile: np.empty(len(lookup)) for quantile in ('p10', 'p50', 'p90')}
+    for key, code in lookup.items():
+        comps_data = get_comps_data(*key) or DEFAULT_COMPS_MULTIPLES
+        for quantile in multiples:
+            multiples[quantile][code] = comps_data[quantile]
+
+    return {quantile: values[codes] for quantile, values in multiples.items()}
+
+def calculate_batch_valuations(columns: Dict[str, Any],
+                               methods: Optional[List[str]] = None,
+                               weights: Optional[Dict[str, float]] = None,
+                               id_column: Optional[str] = DEFAULT_ID_COLUMN) -> Dict[str, np.ndarray]:
+    """
+    Low/base/high valuations for every row and method, as
+    '<method>_low', '<method>_base' and '<method>_high' columns.
+
+    Results match the per-pitch tasks row for row, including their fixed
+    low/high bands; scorecard weights apply to the whole batch. The
+    id_column, when present in the input, leads the output unchanged.
+    """
+    methods = list(methods or BATCH_METHODS)
+    unknown = [method for method in methods if method not in BATCH_METHODS]
+    if unknown:
+        raise ValueError(f"Unsupported batch valuation methods: {', '.join(unknown)}")
+
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    inputs = resolve_batch_inputs(columns)
+    if weights:
+        inputs['weights'] = weights
+
+    results: Dict[str, np.ndarray] = {}
+    if id_column and id_column in columns:
+        ids = np.asarray(columns[id_column])
+        # Object ids are stored as text so .npz output stays pickle-free
+        results[id_column] = ids.astype(str) if ids.dtype.kind == 'O' else ids.copy()
+
+    for method in methods:
+        if method == 'vc_method':
+            probability = inputs.get('probability', COLUMN_DEFAULTS['probability'])
+            irr = inputs.get('irr', COLUMN_DEFAULTS['irr'])
+            low = VALUATION_VALUE_FUNCTIONS[method]({**inputs, 'probability': probability * 0.5, 'irr': irr * 1.2})
+            base = VALUATION_VALUE_FUNCTIONS[method](inputs)
+            high = VALUATION_VALUE_FUNCTIONS[method]({**inputs, 'probability': probability * 1.5, 'irr': irr * 0.8})
+        elif method == 'comps':
+            multiples = batch_comps_multiples(columns, n_rows)
+            arr = inputs.get('arr', 0)
+            low, base, high = arr * multiples['p10'], arr * multiples['p50'], arr * multiples['p90']
+        else:
+            low_factor, high_factor = BATCH_BANDS[method]
+            base = VALUATION_VALUE_FUNCTIONS[method](inputs)
+            low, high = base * low_factor, base * high_factor
+
+        for suffix, values in (('low', low), ('base', base), ('high', high)):
+            results[f"{method}_{suffix}"] = np.broadcast_to(np.asarray(values, dtype=float), (n_rows,)).copy()
+
+    return results
@@ -0,0 +1,195 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import logging
+import os
+import threading
+import time
+
+from database import get_database_engine
+
+logger = logging.getLogger(__name__)
+
+# Pitch stages in funding order, used for adjacent-stage fallback
+STAGE_ORDER = ('idea', 'preseed', 'seed', 'A', 'B', 'C')
+
+# Geo used for comps that are not region specific
+GLOBAL_GEO = 'Global'
+
+# Seed rows from scripts/init-db.sql, served until the table has been loaded
+DEFAULT_COMPS = [
+    {'sector': 'SaaS', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 5, 'p50': 15, 'p90': 30, 'sample': 50, 'notes': 'SaaS seed stage comps'},
+    {'sector': 'Fintech', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 8, 'p50': 20, 'p90': 40, 'sample': 30, 'notes': 'Fintech seed stage comps'},
+    {'sector': 'Healthtech', 'stage': 'seed', 'geo': 'US', 'multiple_name': 'EV/ARR',
+     'p10': 6, 'p50': 18, 'p90': 35, 'sample': 25, 'notes': 'Healthtech seed stage comps'}
+]
+
+COMPS_QUERY = """
+SELECT sector, stage, geo, multiple_name, p10, p50, p90, sample, notes
+FROM comps
+WHERE p10 IS NOT NULL AND p50 IS NOT NULL AND p90 IS NOT NULL
+"""
+# Digest of every row's multiples, so inserts, deletes and updates all move the token
+COMPS_CHANGE_TOKEN_QUERY = """
+SELECT count(*), md5(string_agg(concat_ws('|', id, sector, stage, geo, multiple_name, p10, p50, p90, sample, notes),
+                                ',' ORDER BY id))
+FROM comps
+"""
+
+CompsKey = Tuple[str, str, str, str]
+
+def comps_key(sector: str, stage: str, geo: str, multiple_name: str) -> CompsKey:
+    """Normalized index key; lookups are case and whitespace insensitive"""
+    return tuple((value or '').strip().lower() for value in (sector, stage, geo, multiple_name))
+
+def comps_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Comps rows with float multiples; rows missing a multiple are logged and skipped"""
+    result = []
+    for row in rows:
+        if any(row.get(quantile) is None for quantile in ('p10', 'p50', 'p90')):
+            logger.warning(f"Skipping comps row without multiples: {row.get('sector')}/{row.get('stage')}/"
+                           f"{row.get('geo')}/{row.get('multiple_name')}")
+            continue
+        result.append({**row, 'p10': float(row['p10']), 'p50': float(row['p50']), 'p90': float(row['p90'])})
+    return result
+
+def load_comps_from_database() -> List[Dict[str, Any]]:
+    """Read every comps row that has all three multiples"""
+    from sqlalchemy import text
+
+    with get_database_engine().connect() as connection:
+        rows = connection.execute(text(COMPS_QUERY)).mappings().all()
+
+    return comps_rows([dict(row) for row in rows])
+
+def load_comps_change_token() -> Any:
+    """Token that changes whenever comps rows are added, removed or updated"""
+    from sqlalchemy import text
+
+    with get_database_engine().connect() as connection:
+        count, digest = connection.execute(text(COMPS_CHANGE_TOKEN_QUERY)).one()
+
+    return (count, digest)
+
+class CompsRepository:
+    """
+    Process-local comps index keyed by (sector, stage, geo, multiple_name).
+
+    The first lookup loads the table synchronously; after ttl_seconds a
+    lookup schedules a background refresh and keeps serving the current
+    index meanwhile. If a change token loader is given, the refresh first
+    compares tokens and only reloads the rows when the token moved. Load
+    failures are logged and the previous index (or DEFAULT_COMPS) is kept,
+    so lookups never fail because of Postgres; only the first lookup
+    waits on it, over a connection pool shared by every load.
+    """
+
+    def __init__(self,
+                 loader: Callable[[], List[Dict[str, Any]]] = load_comps_from_database,
+                 token_loader: Optional[Callable[[], Any]] = load_comps_change_token,
+                 ttl_seconds: float = 300,
+                 default_rows: Optional[List[Dict[str, Any]]] = None):
+        self.loader = loader
+        self.token_loader = token_loader
+        self.ttl_seconds = ttl_seconds
+        self.loads = 0
+
+        self._index = self._build_index(DEFAULT_COMPS if default_rows is None else default_rows)
+        self._token = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def get(self, sector: str, stage: str, geo: str, multiple_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve comps with fallback: exact match, then the global geo, then
+        adjacent stages (earlier first) in the requested and global geo.
+        The returned dict has a 'match' field saying which rule applied.
+        """
+        self._ensure_fresh()
+        index = self._index
+
+        candidates = [('exact', stage, geo), ('global_geo', stage, GLOBAL_GEO)]
+        for adjacent in adjacent_stages(stage):
+            candidates.append(('adjacent_stage', adjacent, geo))
+            candidates.append(('adjacent_stage_global_geo', adjacent, GLOBAL_GEO))
+
+        for match, candidate_stage, candidate_geo in candidates:
+            row = index.get(comps_key(sector, candidate_stage, candidate_geo, multiple_name))
+            if row is not None:
+                return {**row, 'match': match}
+
+        return None
+
+    def refresh(self) -> bool:
+        """Reload the index now if the change token moved; returns whether it reloaded"""
+        self._refreshed_at = time.monotonic()
+        try:
+            token = self.token_loader() if self.token_loader else None
+            if token is not None and token == self._token:
+                return False
+            rows = self.loader()
+        except Exception as e:
+            logger.warning(f"Comps refresh failed, keeping current index: {str(e)}")
+            return False
+
+        self._index = self._build_index(rows)
+        self._token = token
+        self.loads += 1
+        logger.info(f"Loaded {len(rows)} comps rows")
+        return True
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh thread unless one is already running"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            # Stamp now so concurrent lookups don't queue more refreshes
+            self._refreshed_at = time.monotonic()
+            self._refresh_thread = threading.Thread(target=self.refresh, name='comps-refresh', daemon=True)
+            self._refresh_thread.start()
+
+    def _ensure_fresh(self) -> None:
+        if self._refreshed_at is None:
+            with self._lock:
+                if self._refreshed_at is None:
+                    self.refresh()
+        elif time.monotonic() - self._refreshed_at >= self.ttl_seconds:
+            self.refresh_in_background()
+
+    def _build_index(self, rows: List[Dict[str, Any]]) -> Dict[CompsKey, Dict[str, Any]]:
+        index = {}
+        for row in rows:
+            key = comps_key(row['sector'], row['stage'], row['geo'], row['multiple_name'])
+            index[key] = {
+                'p10': row['p10'],
+                'p50': row['p50'],
+                'p90': row['p90'],
+                'sample': row.get('sample'),
+                'notes': row.get('notes'),
+                'sector': row['sector'],
+                'stage': row['stage'],
+                'geo': row['geo'],
+                'multiple_name': row['multiple_name']
+            }
+        return index
+
+def adjacent_stages(stage: str) -> List[str]:
+    """Stages one step before and after stage in STAGE_ORDER"""
+    order = [value.lower() for value in STAGE_ORDER]
+    normalized = (stage or '').strip().lower()
+    if normalized not in order:
+        return []
+    position = order.index(normalized)
+    return [STAGE_ORDER[i] for i in (position - 1, position + 1) if 0 <= i < len(STAGE_ORDER)]
+
+_comps_repository: Optional[CompsRepository] = None
+
+def get_comps_repository() -> CompsRepository:
+    """Process-wide comps repository, created on first use"""
+    global _comps_repository
+    if _comps_repository is None:
+        _comps_repository = CompsRepository(ttl_seconds=float(os.getenv('COMPS_TTL_SECONDS', 300)))
+    return _comps_repository
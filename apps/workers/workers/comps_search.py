@@ -0,0 +1,203 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from typing import Dict, Any, List, Optional, Union
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import numpy as np
+
+from database import get_database_engine
+
+logger = logging.getLogger(__name__)
+
+# Matches comps.embedding VECTOR(768) in scripts/init-db.sql
+EMBEDDING_DIM = 768
+
+# Columns returned for each similar comparable
+COMPS_FIELDS = ('sector', 'stage', 'geo', 'multiple_name', 'p10', 'p50', 'p90', 'sample', 'notes')
+
+# After a pgvector failure, use the local index for this long before retrying
+PGVECTOR_RETRY_SECONDS = 60
+
+SIMILAR_COMPS_QUERY = (
+    "SELECT sector, stage, geo, multiple_name, p10, p50, p90, sample, notes, "
+    "1 - (embedding <=> CAST(:query AS vector)) AS similarity "
+    "FROM comps WHERE embedding IS NOT NULL "
+    "AND p10 IS NOT NULL AND p50 IS NOT NULL AND p90 IS NOT NULL "
+    "ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"
+)
+
+# Embedder name recorded for indexes whose embeddings came from hash_embedding
+HASH_EMBEDDER = 'hash'
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Deterministic local embedding stand-in: signed feature hashing of word
+    unigrams and bigrams, L2-normalized. Stable across processes and runs,
+    so it can be used in tests and offline indexes.
+    """
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], 'little') % dim
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def comps_description(row: Dict[str, Any]) -> str:
+    """Text used to embed a comps row or a pitch when no embedding is given"""
+    return " ".join(str(row.get(field) or '') for field in ('sector', 'stage', 'geo', 'multiple_name', 'notes'))
+
+def is_text_query(query: Any) -> bool:
+    """Whether a query is a description or comps-like dict rather than an embedding"""
+    return isinstance(query, (str, dict))
+
+def _as_query_vector(query: Union[str, Dict[str, Any], List[float], np.ndarray]) -> np.ndarray:
+    if isinstance(query, str):
+        return hash_embedding(query)
+    if isinstance(query, dict):
+        return hash_embedding(comps_description(query))
+
+    vector = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+class EmbeddingMatrixIndex:
+    """
+    Exact cosine top-k over a memory-mapped embedding matrix.
+
+    The index is a pair of files: <path>.npy holds the L2-normalized
+    float32 embeddings (one row per comp) and <path>.json the matching
+    comps rows and the embedder that produced them. The matrix is opened
+    with mmap_mode='r', so every prefork worker maps the same page-cache
+    pages instead of holding its own copy. Text queries are embedded with
+    hash_embedding and so only work on indexes built with it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.embeddings = np.load(f"{path}.npy", mmap_mode='r')
+        with open(f"{path}.json") as f:
+            metadata = json.load(f)
+        self.rows = metadata['rows']
+        self.embedder = metadata.get('embedder')
+
+        if self.embeddings.shape[0] != len(self.rows):
+            raise ValueError(f"Comps index {path} has {self.embeddings.shape[0]} embeddings for {len(self.rows)} rows")
+
+    @staticmethod
+    def build(path: str, rows: List[Dict[str, Any]], embeddings: Optional[np.ndarray] = None,
+              embedder: Optional[str] = None) -> 'EmbeddingMatrixIndex':
+        """
+        Write an index for rows. Missing embeddings are computed with
+        hash_embedding from each row's description; embedder names the
+        model of supplied embeddings.
+        """
+        if embeddings is None:
+            embeddings = np.stack([hash_embedding(comps_description(row)) for row in rows])
+            embedder = HASH_EMBEDDER
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms > 0, norms, 1)
+
+        np.save(f"{path}.npy", embeddings)
+        with open(f"{path}.json", 'w') as f:
+            json.dump({'embedder': embedder,
+                       'rows': [{field: row.get(field) for field in COMPS_FIELDS} for row in rows]}, f)
+
+        return EmbeddingMatrixIndex(path)
+
+    def search(self, query: Any, k: int = 20) -> List[Dict[str, Any]]:
+        """Top-k rows by cosine similarity, most similar first"""
+        if is_text_query(query) and self.embedder != HASH_EMBEDDER:
+            raise ValueError(f"Comps index {self.path} was built with {self.embedder or 'supplied'} embeddings; "
+                             "pass a query embedding from the same model")
+        similarities = self.embeddings @ _as_query_vector(query)
+        k = min(k, similarities.size)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return [{**self.rows[i], 'similarity': float(similarities[i])} for i in top]
+
+def search_pgvector(query: Any, k: int = 20) -> List[Dict[str, Any]]:
+    """
+    Top-k comps by cosine distance using the pgvector ivfflat index.
+
+    query must be an embedding from the model that wrote comps.embedding;
+    rows without all three multiples are skipped.
+    """
+    if is_text_query(query):
+        raise ValueError("pgvector comps search needs a query embedding from the model that wrote comps.embedding")
+
+    from sqlalchemy import text
+
+    vector = _as_query_vector(query)
+    literal = '[' + ','.join(f"{value:.6g}" for value in vector.tolist()) + ']'
+
+    with get_database_engine().connect() as connection:
+        rows = connection.execute(text(SIMILAR_COMPS_QUERY), {'query': literal, 'k': k}).mappings().all()
+
+    return [
+        {**dict(row), **{column: float(row[column]) for column in ('p10', 'p50', 'p90', 'similarity')}}
+        for row in rows
+    ]
+
+_matrix_indexes: Dict[str, EmbeddingMatrixIndex] = {}
+_pgvector_retry_at = 0.0
+
+def get_matrix_index(path: Optional[str] = None) -> Optional[EmbeddingMatrixIndex]:
+    """Per-process cached memory-mapped index, or None when no index file exists"""
+    path = path or os.getenv('COMPS_EMBEDDINGS_PATH', '/data/comps_embeddings')
+    if path not in _matrix_indexes:
+        if not os.path.exists(f"{path}.npy"):
+            return None
+        _matrix_indexes[path] = EmbeddingMatrixIndex(path)
+    return _matrix_indexes[path]
+
+def find_similar_comps(query: Any, k: int = 20, backend: Optional[str] = None,
+                       index_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Top-k similar comparables for a description, comps-like dict or embedding.
+
+    backend is 'pgvector', 'matrix' or None (COMPS_SEARCH_BACKEND, default
+    pgvector with the memory-mapped matrix as fallback when Postgres or
+    the vector extension is unavailable). pgvector only takes embeddings,
+    so by default descriptions go straight to the matrix index.
+    """
+    global _pgvector_retry_at
+    backend = backend or os.getenv('COMPS_SEARCH_BACKEND')
+
+    if backend == 'pgvector' or (backend is None and not is_text_query(query) and time.monotonic() >= _pgvector_retry_at):
+        try:
+            return {'backend': 'pgvector', 'comps': search_pgvector(query, k)}
+        except Exception as e:
+            if backend == 'pgvector':
+                raise
+            _pgvector_retry_at = time.monotonic() + PGVECTOR_RETRY_SECONDS
+            logger.warning(f"pgvector comps search unavailable, using local index: {str(e)}")
+
+    index = get_matrix_index(index_path)
+    if index is None:
+        return {'backend': 'none', 'comps': []}
+    return {'backend': 'matrix', 'comps': index.search(query, k)}
+
+def summarize_similar_comps(comps: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Similarity-weighted average of the P10/P50/P90 multiples of similar comps"""
+    comps = [comp for comp in comps if all(comp.get(quantile) is not None for quantile in ('p10', 'p50', 'p90'))]
+    weights = np.array([max(comp['similarity'], 0.0) for comp in comps])
+    if weights.sum() <= 0:
+        return None
+
+    summary = {quantile: float(np.average([float(comp[quantile]) for comp in comps], weights=weights))
+               for quantile in ('p10', 'p50', 'p90')}
+    summary['sample'] = len(comps)
+    return summary
@@ -1,6 +1,7 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery_app import celery_app
+from result_cache import cached_result
 from typing import Dict, Any, List
 import logging
 import math
@@ -8,6 +9,7 @@ import math
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True)
+@cached_result('unit_economics')
 def calculate_unit_economics(self, pitch_id: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculate unit economics: LTV/CAC, payback, burn multiple, magic number, rule of 40
@@ -1,12 +1,14 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery_app import celery_app
+from result_cache import cached_result
 from typing import Dict, Any, List
 import logging
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True)
+@cached_result('market_size')
 def calculate_market_size(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculate market size using top-down and bottom-up approaches
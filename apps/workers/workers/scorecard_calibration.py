@@ -0,0 +1,198 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from celery_app import celery_app
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+from datetime import datetime
+import numpy as np
+
+from database import get_database_engine
+from .scorecard_weights import get_weight_store
+from .valuation_engines import DEFAULT_SCORECARD_MULTIPLE_RANGE, DEFAULT_SCORECARD_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+# Per pitch, the first priced round after a stored scorecard valuation and the
+# latest scorecard inputs from before it, on the same pre-money basis as the
+# backtests
+SCORECARD_HISTORY_QUERY = """
+SELECT DISTINCT ON (o.pitch_id)
+       v.inputs, o.pre_money_usd AS realized_usd
+FROM realized_outcomes o
+JOIN valuations v ON v.pitch_id = o.pitch_id AND v.created_at < o.round_date
+WHERE v.method = 'scorecard' AND v.inputs IS NOT NULL AND o.pre_money_usd > 0
+ORDER BY o.pitch_id, o.round_date, v.created_at DESC
+"""
+
+# Fewer usable rows than this and calibration refuses to publish
+MIN_CALIBRATION_SAMPLES = 50
+
+@celery_app.task(bind=True)
+def calibrate_scorecard_weights(self, calibration_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fit scorecard weights and multiple curve to realized outcomes and
+    publish them as a new weight set version
+    """
+    try:
+        logger.info(f"Starting scorecard calibration for calibration_id: {calibration_id}")
+
+        scores, arr, realized = load_scorecard_history(chunk_size=inputs.get('chunk_size', 10000))
+        weight_set = fit_scorecard_weights(scores, realized / arr, ridge=inputs.get('ridge', 0.0))
+
+        if weight_set['n_samples'] < inputs.get('min_samples', MIN_CALIBRATION_SAMPLES):
+            raise ValueError(f"Not enough scorecard history to calibrate: {weight_set['n_samples']} rows")
+
+        weight_set['version'] = inputs.get('version') or f"scorecard-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        if inputs.get('publish', True):
+            get_weight_store().publish(weight_set)
+
+        result = {
+            "calibration_id": calibration_id,
+            "status": "completed",
+            "published": inputs.get('publish', True),
+            **weight_set,
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Scorecard calibration completed for calibration_id: {calibration_id}, version: {weight_set['version']}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Scorecard calibration failed for calibration_id: {calibration_id}, error: {str(e)}")
+        raise
+
+def scorecard_history_arrays(rows: List[Dict[str, Any]],
+                             categories: Tuple[str, ...] = tuple(DEFAULT_SCORECARD_WEIGHTS)) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (scores, arr, realized) arrays from history rows of stored scorecard
+    inputs. Missing scores default to 5 as in the task; rows without
+    positive ARR cannot give a multiple and are dropped.
+    """
+    scores = np.array([[(row['inputs'].get('scores') or {}).get(category, 5) for category in categories]
+                       for row in rows], dtype=float).reshape(len(rows), len(categories))
+    arr = np.array([float(row['inputs'].get('arr') or 0) for row in rows])
+    realized = np.array([float(row['realized_usd'] or 0) for row in rows])
+
+    usable = (arr > 0) & (realized > 0) & np.isfinite(scores).all(axis=1)
+    return scores[usable], arr[usable], realized[usable]
+
+def load_scorecard_history(chunk_size: int = 10000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Scorecard history from Postgres, converted to arrays chunk by chunk"""
+    from sqlalchemy import text
+
+    parts = []
+    with get_database_engine().connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(text(SCORECARD_HISTORY_QUERY))
+        for partition in result.mappings().partitions(chunk_size):
+            parts.append(scorecard_history_arrays([dict(row) for row in partition]))
+
+    if not parts:
+        return np.empty((0, len(DEFAULT_SCORECARD_WEIGHTS))), np.empty(0), np.empty(0)
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+def scorecard_coefficients(weights: Dict[str, float],
+                           multiple_range: Tuple[float, float],
+                           categories: Tuple[str, ...]) -> np.ndarray:
+    """
+    Linear-model form of a weight set: multiple = c0 + sum(c_i * score_i),
+    with c0 = multiple_min and c_i = (max - min) / 10 * w_i / sum(w)
+    """
+    multiple_min, multiple_max = multiple_range
+    total_weight = sum(weights.get(category, 0) for category in categories)
+    slopes = [(multiple_max - multiple_min) / 10 * weights.get(category, 0) / total_weight for category in categories]
+    return np.array([multiple_min] + slopes)
+
+def _solve_nonnegative(gram: np.ndarray, moment: np.ndarray, penalty: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    # Lawson-Hanson active-set NNLS on the (k+1)x(k+1) normal equations:
+    # minimize 1/2 x'Ax - b'x subject to x >= 0, with A = gram + diag(penalty)
+    # and b = moment + penalty * prior. The intercept is constrained too, so
+    # multiple_min cannot go negative.
+    system = gram + np.diag(penalty)
+    target = moment + penalty * prior
+    size = len(target)
+    tolerance = 10 * np.finfo(float).eps * np.abs(system).max() * size
+
+    passive = np.zeros(size, dtype=bool)
+    coefficients = np.zeros(size)
+    gradient = target.copy()
+    for _ in range(3 * size):
+        if passive.all() or gradient[~passive].max() <= tolerance:
+            break
+        passive[np.argmax(np.where(passive, -np.inf, gradient))] = True
+
+        while True:
+            candidate = np.zeros(size)
+            if passive.any():
+                candidate[passive] = np.linalg.lstsq(system[np.ix_(passive, passive)], target[passive], rcond=None)[0]
+            if not passive.any() or candidate[passive].min() > 0:
+                break
+            # Step towards the candidate until the first passive coefficient hits zero
+            blocking = passive & (candidate <= 0)
+            distance = coefficients[blocking] - candidate[blocking]
+            step = np.min(np.where(distance > 0, coefficients[blocking] / np.where(distance > 0, distance, 1), 0.0))
+            coefficients += step * (candidate - coefficients)
+            passive &= coefficients > tolerance
+            coefficients[~passive] = 0.0
+
+        coefficients = candidate
+        gradient = target - system @ coefficients
+
+    return coefficients
+
+def fit_scorecard_weights(scores: np.ndarray,
+                          multiples: np.ndarray,
+                          categories: Tuple[str, ...] = tuple(DEFAULT_SCORECARD_WEIGHTS),
+                          ridge: float = 0.0,
+                          sample_weights: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Least-squares fit of scorecard weights and multiple curve.
+
+    scores is the (n, k) history matrix in categories order and multiples
+    the realized valuation / ARR per row. The scorecard multiple is linear
+    in the scores, so the fit is one pass over the history to form the
+    (k+1)x(k+1) normal equations, solved as a non-negative least squares
+    problem (slopes and the multiple_min intercept); 100k
+    rows take milliseconds. ridge shrinks the slopes towards the current
+    default weights for thin histories. The result is a weight set with
+    weights normalized to sum to 100, the fitted multiple_min/max, and
+    fit metrics next to those of the default weights.
+    """
+    scores = np.asarray(scores, dtype=float)
+    multiples = np.asarray(multiples, dtype=float)
+    n = len(multiples)
+    if n == 0:
+        raise ValueError("No scorecard history to calibrate")
+
+    design = np.column_stack((np.ones(n), scores))
+    row_weights = np.ones(n) if sample_weights is None else np.asarray(sample_weights, dtype=float)
+    weighted = design * row_weights[:, None]
+    total = row_weights.sum()
+    gram = weighted.T @ design / total
+    moment = weighted.T @ multiples / total
+
+    prior = scorecard_coefficients(DEFAULT_SCORECARD_WEIGHTS, DEFAULT_SCORECARD_MULTIPLE_RANGE, categories)
+    penalty = np.full(len(prior), float(ridge))
+    penalty[0] = 0.0
+    coefficients = _solve_nonnegative(gram, moment, penalty, prior)
+
+    slope_total = coefficients[1:].sum()
+    if slope_total <= 0:
+        raise ValueError("Scores have no positive relationship with realized multiples")
+
+    def fit_metrics(theta: np.ndarray) -> Dict[str, float]:
+        residual = design @ theta - multiples
+        mean_square = float(np.sum(row_weights * residual ** 2) / total)
+        variance = float(np.sum(row_weights * (multiples - moment[0]) ** 2) / total)
+        return {'rmse': mean_square ** 0.5, 'r2': 1 - mean_square / variance if variance > 0 else 0.0}
+
+    return {
+        'weights': {category: round(float(100 * slope / slope_total), 4)
+                    for category, slope in zip(categories, coefficients[1:])},
+        'multiple_min': float(coefficients[0]),
+        'multiple_max': float(coefficients[0] + 10 * slope_total),
+        'n_samples': int(n),
+        'metrics': {**fit_metrics(coefficients),
+                    'default_rmse': fit_metrics(prior)['rmse'],
+                    'default_r2': fit_metrics(prior)['r2'],
+                    'ridge': float(ridge)}
+    }
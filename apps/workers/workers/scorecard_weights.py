@@ -0,0 +1,111 @@
+# Created automatically by Cursor AI (2024-12-19)
+
+from typing import Dict, Any, Optional, Callable
+import json
+import logging
+import threading
+
+from database import get_database_engine
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_SET_QUERY = """
+SELECT version, weights, multiple_min, multiple_max, metrics, n_samples, created_at
+FROM scorecard_weight_sets
+WHERE version = :version
+"""
+
+PUBLISH_WEIGHT_SET_QUERY = """
+INSERT INTO scorecard_weight_sets (version, weights, multiple_min, multiple_max, metrics, n_samples)
+VALUES (:version, CAST(:weights AS JSONB), :multiple_min, :multiple_max, CAST(:metrics AS JSONB), :n_samples)
+"""
+
+def load_weight_set_from_database(version: str) -> Optional[Dict[str, Any]]:
+    """Read one published weight set, or None if the version does not exist"""
+    from sqlalchemy import text
+
+    with get_database_engine().connect() as connection:
+        row = connection.execute(text(WEIGHT_SET_QUERY), {'version': version}).mappings().first()
+
+    if row is None:
+        return None
+    return {
+        'version': row['version'],
+        'weights': {category: float(weight) for category, weight in row['weights'].items()},
+        'multiple_min': float(row['multiple_min']),
+        'multiple_max': float(row['multiple_max']),
+        'metrics': row['metrics'] or {},
+        'n_samples': row['n_samples'],
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None
+    }
+
+def publish_weight_set_to_database(weight_set: Dict[str, Any]) -> None:
+    """Insert a weight set; versions are unique, so republishing one fails"""
+    from sqlalchemy import text
+
+    with get_database_engine().begin() as connection:
+        connection.execute(text(PUBLISH_WEIGHT_SET_QUERY), {
+            'version': weight_set['version'],
+            'weights': json.dumps(weight_set['weights']),
+            'multiple_min': weight_set['multiple_min'],
+            'multiple_max': weight_set['multiple_max'],
+            'metrics': json.dumps(weight_set.get('metrics', {})),
+            'n_samples': weight_set.get('n_samples')
+        })
+
+class ScorecardWeightStore:
+    """
+    Versioned scorecard weight sets from the scorecard_weight_sets table.
+
+    A published version never changes, so loaded sets are cached for the
+    life of the process and valuation results stay cacheable by their
+    inputs. Tasks therefore name an explicit version; resolving "latest"
+    is left to the caller.
+    """
+
+    def __init__(self,
+                 loader: Callable[[str], Optional[Dict[str, Any]]] = load_weight_set_from_database,
+                 publisher: Callable[[Dict[str, Any]], None] = publish_weight_set_to_database):
+        self.loader = loader
+        self.publisher = publisher
+        self._weight_sets: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, version: str) -> Dict[str, Any]:
+        """The weight set for version; raises ValueError if it was never published"""
+        weight_set = self._weight_sets.get(version)
+        if weight_set is not None:
+            return weight_set
+
+        with self._lock:
+            weight_set = self._weight_sets.get(version)
+            if weight_set is None:
+                weight_set = self.loader(version)
+                self.loads += 1
+                if weight_set is None:
+                    raise ValueError(f"Unknown scorecard weight set: {version}")
+                self._weight_sets[version] = weight_set
+        return weight_set
+
+    def publish(self, weight_set: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a new weight set and make it available to this process"""
+        self.publisher(weight_set)
+        with self._lock:
+            self._weight_sets[weight_set['version']] = weight_set
+        logger.info(f"Published scorecard weight set {weight_set['version']}")
+        return weight_set
+
+_weight_store: Optional[ScorecardWeightStore] = None
+
+def get_weight_store() -> ScorecardWeightStore:
+    """Process-wide scorecard weight store, created on first use"""
+    global _weight_store
+    if _weight_store is None:
+        _weight_store = ScorecardWeightStore()
+    return _weight_store
+
+def set_weight_store(store: Optional[ScorecardWeightStore]) -> None:
+    """Replace the process-wide store (e.g. in tests)"""
+    global _weight_store
+    _weight_store = store
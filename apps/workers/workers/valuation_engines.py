@@ -1,13 +1,104 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery_app import celery_app
-from typing import Dict, Any, List
+from result_cache import cached_result
+from solvers import solve_for_target, solver_diagnostics
+from typing import Dict, Any, List, Optional
 import logging
 import math
+import time
+from datetime import datetime
+import numpy as np
+
+from .comps_repository import get_comps_repository
+from .comps_search import find_similar_comps, summarize_similar_comps
+from .scorecard_weights import get_weight_store
 
 logger = logging.getLogger(__name__)
 
+# Default scorecard category weights
+DEFAULT_SCORECARD_WEIGHTS = {
+    'team': 25,
+    'market': 25,
+    'product': 15,
+    'traction': 15,
+    'competition': 10,
+    'defensibility': 5,
+    'gtm': 5
+}
+
+# Default scorecard multiple curve: a 0/10 score maps to 0.5x/10x ARR
+DEFAULT_SCORECARD_MULTIPLE_RANGE = (0.5, 10.0)
+
+# Standard RFS risk factor values (per point of the -2 to +2 score)
+RFS_RISK_VALUES = {
+    'management': 300000,
+    'stage_of_business': 250000,
+    'legislation_political_risk': 200000,
+    'manufacturing_risk': 200000,
+    'sales_marketing_risk': 200000,
+    'funding_capital_raising_risk': 250000,
+    'competition_risk': 200000,
+    'technology_risk': 300000,
+    'litigation_risk': 100000,
+    'international_risk': 150000,
+    'reputation_risk': 100000,
+    'exit_value_risk': 100000
+}
+
+# Berkus criteria, each adding BERKUS_CRITERION_VALUE on top of the base value
+BERKUS_CRITERIA = ('working_prototype', 'quality_team', 'quality_board', 'strategic_relationships', 'sales')
+BERKUS_CRITERION_VALUE = 500000
+BERKUS_BASE_VALUE = 500000
+
+# Distributions that can be attached to Monte Carlo inputs
+MONTE_CARLO_DISTRIBUTIONS = ('normal', 'lognormal', 'uniform', 'triangular', 'bernoulli', 'choice')
+
+# Valid ranges for drawn inputs; 'name.*' applies to every nested input.
+# Money and multiple inputs are non-negative, so valuations stay inside
+# the histogram below instead of piling into its first bin
+MONTE_CARLO_BOUNDS = {
+    'arr': (0, None),
+    'exit_value': (0, None),
+    'multiple': (0, None),
+    'base_value': (0, None),
+    'probability': (0, 1),
+    'target_ownership': (0, 1),
+    'scores.*': (0, 10),
+    'risk_factors.*': (-2, 2)
+}
+
+# Monte Carlo histogram: log-spaced bins from $1 to $10T, about 1.5% wide
+MONTE_CARLO_EDGES = np.concatenate(([0.0], np.logspace(0, 13, 2048)))
+
+# Methods with continuous, monotone formulas that the reverse solver supports
+REVERSE_SOLVABLE_METHODS = ('scorecard', 'vc_method', 'comps', 'rfs')
+
+# Default search bounds per unknown input
+SOLVER_BOUNDS = {
+    'exit_value': (0, 1e9),
+    'arr': (0, 1e7),
+    'multiple': (0, 100),
+    'irr': (-0.99, 10),
+    'probability': (0, 1),
+    'target_ownership': (0, 1),
+    'years': (0.01, 50),
+    'base_value': (0, 1e8),
+    'scores.*': (0, 10),
+    'risk_factors.*': (-2, 2)
+}
+
+# Unknowns without a natural upper bound; the solver pushes their upper bound out
+UNBOUNDED_UNKNOWNS = ('exit_value', 'arr', 'multiple', 'base_value')
+
+# VC method inputs varied by the sensitivity grid, in grid axis order
+VC_SENSITIVITY_AXES = ('exit_value', 'irr', 'probability', 'years')
+
+# Above this many cells the grid is summarized instead of returned in full
+MAX_RESULT_GRID_CELLS = 250000
+
 @celery_app.task(bind=True)
+@cached_result('valuation.scorecard')
 def run_scorecard_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Scorecard method valuation with configurable weights
@@ -15,16 +106,8 @@ def run_scorecard_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict
     try:
         logger.info(f"Starting scorecard valuation for pitch_id: {pitch_id}")
         
-        # Default weights if not provided
-        weights = inputs.get('weights', {
-            'team': 25,
-            'market': 25,
-            'product': 15,
-            'traction': 15,
-            'competition': 10,
-            'defensibility': 5,
-            'gtm': 5
-        })
+        # Default or published (inputs['weight_set']) weights; explicit weights win
+        weights, multiple_min, multiple_max = scorecard_parameters(inputs)
         
         # Get scores (0-10 scale)
         scores = inputs.get('scores', {})
@@ -40,8 +123,8 @@ def run_scorecard_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict
         
         base_score = total_score / total_weight if total_weight > 0 else 0
         
-        # Convert to valuation multiple (typical range: 0.5x to 10x ARR)
-        base_multiple = 0.5 + (base_score / 10) * 9.5
+        # Convert to valuation multiple (default range: 0.5x to 10x ARR)
+        base_multiple = multiple_min + (base_score / 10) * (multiple_max - multiple_min)
         
         # Get ARR for valuation
         arr = inputs.get('arr', 0)
@@ -60,6 +143,7 @@ def run_scorecard_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict
             "result_high": arr * high_multiple,
             "inputs": inputs,
             "weights": weights,
+            "weight_set": inputs.get('weight_set'),
             "scores": scores,
             "base_score": base_score,
             "base_multiple": base_multiple,
@@ -74,6 +158,7 @@ def run_scorecard_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict
         raise
 
 @celery_app.task(bind=True)
+@cached_result('valuation.vc_method')
 def run_vc_method_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     VC Method valuation using present value calculation
@@ -111,6 +196,23 @@ def run_vc_method_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict
             "formula": f"PV = (${exit_value:,.0f} × {target_ownership*100:.0f}% × {probability*100:.0f}%) / (1+{irr*100:.0f}%)^{years}",
             "notes": f"VC method based on ${exit_value:,.0f} exit value, {target_ownership*100:.0f}% ownership, {irr*100:.0f}% IRR, {probability*100:.0f}% probability over {years} years"
         }
+
+        # Optional sensitivity mode: full grid plus tornado deltas
+        if inputs.get('sensitivity'):
+            sensitivity = inputs['sensitivity'] if isinstance(inputs['sensitivity'], dict) else {}
+            base_values = {'exit_value': exit_value, 'irr': irr, 'probability': probability, 'years': years}
+            axes = build_vc_sensitivity_axes(base_values, sensitivity.get('axes', {}), sensitivity.get('steps', 11))
+            grid = calculate_vc_sensitivity_grid(target_ownership, **axes)
+            include_grid = sensitivity.get('include_grid', grid.size <= MAX_RESULT_GRID_CELLS)
+
+            result["sensitivity"] = {
+                "axes": {name: values.tolist() for name, values in axes.items()},
+                "axis_order": list(VC_SENSITIVITY_AXES),
+                "grid": grid.tolist() if include_grid else None,
+                "summary": dict(zip(["min", "p10", "p50", "p90", "max"],
+                                    np.percentile(grid, [0, 10, 50, 90, 100]).tolist())),
+                "tornado": calculate_vc_tornado(base_values, target_ownership, axes)
+            }
         
         logger.info(f"VC method valuation completed for pitch_id: {pitch_id}")
         return result
@@ -160,6 +262,13 @@ def run_comps_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str
             "applied_multiple": comps_data['p50'],
             "notes": f"Comps valuation using {metric} for {sector} {stage} companies in {geo}. Sample size: {comps_data['sample']} companies"
         }
+
+        # Optional nearest-neighbour comparables for a pitch description or embedding
+        if inputs.get('similar_to'):
+            similar = find_similar_comps(inputs['similar_to'], inputs.get('similar_k', 20))
+            result["similar_comps"] = similar['comps']
+            result["similar_comps_backend"] = similar['backend']
+            result["similar_comps_summary"] = summarize_similar_comps(similar['comps'])
         
         logger.info(f"Comps valuation completed for pitch_id: {pitch_id}")
         return result
@@ -169,6 +278,7 @@ def run_comps_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str
         raise
 
 @celery_app.task(bind=True)
+@cached_result('valuation.berkus')
 def run_berkus_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Berkus method for pre-revenue companies
@@ -232,6 +342,7 @@ def run_berkus_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[st
         raise
 
 @celery_app.task(bind=True)
+@cached_result('valuation.rfs')
 def run_rfs_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Risk Factor Summation method
@@ -245,20 +356,7 @@ def run_rfs_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str,
         risk_factors = inputs.get('risk_factors', {})
         
         # Standard risk factor values
-        risk_values = {
-            'management': 300000,
-            'stage_of_business': 250000,
-            'legislation_political_risk': 200000,
-            'manufacturing_risk': 200000,
-            'sales_marketing_risk': 200000,
-            'funding_capital_raising_risk': 250000,
-            'competition_risk': 200000,
-            'technology_risk': 300000,
-            'litigation_risk': 100000,
-            'international_risk': 150000,
-            'reputation_risk': 100000,
-            'exit_value_risk': 100000
-        }
+        risk_values = RFS_RISK_VALUES
         
         # Calculate total adjustment
         total_adjustment = 0
@@ -305,25 +403,476 @@ def run_rfs_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str,
         logger.error(f"RFS valuation failed for pitch_id: {pitch_id}, error: {str(e)}")
         raise
 
-def get_comps_data(sector: str, stage: str, geo: str, metric: str) -> Dict[str, Any]:
+@celery_app.task(bind=True)
+def run_valuation_panel(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run several valuation methods in one task, with per-method timings
     """
-    Get comparable company data from database
-    In real implementation, this would query the comps table
-    """
-    # Mock data - in real implementation, query the database
-    comps_library = {
-        ('SaaS', 'seed', 'US', 'EV/ARR'): {
-            'p10': 5, 'p50': 15, 'p90': 30,
-            'sample': 50, 'notes': 'SaaS seed stage comps'
-        },
-        ('Fintech', 'seed', 'US', 'EV/ARR'): {
-            'p10': 8, 'p50': 20, 'p90': 40,
-            'sample': 30, 'notes': 'Fintech seed stage comps'
-        },
-        ('Healthtech', 'seed', 'US', 'EV/ARR'): {
-            'p10': 6, 'p50': 18, 'p90': 35,
-            'sample': 25, 'notes': 'Healthtech seed stage comps'
+    try:
+        logger.info(f"Starting valuation panel for pitch_id: {pitch_id}")
+
+        panel = run_valuations(pitch_id, inputs, inputs.get('methods'))
+
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "methods": list(panel['results'].keys()),
+            "results": panel['results'],
+            "errors": panel['errors'],
+            "timings_ms": panel['timings_ms'],
+            "total_ms": panel['total_ms'],
+            "created_at": datetime.now().isoformat()
         }
+
+        logger.info(f"Valuation panel completed for pitch_id: {pitch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Valuation panel failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+def vc_present_value(exit_value: Any, target_ownership: float, irr: Any, probability: Any, years: Any) -> Any:
+    """PV = (ExitValue × Ownership × Probability) / (1+IRR)^Years, for scalars or broadcast arrays"""
+    return exit_value * target_ownership * probability / (1 + irr) ** years
+
+def build_vc_sensitivity_axes(base_values: Dict[str, float],
+                              axis_specs: Dict[str, Any],
+                              steps: int = 11) -> Dict[str, np.ndarray]:
+    """
+    Resolve the sensitivity axes for the VC method grid.
+
+    Each axis spec is either an explicit list of values or a dict with
+    'low', 'high' and optional 'steps'. Missing axes default to the same
+    ranges the low/high band uses: exit value and probability at 0.5x-1.5x,
+    IRR at 0.8x-1.2x and years at +/- 2.
+    """
+    defaults = {
+        'exit_value': (base_values['exit_value'] * 0.5, base_values['exit_value'] * 1.5),
+        'irr': (base_values['irr'] * 0.8, base_values['irr'] * 1.2),
+        'probability': (base_values['probability'] * 0.5, min(base_values['probability'] * 1.5, 1.0)),
+        'years': (max(base_values['years'] - 2, 1), base_values['years'] + 2)
+    }
+
+    axes = {}
+    for name in VC_SENSITIVITY_AXES:
+        spec = axis_specs.get(name)
+        if isinstance(spec, (list, tuple)):
+            axes[name] = np.asarray(spec, dtype=float)
+        else:
+            spec = spec or {}
+            low, high = defaults[name]
+            axes[name] = np.linspace(spec.get('low', low), spec.get('high', high), spec.get('steps', steps))
+
+    return axes
+
+def calculate_vc_sensitivity_grid(target_ownership: float,
+                                  exit_value: np.ndarray,
+                                  irr: np.ndarray,
+                                  probability: np.ndarray,
+                                  years: np.ndarray) -> np.ndarray:
+    """
+    Present value over the full exit value × IRR × probability × years grid.
+
+    The discount factor only depends on IRR and years, so it is computed
+    once on that (irr × years) plane and broadcast against the
+    exit value × probability numerator.
+    """
+    numerator = np.multiply.outer(np.asarray(exit_value, dtype=float) * target_ownership,
+                                  np.asarray(probability, dtype=float))
+    discount = np.power.outer(1 + np.asarray(irr, dtype=float), np.asarray(years, dtype=float))
+    return numerator[:, None, :, None] / discount[None, :, None, :]
+
+def calculate_vc_tornado(base_values: Dict[str, float],
+                         target_ownership: float,
+                         axes: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Tornado deltas: PV change when one input moves to each end of its axis
+    with the others held at base, sorted by swing
+    """
+    base_pv = vc_present_value(target_ownership=target_ownership, **base_values)
+
+    bars = []
+    for name in VC_SENSITIVITY_AXES:
+        low_value, high_value = float(axes[name].min()), float(axes[name].max())
+        low_pv = vc_present_value(target_ownership=target_ownership, **{**base_values, name: low_value})
+        high_pv = vc_present_value(target_ownership=target_ownership, **{**base_values, name: high_value})
+        bars.append({
+            'input': name,
+            'low_value': low_value,
+            'high_value': high_value,
+            'low_delta': low_pv - base_pv,
+            'high_delta': high_pv - base_pv,
+            'swing': abs(high_pv - low_pv)
+        })
+
+    return sorted(bars, key=lambda bar: bar['swing'], reverse=True)
+
+@celery_app.task(bind=True)
+def run_monte_carlo_valuation(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monte Carlo valuation: empirical P10/P50/P90 per method from input distributions
+    """
+    try:
+        logger.info(f"Starting Monte Carlo valuation for pitch_id: {pitch_id}")
+
+        simulation = simulate_valuations(
+            inputs,
+            inputs.get('distributions', {}),
+            methods=inputs.get('methods'),
+            n_draws=inputs.get('n_draws', 100000),
+            seed=inputs.get('seed'),
+            blend_weights=inputs.get('blend_weights')
+        )
+
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "n_draws": simulation['n_draws'],
+            "seed": simulation['seed'],
+            "methods": simulation['methods'],
+            "blended": simulation['blended'],
+            "blend_weights": simulation['blend_weights'],
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Monte Carlo valuation completed for pitch_id: {pitch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Monte Carlo valuation failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+def validate_distributions(distributions: Dict[str, Any]) -> None:
+    """Raise for input distributions whose 'dist' is not one of MONTE_CARLO_DISTRIBUTIONS"""
+    unknown = sorted({str(spec.get('dist', 'normal')) for spec in distributions.values() if isinstance(spec, dict)}
+                     - set(MONTE_CARLO_DISTRIBUTIONS))
+    if unknown:
+        raise ValueError(f"Unsupported distributions: {', '.join(unknown)}")
+
+def draw_distribution(rng: np.random.Generator, spec: Any, size: int) -> np.ndarray:
+    """
+    Draw samples for one input. spec is a constant or a dict with 'dist' and:
+
+    - normal: 'mean', 'std'
+    - lognormal: 'median', 'sigma'
+    - uniform: 'low', 'high'
+    - triangular: 'low', 'mode', 'high'
+    - bernoulli: 'p' (draws 0/1)
+    - choice: 'values', optional 'weights'
+
+    Callers check the specs once with validate_distributions.
+    """
+    if not isinstance(spec, dict):
+        return np.full(size, float(spec))
+
+    dist = spec.get('dist', 'normal')
+    if dist == 'normal':
+        return rng.normal(spec['mean'], spec.get('std', 0), size)
+    if dist == 'lognormal':
+        return spec['median'] * np.exp(spec.get('sigma', 0) * rng.standard_normal(size))
+    if dist == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], size)
+    if dist == 'triangular':
+        return rng.triangular(spec['low'], spec['mode'], spec['high'], size)
+    if dist == 'bernoulli':
+        return (rng.random(size) < spec['p']).astype(float)
+
+    # choice
+    values = np.asarray(spec['values'], dtype=float)
+    weights = np.asarray(spec.get('weights', np.ones(values.size)), dtype=float)
+    return values[rng.choice(values.size, size, p=weights / weights.sum())]
+
+def clip_draws(name: str, values: np.ndarray) -> np.ndarray:
+    """Clip drawn values to the valid range of bounded inputs (see MONTE_CARLO_BOUNDS)"""
+    bounds = MONTE_CARLO_BOUNDS.get(name, MONTE_CARLO_BOUNDS.get(name.split('.', 1)[0] + '.*'))
+    return np.clip(values, *bounds) if bounds else values
+
+def apply_draws(inputs: Dict[str, Any], draws: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Overlay drawn arrays on the inputs. Dotted names address nested inputs,
+    e.g. 'scores.team' or 'risk_factors.management'.
+    """
+    resolved = dict(inputs)
+    for name, values in draws.items():
+        if '.' in name:
+            parent, child = name.split('.', 1)
+            resolved[parent] = {**resolved.get(parent, {}), child: values}
+        else:
+            resolved[name] = values
+    return resolved
+
+def scorecard_parameters(inputs: Dict[str, Any]) -> tuple:
+    """
+    Scorecard weights and multiple curve (weights, multiple_min, multiple_max).
+
+    inputs['weight_set'] names a published calibration version (see
+    scorecard_calibration); explicit inputs['weights'] override its weights.
+    """
+    version = inputs.get('weight_set')
+    if version:
+        weight_set = get_weight_store().get(version)
+        return (inputs.get('weights', weight_set['weights']),
+                weight_set['multiple_min'], weight_set['multiple_max'])
+    return (inputs.get('weights', DEFAULT_SCORECARD_WEIGHTS),) + DEFAULT_SCORECARD_MULTIPLE_RANGE
+
+def scorecard_values(inputs: Dict[str, Any]) -> Any:
+    """Scorecard valuation for scalar or array inputs"""
+    weights, multiple_min, multiple_max = scorecard_parameters(inputs)
+    scores = inputs.get('scores', {})
+    total_weight = sum(weights.values())
+    total_score = sum(scores.get(category, 5) * weight for category, weight in weights.items())
+    base_score = total_score / total_weight if total_weight > 0 else 0
+    return inputs.get('arr', 0) * (multiple_min + (base_score / 10) * (multiple_max - multiple_min))
+
+def vc_method_values(inputs: Dict[str, Any]) -> Any:
+    """VC method present value for scalar or array inputs"""
+    return vc_present_value(inputs.get('exit_value', 0),
+                            inputs.get('target_ownership', 0.1),
+                            inputs.get('irr', 0.25),
+                            inputs.get('probability', 0.1),
+                            inputs.get('years', 7))
+
+def comps_values(inputs: Dict[str, Any]) -> Any:
+    """Comps valuation; 'multiple' defaults to the comps P50 for the segment"""
+    multiple = inputs.get('multiple')
+    if multiple is None:
+        comps_data = get_comps_data(inputs.get('sector', 'SaaS'), inputs.get('stage', 'seed'),
+                                    inputs.get('geo', 'US'), inputs.get('metric', 'EV/ARR'))
+        multiple = comps_data['p50'] if comps_data else 15
+    return inputs.get('arr', 0) * multiple
+
+def berkus_values(inputs: Dict[str, Any]) -> Any:
+    """Berkus valuation; criteria can be booleans or 0/1 draws"""
+    criteria_met = sum((np.asarray(inputs.get(criterion, False), dtype=float) != 0).astype(float) for criterion in BERKUS_CRITERIA)
+    return BERKUS_BASE_VALUE + BERKUS_CRITERION_VALUE * criteria_met
+
+def rfs_values(inputs: Dict[str, Any]) -> Any:
+    """RFS valuation for scalar or array risk factor scores"""
+    risk_factors = inputs.get('risk_factors', {})
+    adjustment = sum(RFS_RISK_VALUES[factor] * score for factor, score in risk_factors.items() if factor in RFS_RISK_VALUES)
+    return np.maximum(inputs.get('base_value', 1000000) + adjustment, 100000)
+
+# Vectorized base-value formulas used by the Monte Carlo and batch modes
+VALUATION_VALUE_FUNCTIONS = {
+    'scorecard': scorecard_values,
+    'vc_method': vc_method_values,
+    'comps': comps_values,
+    'berkus': berkus_values,
+    'rfs': rfs_values
+}
+
+def blend_weight_vector(methods: List[str], blend_weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Normalized blend weights in method order (equal weights by default)"""
+    blend_weights = blend_weights or {method: 1.0 for method in methods}
+    weights = np.array([blend_weights.get(method, 0.0) for method in methods], dtype=float)
+    return weights / weights.sum()
+
+def evaluate_valuations(resolved: Dict[str, Any], methods: List[str], weights: np.ndarray, size: int) -> np.ndarray:
+    """Base values per method for size draws, plus the blended value as the last row"""
+    values = np.empty((len(methods) + 1, size))
+    for row, method in enumerate(methods):
+        values[row] = VALUATION_VALUE_FUNCTIONS[method](resolved)
+    values[-1] = weights @ values[:-1]
+    return values
+
+def simulate_valuations(inputs: Dict[str, Any],
+                        distributions: Dict[str, Any],
+                        methods: Optional[List[str]] = None,
+                        n_draws: int = 100000,
+                        seed: Optional[int] = None,
+                        blend_weights: Optional[Dict[str, float]] = None,
+                        batch_size: int = 100000,
+                        percentiles: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Monte Carlo valuation across methods.
+
+    Inputs named in distributions are drawn in seeded batches, clipped to
+    MONTE_CARLO_BOUNDS and pushed through the vectorized method formulas;
+    the same draw feeds every method that uses an input (e.g. ARR for
+    scorecard and comps). The blended value is the per-draw weighted
+    average across methods.
+
+    Results are reduced per batch into fixed log-spaced histograms plus
+    running sums, so memory stays flat in n_draws. Percentiles are the mean
+    of the bin holding them (about 1.5% wide, exact for point masses such
+    as Berkus outcomes).
+    """
+    methods = list(methods or VALUATION_VALUE_FUNCTIONS.keys())
+    unknown = [method for method in methods if method not in VALUATION_VALUE_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unsupported valuation methods: {', '.join(unknown)}")
+
+    validate_distributions(distributions)
+
+    percentiles = percentiles or [10, 50, 90]
+    weights = blend_weight_vector(methods, blend_weights)
+
+    seed_sequence = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed_sequence)
+    names = sorted(distributions.keys())
+
+    series = methods + ['blended']
+    n_bins = MONTE_CARLO_EDGES.size
+    counts = np.zeros((len(series), n_bins), dtype=np.int64)
+    sums = np.zeros((len(series), n_bins))
+    totals = np.zeros(len(series))
+    minimums = np.full(len(series), np.inf)
+    maximums = np.full(len(series), -np.inf)
+    offsets = (np.arange(len(series)) * n_bins)[:, None]
+
+    for start in range(0, n_draws, batch_size):
+        size = min(batch_size, n_draws - start)
+        draws = {name: clip_draws(name, draw_distribution(rng, distributions[name], size)) for name in names}
+        values = evaluate_valuations(apply_draws(inputs, draws), methods, weights, size)
+
+        bins = np.searchsorted(MONTE_CARLO_EDGES, values, side='left').clip(0, n_bins - 1)
+        flat_bins = (bins + offsets).ravel()
+        counts += np.bincount(flat_bins, minlength=counts.size).reshape(counts.shape)
+        sums += np.bincount(flat_bins, weights=values.ravel(), minlength=counts.size).reshape(counts.shape)
+        totals += values.sum(axis=1)
+        minimums = np.minimum(minimums, values.min(axis=1))
+        maximums = np.maximum(maximums, values.max(axis=1))
+
+    cumulative = np.cumsum(counts, axis=1)
+    rows = np.arange(len(series))
+    summaries = {}
+    for row, name in enumerate(series):
+        summary = {'mean': totals[row] / n_draws, 'min': minimums[row], 'max': maximums[row]}
+        for q in percentiles:
+            bin_index = min(int(np.searchsorted(cumulative[row], n_draws * q / 100)), n_bins - 1)
+            summary[f"p{q:g}"] = sums[row, bin_index] / max(counts[row, bin_index], 1)
+        summaries[name] = {key: float(value) for key, value in summary.items()}
+
+    return {
+        'n_draws': n_draws,
+        'seed': seed_sequence.entropy,
+        'methods': {method: summaries[method] for method in methods},
+        'blended': summaries['blended'],
+        'blend_weights': dict(zip(methods, weights.tolist()))
+    }
+
+@celery_app.task(bind=True)
+def solve_valuation_target(self, pitch_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Solve for the input value that makes a valuation method hit a target
+    """
+    try:
+        logger.info(f"Starting valuation target solve for pitch_id: {pitch_id}")
+
+        method = inputs.get('method', 'vc_method')
+        unknown = inputs['unknown']
+        solution = solve_valuation_input(method, unknown, inputs['target'], inputs.get('inputs', {}), inputs.get('bounds'))
+
+        result = {
+            "pitch_id": pitch_id,
+            "status": "completed",
+            "method": method,
+            "unknown": unknown,
+            "target": np.asarray(inputs['target'], dtype=float).ravel().tolist(),
+            **solver_diagnostics(solution),
+            "created_at": datetime.now().isoformat()
+        }
+
+        logger.info(f"Valuation target solve completed for pitch_id: {pitch_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Valuation target solve failed for pitch_id: {pitch_id}, error: {str(e)}")
+        raise
+
+def solve_valuation_input(method: str,
+                          unknown: str,
+                          targets: Any,
+                          inputs: Dict[str, Any],
+                          bounds: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Solve for one input of a valuation method given target base valuations.
+
+    inputs are per-pitch style inputs whose values may be arrays, one
+    entry per case (dotted names such as 'scores.team' address nested
+    inputs); targets broadcast against them. For example, the exit value
+    that makes a 10% stake worth $2M at a 25% IRR is
+    solve_valuation_input('vc_method', 'exit_value', 2e6,
+    {'irr': 0.25, 'target_ownership': 0.1}).
+    """
+    if method not in REVERSE_SOLVABLE_METHODS:
+        raise ValueError(f"Unsupported method for reverse solving: {method}")
+
+    if bounds is None:
+        bounds = SOLVER_BOUNDS.get(unknown, SOLVER_BOUNDS.get(unknown.split('.', 1)[0] + '.*'))
+    if bounds is None:
+        raise ValueError(f"No default bounds for {unknown}; pass bounds=(low, high)")
+
+    array_inputs = {name: np.asarray(value, dtype=float) for name, value in inputs.items()
+                    if isinstance(value, (list, tuple, np.ndarray))}
+    resolved = apply_draws({name: value for name, value in inputs.items() if name not in array_inputs}, array_inputs)
+    value_function = VALUATION_VALUE_FUNCTIONS[method]
+
+    def evaluate(candidates: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(value_function(apply_draws(resolved, {unknown: candidates})), candidates.shape)
+
+    shape = np.broadcast_shapes(np.shape(targets), *[value.shape for value in array_inputs.values()])
+    targets = np.broadcast_to(np.asarray(targets, dtype=float), shape)
+
+    return solve_for_target(evaluate, targets, bounds[0], bounds[1],
+                            max_expansions=40 if unknown in UNBOUNDED_UNKNOWNS else 0)
+
+def get_comps_data(sector: str, stage: str, geo: str, metric: str) -> Dict[str, Any]:
+    """
+    Get comparable company data from the process-local comps index, with
+    geo and adjacent-stage fallback (see CompsRepository)
+    """
+    return get_comps_repository().get(sector, stage, geo, metric)
+
+
+# Valuation methods available to the panel, in default run order
+VALUATION_METHODS = {
+    'scorecard': run_scorecard_valuation,
+    'vc_method': run_vc_method_valuation,
+    'comps': run_comps_valuation,
+    'berkus': run_berkus_valuation,
+    'rfs': run_rfs_valuation
+}
+
+def run_valuations(pitch_id: str,
+                   inputs: Dict[str, Any],
+                   methods: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run a subset of valuation methods in-process.
+
+    Each method gets the shared inputs with inputs[method] (if present)
+    layered on top, so e.g. {'arr': 1e6, 'comps': {'sector': 'Fintech'}}
+    works. A failing method is reported in 'errors' and does not stop the
+    others.
+    """
+    methods = list(methods or VALUATION_METHODS.keys())
+    unknown = [method for method in methods if method not in VALUATION_METHODS]
+    if unknown:
+        raise ValueError(f"Unsupported valuation methods: {', '.join(unknown)}")
+
+    shared_inputs = {key: value for key, value in inputs.items()
+                     if key != 'methods' and key not in VALUATION_METHODS}
+
+    results = {}
+    errors = {}
+    timings_ms = {}
+    panel_start = time.perf_counter()
+
+    for method in methods:
+        method_inputs = dict(shared_inputs)
+        method_inputs.update(inputs.get(method) or {})
+
+        start = time.perf_counter()
+        try:
+            # Call the task body directly, without a broker round trip
+            results[method] = VALUATION_METHODS[method].run(pitch_id, method_inputs)
+        except Exception as e:
+            errors[method] = str(e)
+        timings_ms[method] = (time.perf_counter() - start) * 1000
+
+    return {
+        'results': results,
+        'errors': errors,
+        'timings_ms': timings_ms,
+        'total_ms': (time.perf_counter() - panel_start) * 1000
     }
-    
-    return comps_library.get((sector, stage, geo, metric), None)
@@ -171,6 +171,30 @@ CREATE TABLE decisions (
     created_at TIMESTAMPTZ DEFAULT now()
 );
 
+-- Realized outcomes (later priced rounds, used to backtest valuations)
+CREATE TABLE realized_outcomes (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    pitch_id UUID REFERENCES pitches(id) ON DELETE CASCADE,
+    round_date DATE,
+    round_stage TEXT,
+    pre_money_usd NUMERIC,
+    post_money_usd NUMERIC,
+    source TEXT,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Scorecard weight sets (versioned calibrations of scorecard weights)
+CREATE TABLE scorecard_weight_sets (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    version TEXT UNIQUE NOT NULL,
+    weights JSONB NOT NULL,
+    multiple_min NUMERIC NOT NULL,
+    multiple_max NUMERIC NOT NULL,
+    metrics JSONB,
+    n_samples INT,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
 -- Term sheets
 CREATE TABLE term_sheets (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -247,6 +271,7 @@ CREATE INDEX idx_pitches_status ON pitches(status);
 CREATE INDEX idx_kpis_pitch_id_metric_period ON kpis(pitch_id, metric, period);
 CREATE INDEX idx_valuations_pitch_id_method ON valuations(pitch_id, method);
 CREATE INDEX idx_risks_pitch_id_severity ON risks(pitch_id, severity);
+CREATE INDEX idx_realized_outcomes_pitch_id_round_date ON realized_outcomes(pitch_id, round_date);
 CREATE INDEX idx_comps_sector_stage_geo ON comps(sector, stage, geo);
 CREATE INDEX idx_audit_log_org_id_created_at ON audit_log(org_id, created_at);
 